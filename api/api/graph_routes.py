@@ -0,0 +1,120 @@
+from fastapi import APIRouter, HTTPException, Depends, Request, Query
+from fastapi.responses import ORJSONResponse, Response
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from api.services.rag_service import RAGService
+from api.api.routes import get_rag_service
+import asyncio
+import logging
+import re
+
+if TYPE_CHECKING:
+    # Loads pandas; imported with the GraphRAG client, not at app startup
+    from api.services.graph_lookup import GraphLookup
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/graph", tags=["graph"])
+
+# One entity-tag of an If-None-Match list (quoted, so it may contain commas), or "*"
+_ENTITY_TAG = re.compile(r'\*|(?:W/)?"[^"]*"')
+
+def paginate(items: List[Any], offset: int, limit: int) -> Dict[str, Any]:
+    return {"items": items[offset:offset + limit], "total": len(items), "offset": offset, "limit": limit}
+
+async def get_graph_lookup(rag_service: RAGService = Depends(get_rag_service)) -> "GraphLookup":
+    """Lookup indexes over the loaded GraphRAG output (built on first use, off the event loop)"""
+    lookup = await asyncio.to_thread(rag_service.get_graph_lookup)
+    if lookup is None:
+        raise HTTPException(status_code=503, detail="GraphRAG data is not loaded")
+    return lookup
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match holds "*" or the tag itself, compared weakly (a W/ prefix is ignored)"""
+    tags = _ENTITY_TAG.findall(if_none_match)
+    return "*" in tags or any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in tags)
+
+def _cached(request: Request, lookup: "GraphLookup", payload: Any) -> Response:
+    """Respond with the output version as ETag, or 304 if the client already has it"""
+    etag = f'W/"{lookup.version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    return ORJSONResponse(payload, headers=headers)
+
+# Handlers that scan or traverse are plain functions, run in the threadpool; the rest slice precomputed lists
+@router.get("/entities")
+def search_entities(
+    request: Request,
+    q: Optional[str] = Query(None, description="Title prefix or substring (case-insensitive)"),
+    type: Optional[str] = Query(None, description="Entity type, e.g. PERSON"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    lookup: "GraphLookup" = Depends(get_graph_lookup)
+):
+    """Search entities by title; prefix matches come first"""
+    return _cached(request, lookup, paginate(lookup.search_entities(q, type), offset, limit))
+
+@router.get("/entities/{key}")
+async def get_entity(request: Request, key: str, lookup: "GraphLookup" = Depends(get_graph_lookup)):
+    """Entity by title or id"""
+    entity = lookup.get_entity(key)
+    if entity is None:
+        raise HTTPException(status_code=404, detail=f"Entity {key} not found")
+    return _cached(request, lookup, entity)
+
+@router.get("/entities/{key}/neighbors")
+def get_neighbors(
+    request: Request,
+    key: str,
+    hops: int = Query(1, ge=1, le=3),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    lookup: "GraphLookup" = Depends(get_graph_lookup)
+):
+    """Entities within `hops` relationships, nearest and strongest first"""
+    if lookup.graph is None:
+        raise HTTPException(status_code=503, detail="Relationships are not loaded; enable a method that uses them")
+    entity = lookup.get_entity(key)
+    if entity is None:
+        raise HTTPException(status_code=404, detail=f"Entity {key} not found")
+    return _cached(request, lookup, paginate(lookup.neighbors(entity["title"], hops), offset, limit))
+
+@router.get("/communities")
+async def list_communities(
+    request: Request,
+    level: Optional[int] = Query(None, ge=0),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    lookup: "GraphLookup" = Depends(get_graph_lookup)
+):
+    """Communities (optionally of one level) with their report titles"""
+    return _cached(request, lookup, paginate(lookup.list_communities(level), offset, limit))
+
+@router.get("/communities/{community}")
+async def get_community(request: Request, community: int, lookup: "GraphLookup" = Depends(get_graph_lookup)):
+    """Community with its member entities and report"""
+    record = lookup.get_community(community)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Community {community} not found")
+    return _cached(request, lookup, record)
+
+@router.get("/community-reports")
+async def list_community_reports(
+    request: Request,
+    level: Optional[int] = Query(None, ge=0),
+    full: bool = Query(False, description="Include findings and full report text"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    lookup: "GraphLookup" = Depends(get_graph_lookup)
+):
+    """Community reports by level, highest rank first"""
+    return _cached(request, lookup, paginate(lookup.community_reports(level, full), offset, limit))
+
+@router.get("/text-units/{text_unit_id}")
+async def get_text_unit(request: Request, text_unit_id: str, lookup: "GraphLookup" = Depends(get_graph_lookup)):
+    """Source text chunk by id"""
+    if not lookup.text_units_loaded:
+        raise HTTPException(status_code=503, detail="Text units are not loaded; enable local or drift search")
+    text_unit = lookup.text_unit_by_id.get(text_unit_id)
+    if text_unit is None:
+        raise HTTPException(status_code=404, detail=f"Text unit {text_unit_id} not found")
+    return _cached(request, lookup, text_unit)
@@ -1,15 +1,52 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
-from api.models.schemas import RAGRequest, RAGResponse, SystemStatus, AsyncRAGRequest, TaskResult, TaskStatus
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Request, Query
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from typing import List, Optional
+from api.models.schemas import RAGRequest, RAGResponse, SystemStatus, AsyncRAGRequest, TaskResult, TaskStatus, BatchRAGRequest, IndexJob
 from api.services.rag_service import RAGService
 from api.services.task_manager import task_manager
+from api.services.index_jobs import index_job_manager
+from api.config import settings
+import asyncio
+import importlib.util
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+MSGPACK_AVAILABLE = importlib.util.find_spec("msgpack") is not None
+
+_rag_service: Optional[RAGService] = None
+_rag_service_lock = threading.Lock()
+
 # Dependency to get RAG service
 def get_rag_service() -> RAGService:
-    return RAGService()
+    # Built once and shared: clients, loaded tables and caches are reused across requests
+    global _rag_service
+    if _rag_service is None:
+        with _rag_service_lock:
+            if _rag_service is None:
+                _rag_service = RAGService()
+    return _rag_service
+
+def _parse_batch_body(body: bytes, content_type: str) -> List[RAGRequest]:
+    """Parse a batch body: NDJSON lines of RAGRequest, a BatchRAGRequest JSON object,
+    or msgpack of either a BatchRAGRequest map or an array of RAGRequest maps"""
+    if "msgpack" in content_type:
+        import msgpack
+        data = msgpack.unpackb(body)
+        if isinstance(data, list):
+            return [RAGRequest.model_validate(item) for item in data]
+        return BatchRAGRequest.model_validate(data).to_requests()
+    if "ndjson" in content_type or "jsonl" in content_type:
+        return [
+            RAGRequest.model_validate_json(line)
+            for line in body.decode("utf-8").splitlines()
+            if line.strip()
+        ]
+    return BatchRAGRequest.model_validate_json(body).to_requests()
 
 async def process_rag_task(task_id: str, request: RAGRequest, rag_service: RAGService):
     """Background task to process RAG request"""
@@ -58,6 +95,50 @@ async def query_rag_async(
         logger.error(f"Error starting async query: {e}")
         raise HTTPException(status_code=500, detail="Error starting async query")
 
+@router.post("/query/batch")
+async def query_rag_batch(
+    http_request: Request,
+    max_concurrency: Optional[int] = Query(None, ge=1, le=64, description="Maximum queries in flight"),
+    rag_service: RAGService = Depends(get_rag_service)
+):
+    """Run many queries x methods, streaming results back as they complete
+
+    Results are NDJSON, or a stream of msgpack maps with Accept: application/x-msgpack.
+    """
+    use_msgpack = MSGPACK_MEDIA_TYPE in http_request.headers.get("accept", "")
+    content_type = http_request.headers.get("content-type", "")
+    if (use_msgpack or "msgpack" in content_type) and not MSGPACK_AVAILABLE:
+        raise HTTPException(status_code=415 if "msgpack" in content_type else 406,
+                            detail="msgpack is not installed on the server")
+    try:
+        requests = _parse_batch_body(await http_request.body(), content_type)
+    except (ValidationError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    if not requests:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if len(requests) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch too large: {len(requests)} items (max {settings.BATCH_MAX_ITEMS})"
+        )
+    
+    if use_msgpack:
+        import msgpack
+        
+        async def stream_msgpack():
+            # Concatenated maps; read them with msgpack.Unpacker
+            async for item in rag_service.process_batch(requests, max_concurrency):
+                yield msgpack.packb(item.model_dump(mode="json"))
+        
+        return StreamingResponse(stream_msgpack(), media_type=MSGPACK_MEDIA_TYPE)
+    
+    async def stream_results():
+        async for item in rag_service.process_batch(requests, max_concurrency):
+            yield item.model_dump_json() + "\n"
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
 @router.get("/task/{task_id}", response_model=TaskResult)
 async def get_task_status(task_id: str):
     """Get the status of an async task"""
@@ -70,27 +151,80 @@ async def get_task_status(task_id: str):
 async def get_status(rag_service: RAGService = Depends(get_rag_service)):
     """Get system status and availability"""
     try:
-        status_data = rag_service.get_system_status()
+        # Creates the clients on first use (parquet loads, vector store open): keep it off the event loop
+        status_data = await asyncio.to_thread(rag_service.get_system_status)
         return SystemStatus(**status_data)
     except Exception as e:
         logger.error(f"Error getting system status: {e}")
         raise HTTPException(status_code=500, detail="Error retrieving system status")
 
 @router.post("/build-index")
-async def build_index(rag_service: RAGService = Depends(get_rag_service)):
-    """Build GraphRAG index"""
+async def build_index(
+    incremental: bool = Query(False, description="Only index new input documents (changed or removed ones force a full build)"),
+    rag_service: RAGService = Depends(get_rag_service)
+):
+    """Start a background GraphRAG index build; poll /build-index/jobs/{job_id} for progress"""
     try:
-        result = await rag_service.build_graphrag_index()
-        
-        if "error" in result:
-            raise HTTPException(status_code=400, detail=result["error"])
-        
-        return result
-    except HTTPException:
-        raise
+        job = rag_service.start_index_build(incremental=incremental)
+        return {"job_id": job.job_id, "status": job.status}
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
-        logger.error(f"Error building index: {e}")
-        raise HTTPException(status_code=500, detail="Error building index")
+        logger.error(f"Error starting index build: {e}")
+        raise HTTPException(status_code=500, detail="Error starting index build")
+
+@router.get("/build-index/jobs", response_model=List[IndexJob])
+async def list_index_jobs():
+    """List index build jobs"""
+    return index_job_manager.list_jobs()
+
+@router.get("/build-index/jobs/{job_id}", response_model=IndexJob)
+async def get_index_job(job_id: str):
+    """Get status, per-workflow progress and token usage of an index build job"""
+    job = index_job_manager.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Index job not found")
+    return job
+
+@router.post("/build-index/jobs/{job_id}/cancel", response_model=IndexJob)
+async def cancel_index_job(job_id: str):
+    """Cancel a pending or running index build job (status is "cancelling" until the build has stopped)"""
+    try:
+        return index_job_manager.cancel_job(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Index job not found")
+
+@router.post("/build-index/jobs/{job_id}/resume")
+async def resume_index_job(job_id: str, rag_service: RAGService = Depends(get_rag_service)):
+    """Re-run a failed or cancelled build; work already done is served from the indexing LLM cache"""
+    try:
+        job = rag_service.resume_index_build(job_id)
+        return {"job_id": job.job_id, "status": job.status, "resumed_from": job_id}
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Index job not found")
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.get("/index-cache")
+async def get_index_cache(rag_service: RAGService = Depends(get_rag_service)):
+    """Report size, hit rate and stale-prompt stages of the indexing LLM cache"""
+    result = rag_service.get_index_cache_report()
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
+@router.post("/index-cache/prune")
+async def prune_index_cache(
+    stage: Optional[List[str]] = Query(None, description="Cache stages to clear, e.g. summarize_descriptions"),
+    older_than_days: Optional[float] = Query(None, ge=0, description="Only remove entries older than this"),
+    stale_prompts: bool = Query(False, description="Remove entries produced with an outdated prompt file"),
+    rag_service: RAGService = Depends(get_rag_service)
+):
+    """Delete indexing LLM cache entries"""
+    result = rag_service.prune_index_cache(stage, older_than_days, stale_prompts)
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
 
 @router.get("/document-count")
 async def get_document_count(rag_service: RAGService = Depends(get_rag_service)):
@@ -103,29 +237,7 @@ async def get_document_count(rag_service: RAGService = Depends(get_rag_service))
         raise HTTPException(status_code=500, detail="Error retrieving document count")
 
 @router.get("/methods")
-async def get_available_methods():
-    """Get available RAG methods"""
-    return {
-        "methods": [
-            {
-                "name": "naiverag",
-                "description": "Traditional RAG using ChromaDB and embeddings",
-                "display_name": "Traditional RAG"
-            },	
-            {
-                "name": "graphrag-localsearch",
-                "description": "GraphRAG local search using entities and relationships",
-                "display_name": "GraphRAG Local Search"
-            },
-            {
-                "name": "graphrag-globalsearch", 
-                "description": "GraphRAG global search using community reports",
-                "display_name": "GraphRAG Global Search"
-            },
-            # {
-            #     "name": "graphrag-drift",
-            #     "description": "GraphRAG drift search for temporal and contextual analysis",
-            #     "display_name": "GraphRAG Drift Search",
-            # },
-        ]
-    }
\ No newline at end of file
+async def get_available_methods(rag_service: RAGService = Depends(get_rag_service)):
+    """Get available RAG methods (enabled in ENABLED_METHODS and backed by loaded data)"""
+    methods = await asyncio.to_thread(rag_service.available_methods)
+    return {"methods": methods}
@@ -1,7 +1,8 @@
 import os
 from pathlib import Path
-from typing import List
-from pydantic_settings import BaseSettings
+from typing import Annotated, List, Optional
+from pydantic import field_validator
+from pydantic_settings import BaseSettings, NoDecode
 
 class Settings(BaseSettings):
     # Server settings
@@ -9,6 +10,14 @@ class Settings(BaseSettings):
     PORT: int = 8000
     DEBUG: bool = False
     
+    # Worker processes (gunicorn -c api/gunicorn.conf.py). With more than one, GraphRAG
+    # tables are loaded before forking and async tasks / index jobs / retrieval cache move
+    # to SQLite files in SHARED_STATE_DIR; TASK_STORE ("memory"/"sqlite") and SHARED_CACHE override that
+    WORKERS: int = 1
+    SHARED_STATE_DIR: str = "./rag/shared"
+    TASK_STORE: Optional[str] = None
+    SHARED_CACHE: Optional[bool] = None
+    
         
     # RAG settings
     GRAPHRAG_API_KEY: str = ""
@@ -17,10 +26,137 @@ class Settings(BaseSettings):
     CHROMA_DB_PATH: str = "./rag/chromadb"
     INPUT_DIRECTORY: str = "./graphragtest/input/"
     
+    # Query methods served by this deployment (comma-separated in the environment);
+    # clients and GraphRAG tables needed only by other methods are never loaded.
+    # "auto" routes each query to one of the other enabled methods
+    ENABLED_METHODS: Annotated[List[str], NoDecode] = [
+        "naiverag", "graphrag-localsearch", "graphrag-globalsearch", "graphrag-path", "auto"
+    ]
+    
+    # Model provider: "mistral" (Mistral API) or "fake" (deterministic, offline)
+    MODEL_PROVIDER: str = "mistral"
+    CHAT_MODEL: str = "mistral-medium-latest"
+    EMBEDDING_MODEL: str = "mistral-embed"
+    
+    # Fake provider settings (latency distribution: fixed, uniform, normal or lognormal)
+    FAKE_EMBEDDING_DIM: int = 1024
+    FAKE_LATENCY_DISTRIBUTION: str = "fixed"
+    FAKE_LATENCY_MS: float = 0.0
+    FAKE_LATENCY_JITTER_MS: float = 0.0
+    FAKE_SEED: int = 0
+    
     # Default search parameters
     DEFAULT_COMMUNITY_LEVEL: int = 2
     DEFAULT_RESPONSE_TYPE: str = "Multiple Paragraphs"
     DEFAULT_NUM_RESULTS: int = 5
+    CONTEXT_SUMMARY_MAX_ITEMS: int = 50
+    
+    # Indexing LLM cache (GRAPHRAG_CACHE_DIR defaults to the cache base_dir in settings.yaml)
+    INDEX_CACHE_ENABLED: bool = True
+    GRAPHRAG_CACHE_DIR: Optional[str] = None
+    
+    # Few-shot examples sent with each graph extraction call: "full", "static"
+    # (first N examples, cache-friendly fixed prefix) or "select" (N most similar to the chunk)
+    EXTRACT_PROMPT_STRATEGY: str = "full"
+    EXTRACT_PROMPT_MAX_EXAMPLES: int = 1
+    
+    # Index build jobs: "thread" (build event loop inside the API process) or
+    # "process" (separate worker process, observed through a status file)
+    INDEX_BUILD_EXECUTOR: str = "thread"
+    INDEX_WORKER_POLL_SECONDS: float = 1.0
+    # With WORKERS > 1 jobs and the build lock live in SQLite: the worker running a build saves
+    # its progress every HEARTBEAT seconds, and a job silent for STALE seconds is marked failed
+    INDEX_JOB_HEARTBEAT_SECONDS: float = 5.0
+    INDEX_JOB_STALE_SECONDS: float = 120.0
+    # How often a worker checks whether the GraphRAG output was rebuilt (e.g. by another worker)
+    GRAPHRAG_OUTPUT_CHECK_SECONDS: float = 10.0
+    
+    # Entity-description embeddings for local/drift search: "numpy" (memory-mapped
+    # matrix exported from the GraphRAG store at startup) or "graphrag" (configured store)
+    ENTITY_INDEX_BACKEND: str = "numpy"
+    ENTITY_INDEX_HNSW_THRESHOLD: int = 100000
+    
+    # Local search context budget (None keeps the GraphRAG settings.yaml value)
+    LOCAL_SEARCH_MAX_CONTEXT_TOKENS: Optional[int] = None
+    LOCAL_SEARCH_TOP_K_ENTITIES: Optional[int] = None
+    LOCAL_SEARCH_TOP_K_RELATIONSHIPS: Optional[int] = None
+    LOCAL_SEARCH_TEXT_UNIT_PROP: Optional[float] = None
+    LOCAL_SEARCH_COMMUNITY_PROP: Optional[float] = None
+    
+    # Entity mentions in local search queries (titles, aliases, one-edit typos). With
+    # GAZETTEER_SKIP_EMBEDDING, queries whose mentions all score >= GAZETTEER_MIN_CONFIDENCE
+    # seed local search without embedding the query (numpy entity index only)
+    GAZETTEER_ENABLED: bool = True
+    GAZETTEER_FUZZY: bool = True
+    GAZETTEER_SKIP_EMBEDDING: bool = True
+    GAZETTEER_MIN_CONFIDENCE: float = 0.9
+    
+    # Tiered global search: report digests per top-level community and per book (built
+    # with the index) are scored first, in batches of GLOBAL_TIER_MAP_TOKENS; only the
+    # reports of the GLOBAL_TIER_TOP_GROUPS best groups (score >= GLOBAL_TIER_MIN_SCORE) are mapped
+    GLOBAL_SEARCH_TIERED: bool = False
+    GLOBAL_TIER_DIGEST_TOKENS: int = 1500
+    GLOBAL_TIER_MAP_TOKENS: int = 12000
+    GLOBAL_TIER_TOP_GROUPS: int = 3
+    GLOBAL_TIER_MIN_SCORE: float = 20.0
+    
+    # Path search (graphrag-path): shortest relationship paths between the entities named
+    # in a question, or one entity's strongest relationships, sent to the chat model
+    GRAPH_PATH_MAX_HOPS: int = 4
+    GRAPH_PATH_MAX_ENTITIES: int = 4
+    GRAPH_NEIGHBORHOOD_LIMIT: int = 20
+    GRAPH_DESCRIPTION_MAX_CHARS: int = 300
+    
+    # Observability settings
+    METRICS_ENABLED: bool = True
+    METRICS_IN_METADATA: bool = True
+    # With WORKERS > 1: how often each worker saves its counters for scrapes served by the others
+    METRICS_SNAPSHOT_SECONDS: float = 5.0
+    OTEL_INSTRUMENT_FASTAPI: bool = False
+    
+    # Naive RAG vector store: "chroma" (Chroma collection) or "numpy" (memory-mapped
+    # matrix with exact top-k, exported from the Chroma collection on first start)
+    NAIVE_RAG_VECTOR_BACKEND: str = "chroma"
+    NAIVE_RAG_INDEX_DIR: str = "./rag/numpy_index"
+    # First-pass scan over "int8" or "binary" codes, rescoring multiplier * k candidates at full precision
+    NAIVE_RAG_QUANTIZATION: Optional[str] = None
+    NAIVE_RAG_RESCORE_MULTIPLIER: int = 4
+    
+    # Naive RAG Chroma HNSW parameters. Space, construction ef and M apply when the
+    # collection is (re)built; ef_search is set at startup (None keeps the collection's)
+    CHROMA_HNSW_SPACE: str = "cosine"
+    CHROMA_HNSW_CONSTRUCTION_EF: int = 200
+    CHROMA_HNSW_M: int = 16
+    CHROMA_HNSW_SEARCH_EF: Optional[int] = None
+    WARM_UP_ON_STARTUP: bool = True
+    
+    # Precomputed FAQ answers (python -m api.services.answer_store build), served for exact
+    # and near (word Jaccard >= ANSWER_STORE_MIN_SIMILARITY) matches while the indexes are unchanged
+    ANSWER_STORE_ENABLED: bool = True
+    ANSWER_STORE_PATH: str = "./rag/answer_store.json"
+    ANSWER_STORE_MIN_SIMILARITY: float = 0.85
+    ANSWER_STORE_CHECK_SECONDS: float = 30.0
+    
+    # Response compression (zstd preferred when accepted and installed, else gzip)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_ZSTD_LEVEL: int = 3
+    
+    # Batch query settings
+    BATCH_MAX_CONCURRENCY: int = 4
+    BATCH_MAX_ITEMS: int = 1000
+    RETRIEVAL_CACHE_SIZE: int = 256
+    # How often cached retrievals are checked against the Chroma store (re-ingests); the NumPy
+    # backend's version is fixed when its export is loaded
+    RETRIEVAL_CACHE_CHECK_SECONDS: float = 10.0
+    
+    @field_validator("ENABLED_METHODS", mode="before")
+    @classmethod
+    def split_methods(cls, value):
+        if isinstance(value, str):
+            return [method.strip() for method in value.split(",") if method.strip()]
+        return value
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,37 @@
+"""Production launch: gunicorn -c api/gunicorn.conf.py api.main:app
+
+Runs settings.WORKERS uvicorn workers. The GraphRAG tables and entity indexes
+are loaded once in the master process and inherited by every worker. Metrics
+are shared through snapshot files, see api.services.metrics.MultiprocessMetrics.
+"""
+import gc
+
+from api.config import settings
+
+bind = f"{settings.HOST}:{settings.PORT}"
+workers = settings.WORKERS
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = 300
+graceful_timeout = 300
+keepalive = 300
+
+def on_starting(server):
+    from api.services.metrics import create_multiprocess_metrics
+    from api.services.rag_service import preload_shared_state
+
+    shared_metrics = create_multiprocess_metrics()
+    if shared_metrics:
+        shared_metrics.clear()
+
+    preload_shared_state()
+    # Keep the preloaded objects out of the workers' garbage collection so
+    # collections don't write to (and un-share) their pages
+    gc.freeze()
+
+def child_exit(server, worker):
+    from api.services.metrics import create_multiprocess_metrics
+
+    shared_metrics = create_multiprocess_metrics()
+    if shared_metrics:
+        shared_metrics.archive(worker.pid)
@@ -1,11 +1,16 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 
-from api.api.routes import router
+from api.api.routes import router, get_rag_service
+from api.api.graph_routes import router as graph_router
 from api.config import settings
+from api.middleware import CompressionMiddleware
 from api.services.task_manager import task_manager
+from api.services.metrics import create_multiprocess_metrics, metrics
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -17,14 +22,37 @@ async def lifespan(app: FastAPI):
     logger.info("Starting up RAG API...")
     # Initialize task manager
     app.state.task_manager = task_manager
+    metrics.register_gauge("rag_tasks", task_manager.count_by_status, label="status",
+                           help="Async query tasks by status")
+    # With several workers a scrape reaches one of them: share counters through snapshot files
+    app.state.shared_metrics = create_multiprocess_metrics()
+    if app.state.shared_metrics:
+        app.state.shared_metrics.start(settings.METRICS_SNAPSHOT_SECONDS)
+    app.state.ready = not settings.WARM_UP_ON_STARTUP
+    # Warm up in the background: /health answers immediately, /ready once clients are loaded
+    warm_up_task = asyncio.create_task(warm_up(app)) if settings.WARM_UP_ON_STARTUP else None
     yield
+    if warm_up_task and not warm_up_task.done():
+        warm_up_task.cancel()
+    if app.state.shared_metrics:
+        app.state.shared_metrics.write()
     logger.info("Shutting down RAG API...")
 
+async def warm_up(app: FastAPI):
+    """Open clients and touch vector indexes so the first queries don't pay for it"""
+    try:
+        result = await asyncio.to_thread(lambda: get_rag_service().warm_up())
+        logger.info(f"Warm-up complete: {result}")
+    except Exception as e:
+        logger.error(f"Warm-up failed: {e}")
+    app.state.ready = True
+
 app = FastAPI(
     title="RAG API",
     description="A FastAPI application for RAG-based question answering",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -35,8 +63,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        zstd_level=settings.COMPRESSION_ZSTD_LEVEL,
+    )
+
+if settings.OTEL_INSTRUMENT_FASTAPI:
+    try:
+        from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+        FastAPIInstrumentor.instrument_app(app)
+    except ImportError as e:
+        logger.warning(f"OpenTelemetry FastAPI instrumentation not available: {e}")
+
 # Include routes
 app.include_router(router, prefix="/api/v1")
+app.include_router(graph_router, prefix="/api/v1")
 
 @app.get("/")
 async def root():
@@ -46,6 +90,22 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until startup warm-up has finished"""
+    if not getattr(app.state, "ready", False):
+        raise HTTPException(status_code=503, detail="Warming up")
+    return {"status": "ready"}
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    """Prometheus scrape endpoint"""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics disabled")
+    shared = getattr(app.state, "shared_metrics", None)
+    snapshots = await asyncio.to_thread(shared.others) if shared else []
+    return PlainTextResponse(metrics.render(snapshots), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -0,0 +1,157 @@
+"""
+Response compression negotiated from Accept-Encoding.
+
+zstd (when the zstandard package is installed) is preferred over gzip. Bodies
+sent in one piece are compressed whole once they exceed `minimum_size`.
+Streamed bodies such as NDJSON batch results are compressed chunk by chunk
+with a flush after each one, so results still arrive as they complete.
+
+Every response that could be compressed carries `Vary: Accept-Encoding`,
+whether or not it was, and a compressed response's strong ETag is weakened:
+the compressed bytes are a different representation.
+"""
+import importlib.util
+import zlib
+from typing import List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+ZSTD_AVAILABLE = importlib.util.find_spec("zstandard") is not None
+
+# Already compressed, or must not be delayed by a compressor
+_SKIP_CONTENT_TYPES = ("text/event-stream", "image/", "video/", "audio/", "application/zip", "application/gzip")
+
+def accepted_encodings(accept_encoding: str) -> List[str]:
+    """Codings the client accepts (q > 0), lower-cased"""
+    accepted = []
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            accepted.append(name.strip().lower())
+    return accepted
+
+def choose_encoding(accept_encoding: str, zstd: bool = ZSTD_AVAILABLE) -> Optional[str]:
+    accepted = accepted_encodings(accept_encoding)
+    if zstd and "zstd" in accepted:
+        return "zstd"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+class _Compressor:
+    """Incremental gzip / zstd compressor"""
+
+    def __init__(self, encoding: str, gzip_level: int, zstd_level: int):
+        if encoding == "zstd":
+            import zstandard
+            self._flush_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+            self._obj = zstandard.ZstdCompressor(level=zstd_level).compressobj()
+        else:
+            self._flush_mode = zlib.Z_SYNC_FLUSH
+            self._obj = zlib.compressobj(gzip_level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(self._flush_mode)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._obj.compress(data) + self._obj.flush()
+
+class CompressionMiddleware:
+    """Compress responses with zstd or gzip, whichever the client accepts (zstd first)"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, zstd_level: int = 3):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        # Wrapped even without an encoding: the response still varies with Accept-Encoding
+        await self.app(scope, receive, _CompressingSend(send, encoding, self))
+
+class _CompressingSend:
+    """ASGI send wrapper deciding per response whether and how to compress"""
+
+    def __init__(self, send: Send, encoding: Optional[str], middleware: CompressionMiddleware):
+        self.send = send
+        self.encoding = encoding
+        self.middleware = middleware
+        self.start_message: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    def _skip(self, headers: MutableHeaders) -> bool:
+        content_type = headers.get("content-type", "")
+        return (
+            "content-encoding" in headers
+            or self.start_message["status"] == 204
+            or any(content_type.startswith(skip) for skip in _SKIP_CONTENT_TYPES)
+        )
+
+    def _set_encoding(self, headers: MutableHeaders) -> None:
+        headers["Content-Encoding"] = self.encoding
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.passthrough:
+            await self.send(message)
+            return
+
+        if self.compressor is None:
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            skip = self._skip(headers)
+            if not skip:
+                headers.add_vary_header("Accept-Encoding")
+            if (
+                self.encoding is None
+                or skip
+                or self.start_message["status"] == 304
+                or (not more_body and len(body) < self.middleware.minimum_size)
+            ):
+                self.passthrough = True
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+            self.compressor = _Compressor(self.encoding, self.middleware.gzip_level, self.middleware.zstd_level)
+            self._set_encoding(headers)
+            if more_body:
+                # Length unknown until the stream ends
+                del headers["content-length"]
+                await self.send(self.start_message)
+                await self.send({"type": "http.response.body", "body": self.compressor.chunk(body), "more_body": True})
+            else:
+                compressed = self.compressor.finish(body)
+                headers["Content-Length"] = str(len(compressed))
+                await self.send(self.start_message)
+                await self.send({"type": "http.response.body", "body": compressed})
+            return
+
+        if more_body:
+            await self.send({"type": "http.response.body", "body": self.compressor.chunk(body), "more_body": True})
+        else:
+            await self.send({"type": "http.response.body", "body": self.compressor.finish(body)})
@@ -1,3 +1,3 @@
-from .schemas import RAGRequest, RAGResponse, RAGMethod, ResponseType, SystemStatus
+from .schemas import RAGRequest, RAGResponse, RAGMethod, ResponseType, SystemStatus, BatchRAGRequest, BatchResultItem, IndexJob, IndexJobStatus
 
-__all__ = ["RAGRequest", "RAGResponse", "RAGMethod", "ResponseType", "SystemStatus"]
\ No newline at end of file
+__all__ = ["RAGRequest", "RAGResponse", "RAGMethod", "ResponseType", "SystemStatus", "BatchRAGRequest", "BatchResultItem", "IndexJob", "IndexJobStatus"]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional, Dict, Any, List
 from enum import Enum
 
@@ -7,6 +7,9 @@ class RAGMethod(str, Enum):
     GRAPHRAG_GLOBAL = "graphrag-globalsearch" 
     GRAPHRAG_DRIFT = "graphrag-drift"
     NAIVE_RAG = "naiverag"
+    GRAPHRAG_PATH = "graphrag-path"
+    # Routed per query to the cheapest enabled method (see services/query_router.py)
+    AUTO = "auto"
 
 class ResponseType(str, Enum):
     SINGLE_PARAGRAPH = "Single Paragraph"
@@ -21,15 +24,62 @@ class TaskStatus(str, Enum):
     COMPLETED = "completed"
     FAILED = "failed"
 
-class RAGRequest(BaseModel):
-    query: str = Field(..., description="The question to ask", min_length=1)
-    method: RAGMethod = Field(..., description="RAG method to use")
-    
-    # Optional parameters
+class IndexJobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    CANCELLING = "cancelling"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+class QueryOptions(BaseModel):
+    """Optional query parameters, shared by single and batch requests"""
     community_level: Optional[int] = Field(None, description="Community level for GraphRAG", ge=0, le=3)
     response_type: Optional[ResponseType] = Field(None, description="Type of response format")
     num_results: Optional[int] = Field(None, description="Number of results for naive RAG", ge=1, le=20)
     dynamic_community_selection: Optional[bool] = Field(False, description="Use dynamic community selection")
+    tiered: Optional[bool] = Field(None, description="Global search: score report digests first, then map over the best groups' reports")
+    include_context: Optional[bool] = Field(False, description="Return a summary of the GraphRAG context used, with token counts")
+    
+    # Local search context budget (defaults come from Settings, then the GraphRAG config)
+    max_context_tokens: Optional[int] = Field(None, description="Token budget for the local search context", ge=500, le=128000)
+    top_k_entities: Optional[int] = Field(None, description="Seed entities mapped from the query in local search", ge=1, le=100)
+    top_k_relationships: Optional[int] = Field(None, description="Relationships per seed entity in local search", ge=1, le=100)
+    text_unit_prop: Optional[float] = Field(None, description="Share of the local context budget for text units", ge=0, le=1)
+    community_prop: Optional[float] = Field(None, description="Share of the local context budget for community reports", ge=0, le=1)
+    
+    @model_validator(mode="after")
+    def check_context_proportions(self):
+        # Whatever text units and reports don't use goes to entities and relationships
+        if self.text_unit_prop is not None and self.community_prop is not None:
+            if self.text_unit_prop + self.community_prop > 1:
+                raise ValueError("text_unit_prop + community_prop must not exceed 1")
+        return self
+    
+    def local_search_overrides(self) -> Dict[str, Any]:
+        """Local search parameters explicitly set on this request"""
+        return self.model_dump(
+            include={"max_context_tokens", "top_k_entities", "top_k_relationships", "text_unit_prop", "community_prop"},
+            exclude_none=True
+        )
+
+class RAGRequest(QueryOptions):
+    query: str = Field(..., description="The question to ask", min_length=1)
+    method: RAGMethod = Field(..., description="RAG method to use")
+
+class BatchRAGRequest(QueryOptions):
+    """Every query x method combination, sharing the optional parameters"""
+    queries: List[str] = Field(..., description="Questions to ask", min_length=1)
+    methods: List[RAGMethod] = Field(..., description="RAG methods to run for every question", min_length=1)
+    
+    def to_requests(self) -> List[RAGRequest]:
+        """Expand the batch into one RAGRequest per query x method"""
+        shared = self.model_dump(exclude={"queries", "methods"})
+        return [
+            RAGRequest(query=query, method=method, **shared)
+            for query in self.queries
+            for method in self.methods
+        ]
 
 class AsyncRAGRequest(BaseModel):
     task_id: str = Field(..., description="Unique task identifier")
@@ -41,6 +91,13 @@ class RAGResponse(BaseModel):
     error: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
 
+class BatchResultItem(BaseModel):
+    index: int
+    query: str
+    method: str
+    elapsed_ms: float
+    result: RAGResponse
+
 class TaskResult(BaseModel):
     task_id: str
     status: TaskStatus
@@ -48,8 +105,35 @@ class TaskResult(BaseModel):
     created_at: str
     completed_at: Optional[str] = None
 
+class WorkflowProgress(BaseModel):
+    name: str
+    status: str = "pending"
+    started_at: Optional[str] = None
+    completed_at: Optional[str] = None
+    elapsed_seconds: Optional[float] = None
+    completed_items: Optional[int] = None
+    total_items: Optional[int] = None
+    description: Optional[str] = None
+
+class IndexJob(BaseModel):
+    job_id: str
+    status: IndexJobStatus
+    incremental: bool = False
+    resumed_from: Optional[str] = None
+    created_at: str
+    started_at: Optional[str] = None
+    completed_at: Optional[str] = None
+    elapsed_seconds: Optional[float] = None
+    current_workflow: Optional[str] = None
+    workflows: List[WorkflowProgress] = Field(default_factory=list)
+    token_usage: Optional[Dict[str, Any]] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    output_version: Optional[str] = None
+
 class SystemStatus(BaseModel):
     graphrag_available: bool
     traditional_rag_available: bool
     project_directory: str
-    data_summary: Optional[Dict[str, Any]] = None
\ No newline at end of file
+    data_summary: Optional[Dict[str, Any]] = None
+    enabled_methods: List[str] = Field(default_factory=list)
\ No newline at end of file
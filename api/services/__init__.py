@@ -1,5 +1,15 @@
-from .rag_service import RAGService
-from .graphrag_client import GraphRAGClient
-from .traditional_rag_client import TraditionalRAGClient
+# Clients are exported lazily: importing api.services (e.g. for the task manager)
+# must not pull in graphrag, pandas, chromadb or langchain
+_EXPORTS = {
+    "RAGService": ".rag_service",
+    "GraphRAGClient": ".graphrag_client",
+    "TraditionalRAGClient": ".traditional_rag_client",
+}
 
-__all__ = ["RAGService", "GraphRAGClient", "TraditionalRAGClient"]
\ No newline at end of file
+def __getattr__(name):
+    if name in _EXPORTS:
+        from importlib import import_module
+        return getattr(import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+__all__ = ["RAGService", "GraphRAGClient", "TraditionalRAGClient"]
@@ -0,0 +1,307 @@
+"""
+Precomputed answers for a curated FAQ question list.
+
+An offline build runs every question through every enabled RAGMethod and writes
+the answers to a JSON store, stamped with a fingerprint of the indexes they were
+produced from (GraphRAG output directory, naive RAG Chroma store) and the
+settings that shape answers. Caches derived from those indexes at load time
+(entity index and report digest exports, the NumPy naive RAG store) are left out,
+so loading the service doesn't itself invalidate the store. The API loads the store into memory and answers
+exact (normalized) and near (token Jaccard) matches without touching an index or
+an LLM. When the fingerprint no longer matches the indexes on disk, the store is
+dropped until it is rebuilt.
+
+Usage:
+    python -m api.services.answer_store build --questions faq.txt
+    python -m api.services.answer_store build --questions faq.jsonl --methods naiverag graphrag-localsearch
+    python -m api.services.answer_store status
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from api.config import settings
+from api.models.schemas import RAGMethod, RAGRequest, RAGResponse
+
+logger = logging.getLogger(__name__)
+
+STORE_FORMAT = 1
+
+# Per-run details that don't describe the stored answer
+_VOLATILE_METADATA = {"timings", "tokens", "context"}
+
+_STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "to", "and", "or", "is", "are", "was", "were",
+    "be", "do", "does", "did", "what", "who", "whom", "which", "how", "why", "when",
+    "where", "s", "about", "tell", "me", "with", "for", "by", "as", "at",
+}
+_WORD = re.compile(r"[a-z0-9]+")
+
+def normalize_question(question: str) -> str:
+    """Lower-cased words only, so punctuation / spacing variants share a key"""
+    return " ".join(_WORD.findall(question.lower()))
+
+def question_terms(question: str) -> frozenset:
+    terms = frozenset(w for w in normalize_question(question).split() if w not in _STOPWORDS)
+    return terms or frozenset(normalize_question(question).split())
+
+# Written from the GraphRAG output, not by index builds (entity_index.ENTITY_INDEX_DIRNAME,
+# report_digests.DIGESTS_FILE); not imported so the fingerprint stays numpy/pandas-free
+_DERIVED_OUTPUT = {"entity_index", "report_digests.parquet"}
+
+def _tree_signature(path: Path, exclude: Iterable[str] = ()) -> List[Tuple[str, int, int]]:
+    """(relative path, size, mtime_ns) of every file below path, skipping top-level `exclude` entries and temp files"""
+    exclude = set(exclude)
+    if not path.exists():
+        return []
+    if path.is_file():
+        stat = path.stat()
+        return [(path.name, stat.st_size, stat.st_mtime_ns)]
+    entries = []
+    for root, dirs, files in os.walk(path):
+        if Path(root) == path:
+            dirs[:] = [d for d in dirs if d not in exclude]
+            files = [f for f in files if f not in exclude]
+        for name in files:
+            if name.endswith(".tmp"):
+                continue
+            file_path = Path(root) / name
+            try:
+                stat = file_path.stat()
+            except OSError:
+                continue
+            entries.append((str(file_path.relative_to(path)), stat.st_size, stat.st_mtime_ns))
+    return sorted(entries)
+
+def index_fingerprint() -> str:
+    """Version of the indexes and answer-shaping settings the stored answers depend on"""
+    sources: Dict[str, Any] = {
+        "graphrag_output": _tree_signature(Path(settings.PROJECT_DIRECTORY) / "output", exclude=_DERIVED_OUTPUT),
+        # The NumPy backend serves an export of this store
+        "naive_rag_store": _tree_signature(Path(settings.CHROMA_DB_PATH)),
+        "naive_rag_backend": settings.NAIVE_RAG_VECTOR_BACKEND,
+        "settings": {
+            "chat_model": settings.CHAT_MODEL,
+            "embedding_model": settings.EMBEDDING_MODEL,
+            "community_level": settings.DEFAULT_COMMUNITY_LEVEL,
+            "response_type": settings.DEFAULT_RESPONSE_TYPE,
+            "num_results": settings.DEFAULT_NUM_RESULTS,
+            "global_tiered": settings.GLOBAL_SEARCH_TIERED,
+        },
+    }
+    return hashlib.sha256(json.dumps(sources, sort_keys=True).encode()).hexdigest()[:16]
+
+def uses_default_options(request: RAGRequest) -> bool:
+    """Stored answers were produced with the default query options only"""
+    return (
+        request.community_level in (None, settings.DEFAULT_COMMUNITY_LEVEL)
+        and request.response_type in (None, settings.DEFAULT_RESPONSE_TYPE)
+        and request.num_results in (None, settings.DEFAULT_NUM_RESULTS)
+        and not request.dynamic_community_selection
+        and request.tiered in (None, settings.GLOBAL_SEARCH_TIERED)
+        and not request.include_context
+        and not request.local_search_overrides()
+    )
+
+class AnswerStore:
+    """In-memory FAQ answers, checked against the current index fingerprint"""
+
+    def __init__(self, path: str, min_similarity: float = 0.85, check_seconds: float = 30.0):
+        self.path = Path(path)
+        self.min_similarity = min_similarity
+        self.check_seconds = check_seconds
+        self.version: Optional[str] = None
+        self.created_at: Optional[str] = None
+        self._exact: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._by_method: Dict[str, List[Tuple[frozenset, Dict[str, Any]]]] = {}
+        self._file_mtime: Optional[int] = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    def refresh_due(self) -> bool:
+        return time.monotonic() - self._checked_at >= self.check_seconds
+
+    def refresh(self) -> None:
+        """Reload the store file if it changed and drop its answers if the indexes moved on"""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            try:
+                file_mtime = self.path.stat().st_mtime_ns
+            except FileNotFoundError:
+                file_mtime = None
+            if file_mtime != self._file_mtime:
+                self._file_mtime = file_mtime
+                self._load()
+            if self._exact and self.version != index_fingerprint():
+                logger.warning(f"Answer store {self.path} is stale (built for index version {self.version}); "
+                               f"serving live answers until it is rebuilt")
+                self._index([], None, None)
+
+    def _load(self) -> None:
+        if self._file_mtime is None:
+            self._index([], None, None)
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read answer store {self.path}: {e}")
+            self._index([], None, None)
+            return
+        if data.get("format") != STORE_FORMAT:
+            logger.warning(f"Ignoring answer store {self.path} with unknown format {data.get('format')}")
+            self._index([], None, None)
+            return
+        self._index(data.get("answers", []), data.get("version"), data.get("created_at"))
+        logger.info(f"Loaded {len(self._exact)} stored answers (index version {self.version})")
+
+    def _index(self, answers: Iterable[Dict[str, Any]], version: Optional[str], created_at: Optional[str]) -> None:
+        exact: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        by_method: Dict[str, List[Tuple[frozenset, Dict[str, Any]]]] = {}
+        for answer in answers:
+            exact[(answer["method"], normalize_question(answer["question"]))] = answer
+            by_method.setdefault(answer["method"], []).append((question_terms(answer["question"]), answer))
+        # Swap in whole so concurrent lookups see either the old or the new answers
+        self._exact, self._by_method = exact, by_method
+        self.version, self.created_at = version, created_at
+
+    def lookup(self, request: RAGRequest) -> Optional[RAGResponse]:
+        """Stored answer for the request's question and method, if one matches closely enough"""
+        if not self._exact or not uses_default_options(request):
+            return None
+        method = getattr(request.method, "value", request.method)
+        answer = self._exact.get((method, normalize_question(request.query)))
+        match, similarity = "exact", 1.0
+        if answer is None:
+            answer, similarity = self._nearest(method, question_terms(request.query))
+            match = "near"
+            if answer is None:
+                return None
+        return RAGResponse(
+            success=True,
+            response=answer["response"],
+            method=request.method,
+            metadata={
+                **answer.get("metadata", {}),
+                "answer_store": {
+                    "match": match,
+                    "similarity": round(similarity, 3),
+                    "question": answer["question"],
+                    "version": self.version,
+                    "created_at": self.created_at,
+                },
+            }
+        )
+
+    def _nearest(self, method: str, terms: frozenset) -> Tuple[Optional[Dict[str, Any]], float]:
+        best, best_similarity = None, 0.0
+        if not terms:
+            return None, 0.0
+        for stored_terms, answer in self._by_method.get(method, ()):
+            similarity = len(terms & stored_terms) / len(terms | stored_terms)
+            if similarity > best_similarity:
+                best, best_similarity = answer, similarity
+        if best_similarity < self.min_similarity:
+            return None, best_similarity
+        return best, best_similarity
+
+def load_questions(path: Path) -> List[str]:
+    """One question per line, or JSONL with a "query" (or "question") field"""
+    questions = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("{"):
+            item = json.loads(line)
+            line = item.get("query") or item["question"]
+        questions.append(line)
+    return list(dict.fromkeys(questions))
+
+async def build_store(questions: List[str], methods: Optional[List[RAGMethod]] = None,
+                      max_concurrency: Optional[int] = None) -> Dict[str, Any]:
+    """Answer every question with every method against the current indexes"""
+    from .rag_service import RAGService
+
+    service = RAGService()
+    # "auto" queries are routed first and then looked up under the chosen method
+    methods = [m for m in (methods or service.routable_methods) if m in service.routable_methods]
+    # Load the indexes (and write any derived exports) first, then take the fingerprint
+    # before answering: an index that changes mid-build leaves the store stale
+    await asyncio.to_thread(service.warm_up)
+    version = index_fingerprint()
+    semaphore = asyncio.Semaphore(max_concurrency or settings.BATCH_MAX_CONCURRENCY)
+
+    async def answer(question: str, method: RAGMethod) -> Optional[Dict[str, Any]]:
+        async with semaphore:
+            response = await service._dispatch_query(RAGRequest(query=question, method=method))
+        if not response.success:
+            logger.warning(f"Not storing {method.value} answer for {question!r}: {response.error}")
+            return None
+        return {
+            "question": question,
+            "method": method.value,
+            "response": response.response,
+            "metadata": {k: v for k, v in (response.metadata or {}).items() if k not in _VOLATILE_METADATA},
+        }
+
+    results = await asyncio.gather(*(answer(q, m) for q in questions for m in methods))
+    return {
+        "format": STORE_FORMAT,
+        "version": version,
+        "created_at": datetime.now().isoformat(),
+        "methods": [m.value for m in methods],
+        "answers": [r for r in results if r is not None],
+    }
+
+def write_store(path: Path, store: Dict[str, Any]) -> None:
+    """Write atomically so serving processes never read a partial file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_text(json.dumps(store, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or inspect the precomputed FAQ answer store")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Answer a question list with every method")
+    build_parser.add_argument("--questions", type=Path, required=True, help="Text (one per line) or JSONL file")
+    build_parser.add_argument("--methods", nargs="+", choices=[m.value for m in RAGMethod],
+                              help="Methods to precompute (default: all enabled)")
+    build_parser.add_argument("--out", type=Path, default=Path(settings.ANSWER_STORE_PATH))
+    build_parser.add_argument("--max-concurrency", type=int)
+    status_parser = subparsers.add_parser("status", help="Check whether the store matches the current indexes")
+    status_parser.add_argument("--path", type=Path, default=Path(settings.ANSWER_STORE_PATH))
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        logging.basicConfig(level=logging.INFO)
+        questions = load_questions(args.questions)
+        methods = [RAGMethod(m) for m in args.methods] if args.methods else None
+        store = asyncio.run(build_store(questions, methods, args.max_concurrency))
+        write_store(args.out, store)
+        print(f"Stored {len(store['answers'])} answers for {len(questions)} questions x "
+              f"{len(store['methods'])} methods in {args.out} (index version {store['version']})")
+    else:
+        if not args.path.exists():
+            print(f"No answer store at {args.path}")
+            return
+        data = json.loads(args.path.read_text(encoding="utf-8"))
+        current = index_fingerprint()
+        state = "current" if data.get("version") == current else "stale"
+        print(f"{args.path}: {len(data.get('answers', []))} answers, built {data.get('created_at')}, "
+              f"version {data.get('version')} ({state}; indexes are at {current})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import contextvars
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .timing import StageTimer
+from .vector_index import VECTORS_FILE, MmapVectorIndex
+
+logger = logging.getLogger(__name__)
+
+try:
+    from graphrag.config.embeddings import create_collection_name, entity_description_embedding
+    from graphrag.vector_stores.base import BaseVectorStore, VectorStoreDocument, VectorStoreSearchResult
+    from graphrag.vector_stores.factory import VectorStoreFactory
+    GRAPHRAG_VECTOR_STORES_AVAILABLE = True
+except ImportError as e:
+    GRAPHRAG_VECTOR_STORES_AVAILABLE = False
+    logger.warning(f"GraphRAG vector stores not available: {e}")
+
+NUMPY_VECTOR_STORE_TYPE = "numpy_mmap"
+ENTITY_INDEX_DIRNAME = "entity_index"
+
+# Loaded indexes with the mtime of the export they were opened from and their HNSW threshold,
+# keyed by directory: opened once at startup, shared by every query
+_indexes: Dict[str, Tuple[MmapVectorIndex, int, Optional[int]]] = {}
+_indexes_lock = threading.Lock()
+
+@dataclass
+class EntitySeeds:
+    """Entities detected in the query text, used ahead of (or instead of) embedding search"""
+    ids: List[str]
+    confident: bool
+    embedding_skipped: bool = False
+
+# Seeds for the entity lookup of the local search running in this context
+_entity_seeds: contextvars.ContextVar[Optional[EntitySeeds]] = contextvars.ContextVar("entity_seeds", default=None)
+
+@contextmanager
+def entity_seeds(seeds: Optional[EntitySeeds]):
+    """Seed entity searches made by NumpyVectorStore inside this block"""
+    token = _entity_seeds.set(seeds)
+    try:
+        yield seeds
+    finally:
+        _entity_seeds.reset(token)
+
+def get_index(directory: Path, hnsw_threshold: Optional[int] = None, reload: bool = False) -> MmapVectorIndex:
+    """Return the loaded index for `directory`
+
+    Opened on first use, and again when the export was rewritten since (by
+    this or another process) or with reload=True.
+    """
+    key = str(Path(directory).resolve())
+    mtime = (Path(directory) / VECTORS_FILE).stat().st_mtime_ns
+    with _indexes_lock:
+        loaded = _indexes.get(key)
+        if reload or loaded is None or loaded[1] != mtime:
+            if hnsw_threshold is None and loaded is not None:
+                hnsw_threshold = loaded[2]
+            _indexes[key] = (MmapVectorIndex.load(directory, hnsw_threshold=hnsw_threshold), mtime, hnsw_threshold)
+        return _indexes[key][0]
+
+def warm_up_indexes() -> int:
+    """Run one search against every loaded index so its pages are resident; returns the number warmed"""
+    with _indexes_lock:
+        indexes = [index for index, _, _ in _indexes.values()]
+    for index in indexes:
+        if len(index):
+            index.search(index.vectors[0], k=1)
+    return len(indexes)
+
+def export_lancedb_table(db_uri: str, table_name: str, directory: Path) -> int:
+    """Copy a GraphRAG LanceDB embedding table into an MmapVectorIndex directory"""
+    import lancedb
+
+    df = lancedb.connect(db_uri).open_table(table_name).to_pandas()
+    MmapVectorIndex.save(directory, df["id"].astype(str).tolist(), np.stack(df["vector"].to_numpy()))
+    return len(df)
+
+def _is_stale(index_dir: Path, source: Path) -> bool:
+    if not MmapVectorIndex.exists(index_dir):
+        return True
+    return source.exists() and source.stat().st_mtime > (index_dir / "vectors.npy").stat().st_mtime
+
+def prepare_entity_index(graphrag_config, output_dir: Path, hnsw_threshold: Optional[int] = None) -> bool:
+    """Load entity-description embeddings into memory-mapped indexes and point GraphRAG at them
+
+    The configured (LanceDB) store is only read when the exported matrix is
+    missing or older than the store; queries then never open it. The config is
+    modified in place, so pass a query-only copy: indexing must keep writing to
+    the original store.
+    """
+    if not GRAPHRAG_VECTOR_STORES_AVAILABLE:
+        return False
+
+    if NUMPY_VECTOR_STORE_TYPE not in VectorStoreFactory.vector_store_types:
+        VectorStoreFactory.register(NUMPY_VECTOR_STORE_TYPE, NumpyVectorStore)
+
+    index_root = Path(output_dir) / ENTITY_INDEX_DIRNAME
+    timer = StageTimer("graphrag")
+    for store_id, store in graphrag_config.vector_store.items():
+        if store.type == NUMPY_VECTOR_STORE_TYPE:
+            continue
+        try:
+            collection = create_collection_name(store.container_name, entity_description_embedding)
+            index_dir = index_root / collection
+            stale = _is_stale(index_dir, Path(store.db_uri or "") / f"{collection}.lance")
+            if stale:
+                if getattr(store.type, "value", store.type) != "lancedb":
+                    logger.warning(f"Entity index export only supports lancedb, not {store.type}; keeping '{store_id}'")
+                    continue
+                count = export_lancedb_table(store.db_uri, collection, index_dir)
+                logger.info(f"Exported {count} entity embeddings to {index_dir}")
+            with timer.stage("entity_index_load"):
+                index = get_index(index_dir, hnsw_threshold, reload=stale)
+            store.type = NUMPY_VECTOR_STORE_TYPE
+            store.db_uri = str(index_root)
+            logger.info(f"Vector store '{store_id}' served from {len(index)} memory-mapped entity embeddings")
+        except Exception as e:
+            logger.warning(f"Entity index unavailable for vector store '{store_id}', keeping {store.type}: {e}")
+    return True
+
+if GRAPHRAG_VECTOR_STORES_AVAILABLE:
+
+    class NumpyVectorStore(BaseVectorStore):
+        """Read-only GraphRAG vector store over a memory-mapped MmapVectorIndex"""
+
+        def connect(self, **kwargs) -> None:
+            self.index = get_index(Path(kwargs["db_uri"]) / self.collection_name)
+
+        def load_documents(self, documents, overwrite: bool = True) -> None:
+            raise NotImplementedError("Numpy entity index is read-only; rebuild it from the GraphRAG output")
+
+        def similarity_search_by_vector(self, query_embedding, k: int = 10, **kwargs):
+            include = set(self.query_filter) if self.query_filter else None
+            # Over-fetch when filtering so k matches survive the filter
+            hits = self.index.search(query_embedding, k if include is None else max(k * 4, k + len(include)))
+            results = [
+                VectorStoreSearchResult(document=VectorStoreDocument(id=doc_id, text=None, vector=None), score=score)
+                for doc_id, score in hits
+                if include is None or doc_id in include
+            ]
+            return results[:k]
+
+        def similarity_search_by_text(self, text: str, text_embedder, k: int = 10, **kwargs):
+            seeds = _entity_seeds.get()
+            include = set(self.query_filter) if self.query_filter else None
+            seeded = [
+                VectorStoreSearchResult(document=VectorStoreDocument(id=doc_id, text=None, vector=None), score=1.0)
+                for doc_id in (seeds.ids if seeds else ())
+                if include is None or doc_id in include
+            ]
+            # Entities named in the query: no need to embed it to find them
+            if seeds is not None and seeds.confident and seeded:
+                seeds.embedding_skipped = True
+                return seeded[:k]
+            query_embedding = text_embedder(text)
+            if not query_embedding:
+                return seeded[:k]
+            results = self.similarity_search_by_vector(query_embedding, k)
+            if not seeded:
+                return results
+            seeded_ids = {result.document.id for result in seeded}
+            return (seeded + [r for r in results if r.document.id not in seeded_ids])[:k]
+
+        def filter_by_id(self, include_ids):
+            self.query_filter = list(include_ids) if include_ids else None
+            return self.query_filter
+
+        def search_by_id(self, id: str):
+            vector = self.index.get_vector(id)
+            return VectorStoreDocument(id=id, text=None, vector=None if vector is None else vector.tolist())
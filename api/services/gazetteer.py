@@ -0,0 +1,156 @@
+"""
+Entity mention detection over the GraphRAG entities table.
+
+Entity titles, plus aliases derived from them (a unique first name such as
+"daenerys" for "DAENERYS TARGARYEN", or an `aliases` column when the table has
+one), are stored in a word-level trie. A query is scanned left to right, taking
+the longest title starting at each word. Words that are not in the vocabulary
+can match a vocabulary word one edit away (a symmetric-delete index), which
+catches typos like "Targaryan" without scanning every title. Matching a typical
+question takes tens of microseconds.
+"""
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+
+# Match kinds, in decreasing confidence
+MATCH_SCORES = {"title": 1.0, "alias": 0.9, "fuzzy": 0.75}
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_MAX_TITLE_WORDS = 6
+_MIN_ALIAS_LENGTH = 4
+_MIN_FUZZY_LENGTH = 5
+_END = ""  # trie key holding the entries that end at a node
+
+_COMMON_WORDS = {
+    "the", "a", "an", "of", "and", "or", "in", "on", "at", "to", "is", "was", "who", "what",
+    "how", "why", "when", "where", "which", "with", "for", "from", "by", "about", "into",
+    "lord", "lady", "king", "queen", "prince", "princess", "ser", "maester", "house", "old",
+    "young", "little", "great", "black", "white", "red", "first", "last", "one", "man", "men",
+}
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased words with possessive 's dropped ("Night's" -> "night")"""
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        tokens.append(token[:-2] if token.endswith("'s") else token.replace("'", ""))
+    return tokens
+
+@dataclass
+class Mention:
+    entity_id: str
+    title: str
+    text: str
+    kind: str
+    score: float
+    start: int
+    end: int
+
+def _deletes(word: str) -> Set[str]:
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+class Gazetteer:
+    """Word-level trie of entity titles and aliases with one-edit fuzzy word matching"""
+
+    def __init__(self):
+        self._root: Dict[str, dict] = {}
+        self._vocabulary: Set[str] = set()
+        self._delete_index: Dict[str, Set[str]] = {}
+        self.size = 0
+
+    @classmethod
+    def from_entities(cls, entities: pd.DataFrame) -> "Gazetteer":
+        """Index titles, aliases from an `aliases` column, and unambiguous first names"""
+        gazetteer = cls()
+        if entities is None or "title" not in entities.columns:
+            return gazetteer
+        ids = entities["id"].astype(str) if "id" in entities.columns else entities["title"].astype(str)
+        entries: List[Tuple[str, str]] = [(i, t) for i, t in zip(ids, entities["title"]) if isinstance(t, str)]
+        titles = {" ".join(tokenize(title)) for _, title in entries}
+        for entity_id, title in entries:
+            gazetteer.add(title, entity_id, title, "title")
+
+        aliases: Dict[str, Set[Tuple[str, str]]] = {}
+        if "aliases" in entities.columns:
+            for entity_id, title, names in zip(ids, entities["title"], entities["aliases"]):
+                if isinstance(names, str):
+                    names = [names]
+                for name in names if names is not None and not isinstance(names, float) else ():
+                    aliases.setdefault(" ".join(tokenize(str(name))), set()).add((entity_id, title))
+        for entity_id, title in entries:
+            words = tokenize(title)
+            if len(words) > 1 and len(words[0]) >= _MIN_ALIAS_LENGTH and words[0] not in _COMMON_WORDS:
+                aliases.setdefault(words[0], set()).add((entity_id, title))
+        for alias, targets in aliases.items():
+            # An alias naming several entities, or another entity's title, is too ambiguous to use
+            if alias and len(targets) == 1 and alias not in titles:
+                entity_id, title = next(iter(targets))
+                gazetteer.add(alias, entity_id, title, "alias")
+        return gazetteer
+
+    def add(self, name: str, entity_id: str, title: str, kind: str) -> None:
+        words = tokenize(name)
+        if not words or len(words) > _MAX_TITLE_WORDS:
+            return
+        node = self._root
+        for word in words:
+            node = node.setdefault(word, {})
+            if word not in self._vocabulary:
+                self._vocabulary.add(word)
+                if len(word) >= _MIN_FUZZY_LENGTH:
+                    for variant in _deletes(word) | {word}:
+                        self._delete_index.setdefault(variant, set()).add(word)
+        node.setdefault(_END, []).append((entity_id, title, kind))
+        self.size += 1
+
+    def _correct(self, word: str) -> Optional[str]:
+        """The single vocabulary word within one edit of `word`, if there is exactly one"""
+        if len(word) < _MIN_FUZZY_LENGTH:
+            return None
+        candidates: Set[str] = set(self._delete_index.get(word, ()))
+        for variant in _deletes(word):
+            candidates |= self._delete_index.get(variant, set())
+        candidates.discard(word)
+        return next(iter(candidates)) if len(candidates) == 1 else None
+
+    def find(self, query: str, fuzzy: bool = True) -> List[Mention]:
+        """Entities mentioned in the query, longest match at each position, without overlaps"""
+        words = tokenize(query)
+        mentions: List[Mention] = []
+        seen: Set[str] = set()
+        i = 0
+        while i < len(words):
+            node, match, corrected = self._root, None, False
+            for j in range(i, min(i + _MAX_TITLE_WORDS, len(words))):
+                word = words[j]
+                if word not in node and fuzzy and word not in self._vocabulary:
+                    replacement = self._correct(word)
+                    if replacement is not None and replacement in node:
+                        word, corrected = replacement, True
+                if word not in node:
+                    break
+                node = node[word]
+                if _END in node:
+                    match = (j + 1, node[_END], corrected)
+            if match is None:
+                i += 1
+                continue
+            end, entries, was_corrected = match
+            # Titles win over aliases at the same span
+            entity_id, title, kind = min(entries, key=lambda e: -MATCH_SCORES[e[2]])
+            kind = "fuzzy" if was_corrected else kind
+            if entity_id not in seen:
+                seen.add(entity_id)
+                mentions.append(Mention(entity_id, title, " ".join(words[i:end]), kind, MATCH_SCORES[kind], i, end))
+            i = end
+        return mentions
+
+    def titles(self, query: str, fuzzy: bool = True) -> List[str]:
+        return [mention.title for mention in self.find(query, fuzzy)]
+
+def confident(mentions: Iterable[Mention], min_score: float) -> bool:
+    """All mentions match at least `min_score` (and there is at least one)"""
+    scores = [mention.score for mention in mentions]
+    return bool(scores) and min(scores) >= min_score
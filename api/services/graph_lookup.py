@@ -0,0 +1,116 @@
+"""
+Read-only lookups over the loaded GraphRAG tables, for the /graph endpoints.
+
+Built once per loaded output: each table is converted to JSON-ready records
+and indexed by id / title / community / level, so a request is a dict lookup
+plus a slice. `version` identifies the output the indexes were built from and
+serves as the ETag of every response.
+"""
+import bisect
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .entity_graph import EntityGraph
+
+ENTITY_COLUMNS = ('id', 'human_readable_id', 'title', 'type', 'description', 'degree', 'frequency', 'text_unit_ids')
+COMMUNITY_COLUMNS = ('id', 'community', 'level', 'parent', 'children', 'title', 'entity_ids', 'size', 'period')
+REPORT_COLUMNS = ('id', 'community', 'level', 'title', 'summary', 'rank', 'rating_explanation', 'findings', 'full_content')
+TEXT_UNIT_COLUMNS = ('id', 'human_readable_id', 'text', 'n_tokens', 'document_ids', 'entity_ids', 'relationship_ids')
+
+# Report fields left out of listings unless full=true
+REPORT_DETAIL_FIELDS = ('findings', 'full_content')
+
+def _records(df: Optional[pd.DataFrame], columns: Tuple[str, ...]) -> List[Dict[str, Any]]:
+    """JSON-ready rows (arrays as lists, NaN as None) of the columns the table has"""
+    if df is None or df.empty:
+        return []
+    present = [c for c in columns if c in df.columns]
+    return json.loads(df[present].to_json(orient="records"))
+
+class GraphLookup:
+    """Precomputed indexes over one loaded GraphRAG output"""
+
+    def __init__(self, data: Dict[str, Optional[pd.DataFrame]], graph: Optional[EntityGraph], version: str):
+        self.version = version
+        self.graph = graph
+
+        self.entities = sorted(_records(data['entities'], ENTITY_COLUMNS), key=lambda e: str(e.get('title', '')).lower())
+        self.entity_by_title = {e['title']: e for e in self.entities}
+        self.entity_by_id = {e['id']: e for e in self.entities if 'id' in e}
+        self._sorted_titles = [str(e.get('title', '')).lower() for e in self.entities]
+
+        self.reports = sorted(_records(data['community_reports'], REPORT_COLUMNS),
+                              key=lambda r: (r.get('level') or 0, -(r.get('rank') or 0)))
+        self.report_by_community = {r['community']: r for r in self.reports}
+        self.reports_by_level: Dict[int, List[Dict]] = {}
+        for report in self.reports:
+            self.reports_by_level.setdefault(report.get('level'), []).append(report)
+
+        self.communities = sorted(_records(data['communities'], COMMUNITY_COLUMNS),
+                                  key=lambda c: (c.get('level') or 0, c.get('community') or 0))
+        self.community_by_id = {c['community']: c for c in self.communities}
+        self.communities_by_level: Dict[int, List[Dict]] = {}
+        for community in self.communities:
+            self.communities_by_level.setdefault(community.get('level'), []).append(community)
+
+        # Listings as served, so a request only slices them
+        self.community_listing = [
+            {**c, "report_title": (self.report_by_community.get(c['community']) or {}).get('title')}
+            for c in self.communities
+        ]
+        self.community_listing_by_level: Dict[int, List[Dict]] = {}
+        for community in self.community_listing:
+            self.community_listing_by_level.setdefault(community.get('level'), []).append(community)
+        self.report_summaries = [{k: v for k, v in r.items() if k not in REPORT_DETAIL_FIELDS} for r in self.reports]
+        self.report_summaries_by_level: Dict[int, List[Dict]] = {}
+        for report in self.report_summaries:
+            self.report_summaries_by_level.setdefault(report.get('level'), []).append(report)
+
+        self.text_units_loaded = data.get('text_units') is not None
+        self.text_unit_by_id = {t['id']: t for t in _records(data.get('text_units'), TEXT_UNIT_COLUMNS)}
+
+    def search_entities(self, query: Optional[str] = None, entity_type: Optional[str] = None) -> List[Dict]:
+        """Entities whose title starts with `query`, then those containing it; all entities without a query"""
+        if query:
+            needle = query.lower()
+            start = bisect.bisect_left(self._sorted_titles, needle)
+            end = bisect.bisect_left(self._sorted_titles, needle + "￿")
+            prefix = self.entities[start:end]
+            contains = [e for i, e in enumerate(self.entities)
+                        if needle in self._sorted_titles[i] and not (start <= i < end)]
+            matches = prefix + contains
+        else:
+            matches = self.entities
+        if entity_type:
+            matches = [e for e in matches if str(e.get('type', '')).lower() == entity_type.lower()]
+        return matches
+
+    def get_entity(self, key: str) -> Optional[Dict]:
+        """Entity by title (case-insensitive) or id"""
+        entity = self.entity_by_title.get(key) or self.entity_by_id.get(key)
+        if entity is None:
+            i = bisect.bisect_left(self._sorted_titles, key.lower())
+            if i < len(self._sorted_titles) and self._sorted_titles[i] == key.lower():
+                entity = self.entities[i]
+        return entity
+
+    def neighbors(self, title: str, hops: int = 1) -> List[Dict]:
+        return self.graph.neighborhood(title, hops) if self.graph is not None else []
+
+    def community_reports(self, level: Optional[int] = None, full: bool = False) -> List[Dict]:
+        if full:
+            return self.reports if level is None else self.reports_by_level.get(level, [])
+        return self.report_summaries if level is None else self.report_summaries_by_level.get(level, [])
+
+    def list_communities(self, level: Optional[int] = None) -> List[Dict]:
+        return self.community_listing if level is None else self.community_listing_by_level.get(level, [])
+
+    def get_community(self, community: int) -> Optional[Dict]:
+        """Community with its member entities' titles and its report"""
+        record = self.community_by_id.get(community)
+        if record is None:
+            return None
+        members = [self.entity_by_id[i]['title'] for i in record.get('entity_ids') or [] if i in self.entity_by_id]
+        return {**record, "members": members, "report": self.report_by_community.get(community)}
@@ -1,23 +1,53 @@
+import asyncio
+import hashlib
+import json
 import os
+import threading
 import pandas as pd
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Union
 import logging
 from functools import wraps
 from contextlib import contextmanager
 
+from .entity_index import EntitySeeds, entity_seeds, prepare_entity_index
+from .gazetteer import Gazetteer, confident
+from .index_cache import IndexCache
+from .metering import TokenUsage, install_metering, metered_usage
+from .metrics import metrics
+from .prompt_manager import install_prompt_trimming
+from . import report_digests
+from .providers import get_provider
+from api.config import settings
+from .timing import StageTimer, SearchStageCallbacks
+from .tokens import count_tokens
+
+if TYPE_CHECKING:
+    from .entity_graph import EntityGraph
+    from .graph_lookup import GraphLookup
+
 logger = logging.getLogger(__name__)
 
 # GraphRAG imports with better error handling
 try:
     import graphrag.api as api
     from graphrag.config.load_config import load_config
+    from graphrag.language_model.manager import ModelManager
     from graphrag.index.typing.pipeline_run_result import PipelineRunResult
     GRAPHRAG_AVAILABLE = True
 except ImportError as e:
     GRAPHRAG_AVAILABLE = False
     logger.warning(f"GraphRAG not available: {e}")
 
+# Output tables, by the name they are loaded under
+OUTPUT_FILES = {
+    'entities': 'entities.parquet',
+    'communities': 'communities.parquet',
+    'community_reports': 'community_reports.parquet',
+    'relationships': 'relationships.parquet',
+    'text_units': 'text_units.parquet'
+}
+
 def require_graphrag(func):
     """Decorator to ensure GraphRAG is available"""
     @wraps(func)
@@ -45,9 +75,26 @@ class GraphRAGClient:
     DEFAULT_RESPONSE_TYPE = "Multiple Paragraphs"
     DEFAULT_COMMUNITY_LEVEL = 2
     
-    def __init__(self, project_directory: str = "./graphragtest/"):
+    # Output tables each search needs (entities, communities and reports are always loaded)
+    REQUIRED_TABLES = ('entities', 'communities', 'community_reports')
+    SEARCH_TABLES = {
+        'global': REQUIRED_TABLES,
+        'local': REQUIRED_TABLES + ('relationships', 'text_units'),
+        'drift': REQUIRED_TABLES + ('relationships', 'text_units'),
+        'path': REQUIRED_TABLES + ('relationships',),
+    }
+    
+    def __init__(self, project_directory: str = "./graphragtest/", searches: Optional[List[str]] = None,
+                 load_output: bool = True):
         self.project_directory = Path(project_directory)
+        # False for build-only clients (index workers): no tables, entity index or reload after a build
+        self.load_output = load_output
+        # Searches this client serves (None = all); decides which tables and indexes get loaded
+        self.searches = list(self.SEARCH_TABLES) if searches is None else list(searches)
+        self.tables = {table for search in self.searches for table in self.SEARCH_TABLES[search]} | set(self.REQUIRED_TABLES)
         self.graphrag_config = None
+        self.index_config = None
+        self.index_cache = None
         self.community_level = self.DEFAULT_COMMUNITY_LEVEL
         
         # Data storage - using None to indicate not loaded
@@ -58,21 +105,33 @@ class GraphRAGClient:
             'relationships': None,
             'text_units': None
         }
+        # Entity titles and aliases mentioned in a query, rebuilt with the tables
+        self.gazetteer: Optional[Gazetteer] = None
+        # CSR entity graph over the relationships table, for path search
+        self.graph: Optional["EntityGraph"] = None
+        # Identifies the loaded output files (ETag of the /graph endpoints)
+        self.data_version: Optional[str] = None
+        self._graph_lookup: Optional["GraphLookup"] = None
+        self._graph_lookup_lock = threading.Lock()
+        # Coarse tier of community report digests for tiered global search (None if not built)
+        self.report_digests: Optional[pd.DataFrame] = None
         
         # Auto-initialize if possible
         if GRAPHRAG_AVAILABLE:
             self.setup_config()
-            self.load_data()
+            if load_output:
+                self.load_data()
     
     @property
     def output_dir(self) -> Path:
         """Get output directory path"""
         return self.project_directory / "output"
     
-    def _has_required_data(self) -> bool:
+    def _has_required_data(self, data: Optional[Dict] = None) -> bool:
         """Check if minimum required data is loaded"""
         required = ['entities', 'communities', 'community_reports']
-        return all(self._data[key] is not None for key in required)
+        data = self._data if data is None else data
+        return all(data[key] is not None for key in required)
     
     def _load_parquet_safe(self, file_path: Path) -> Optional[pd.DataFrame]:
         """Safely load parquet file with error handling"""
@@ -94,32 +153,83 @@ class GraphRAGClient:
             if self.graphrag_config is None:
                 logger.error(f"No valid config found in {self.project_directory}")
                 return False
+            get_provider().configure_graphrag(self.graphrag_config)
+            # Indexing keeps the unmodified config; queries use a copy wired to the local entity index
+            self.index_config = self.graphrag_config
+            self.index_cache = IndexCache.from_config(self.index_config, self.project_directory, settings.GRAPHRAG_CACHE_DIR)
+            if settings.INDEX_CACHE_ENABLED:
+                self.index_cache.install(self.index_config)
+            install_metering(self.index_config)
+            # Trim extraction prompts outside the meter so it counts the tokens actually sent
+            install_prompt_trimming(self.index_config, settings.EXTRACT_PROMPT_STRATEGY, settings.EXTRACT_PROMPT_MAX_EXAMPLES)
+            self._prepare_query_config()
             return True
         except Exception as e:
             logger.error(f"Config loading failed: {e}")
             return False
     
+    def _prepare_query_config(self):
+        """Derive the query-time config from the indexing config"""
+        # Only local and drift search look up entity embeddings
+        needs_entity_index = any(search in self.searches for search in ('local', 'drift'))
+        if settings.ENTITY_INDEX_BACKEND != "numpy" or not needs_entity_index or not self.load_output:
+            self.graphrag_config = self.index_config
+            return
+        config = self.index_config.model_copy(deep=True)
+        prepare_entity_index(config, self.output_dir, settings.ENTITY_INDEX_HNSW_THRESHOLD)
+        self.graphrag_config = config
+    
+    def reload_output(self) -> bool:
+        """Serve a freshly built index output without a restart"""
+        loaded = self.load_data()
+        if loaded and self.index_config is not None:
+            self._prepare_query_config()
+        return loaded
+    
+    def reload_if_changed(self, servable: Optional[Callable[[str], bool]] = None) -> bool:
+        """Reload the output if its files changed since they were loaded (e.g. rebuilt by another worker)
+
+        servable(version) can refuse the version on disk, e.g. what a failed build left behind.
+        """
+        if not self.load_output:
+            return False
+        version = self.output_version()
+        if version == self.data_version or (servable is not None and not servable(version)):
+            return False
+        logger.info("GraphRAG output changed on disk; reloading")
+        return self.reload_output()
+    
+    def output_version(self) -> str:
+        """Version of the output files this client loads, from their sizes and mtimes"""
+        signature = []
+        for key, filename in OUTPUT_FILES.items():
+            file_path = self.output_dir / filename
+            if key in self.tables and file_path.exists():
+                stat = file_path.stat()
+                signature.append((filename, stat.st_size, stat.st_mtime_ns))
+        return hashlib.sha256(json.dumps(signature).encode()).hexdigest()[:16]
+    
     def load_data(self) -> bool:
         """Load all available GraphRAG output data"""
         if not self.output_dir.exists():
             logger.error(f"Output directory not found: {self.output_dir}")
             return False
         
-        # Define file mappings
-        files = {
-            'entities': 'entities.parquet',
-            'communities': 'communities.parquet',
-            'community_reports': 'community_reports.parquet',
-            'relationships': 'relationships.parquet',
-            'text_units': 'text_units.parquet'
-        }
+        # Taken before reading: files rewritten meanwhile make the next check reload again
+        version = self.output_version()
         
-        # Load each file
+        # Load each file into a fresh dict; in-flight queries keep the tables they started with
+        data = {}
         loaded_count = 0
-        for key, filename in files.items():
+        timer = StageTimer("graphrag")
+        for key, filename in OUTPUT_FILES.items():
+            if key not in self.tables:
+                data[key] = None
+                continue
             file_path = self.output_dir / filename
-            df = self._load_parquet_safe(file_path)
-            self._data[key] = df
+            with timer.stage("parquet_load"):
+                df = self._load_parquet_safe(file_path)
+            data[key] = df
             if df is not None:
                 loaded_count += 1
         
@@ -128,63 +238,289 @@ class GraphRAGClient:
             return False
         
         # Check for minimum required files
-        if not self._has_required_data():
+        if not self._has_required_data(data):
             logger.error("Missing required files: entities, communities, or community_reports")
             return False
         
-        logger.info(f"Loaded {loaded_count}/5 data files successfully")
+        with timer.stage("gazetteer_build"):
+            gazetteer = Gazetteer.from_entities(data['entities'])
+        graph = None
+        if data['relationships'] is not None:
+            from .entity_graph import EntityGraph
+            with timer.stage("graph_build"):
+                graph = EntityGraph.from_tables(data['entities'], data['relationships'])
+        digests = self._load_report_digests() if 'global' in self.searches else None
+        self._data = data
+        self.gazetteer = gazetteer
+        self.graph = graph
+        self.report_digests = digests
+        self.data_version = version
+        logger.info(f"Loaded {loaded_count}/{len(self.tables)} data files successfully")
         return True
     
+    def _load_report_digests(self) -> Optional[pd.DataFrame]:
+        """Report digests built with the index; None (no tiered global search) for outputs indexed before them"""
+        path = self.output_dir / report_digests.DIGESTS_FILE
+        if not path.exists():
+            logger.info(f"No community report digests in {self.output_dir}; tiered global search is off until "
+                        f"the next index build or `python -m api.services.report_digests build`")
+            return None
+        return self._load_parquet_safe(path)
+    
+    def graph_lookup(self) -> Optional["GraphLookup"]:
+        """Lookup indexes over the loaded tables, built on first use after each (re)load"""
+        if not self._has_required_data():
+            return None
+        lookup = self._graph_lookup
+        if lookup is None or lookup.version != self.data_version:
+            with self._graph_lookup_lock:
+                lookup = self._graph_lookup
+                if lookup is None or lookup.version != self.data_version:
+                    from .graph_lookup import GraphLookup
+                    lookup = GraphLookup(self._data, self.graph, self.data_version)
+                    self._graph_lookup = lookup
+        return lookup
+    
+    # Column used to label each item of a context table, in order of preference
+    CONTEXT_LABEL_COLUMNS = ('title', 'entity', 'source', 'id')
+    
+    @classmethod
+    def summarize_context(cls, context, max_items: int = 50) -> Dict:
+        """Compact summary of a search context: items used per table with their token sizes"""
+        tables = {}
+        if isinstance(context, dict):
+            for name, records in context.items():
+                if isinstance(records, pd.DataFrame):
+                    tables[name] = records
+                elif isinstance(records, list) and records and isinstance(records[0], dict):
+                    tables[name] = pd.DataFrame(records)
+        
+        summary = {}
+        context_tokens = 0
+        for name, df in tables.items():
+            label_column = next((c for c in cls.CONTEXT_LABEL_COLUMNS if c in df.columns), None)
+            items = []
+            table_tokens = 0
+            for record in df.to_dict('records'):
+                # Sized as GraphRAG renders it: one delimited row per record
+                tokens = count_tokens("|".join(str(v) for v in record.values()))
+                table_tokens += tokens
+                if len(items) < max_items:
+                    label = record.get(label_column) if label_column else None
+                    if label_column == 'source' and 'target' in record:
+                        label = f"{record['source']} -> {record['target']}"
+                    items.append({"id": str(record.get('id', '')), "label": str(label), "tokens": tokens})
+            summary[name] = {
+                "count": len(df),
+                "tokens": table_tokens,
+                "items": items,
+                "truncated": len(df) > max_items
+            }
+            context_tokens += table_tokens
+        
+        return {
+            "tables": summary,
+            "context_tokens": context_tokens
+        }
+    
+    def _record_tokens(self, method: str, response, usage: Optional[TokenUsage] = None) -> Dict[str, int]:
+        """Count the tokens of a search and update the token counters
+
+        Prompt tokens are those of the rendered prompts (system prompt, context,
+        map/reduce steps) the metered chat models actually sent, when `usage`
+        collected any.
+        """
+        tokens = {"completion": count_tokens(response if isinstance(response, str) else str(response))}
+        sent = usage.as_dict() if usage is not None else None
+        if sent and sent["calls"]:
+            tokens["prompt"] = sent["prompt_tokens"]
+            tokens["llm_calls"] = sent["calls"]
+        for kind in ("prompt", "completion"):
+            if kind in tokens:
+                metrics.inc("rag_tokens_total", tokens[kind], help="Tokens sent to / generated by the LLM",
+                            method=method, kind=kind)
+        return tokens
+    
+    @property
+    def input_dir(self) -> Path:
+        """Get input directory path"""
+        return self.project_directory / "input"
+    
+    @property
+    def input_manifest_path(self) -> Path:
+        """Hashes of the input documents the current output was built from"""
+        return self.output_dir / "input_manifest.json"
+    
+    def _scan_inputs(self) -> Dict[str, str]:
+        """sha256 of every input document, keyed by path relative to the input directory"""
+        manifest = {}
+        if self.input_dir.exists():
+            for path in sorted(p for p in self.input_dir.rglob("*") if p.is_file()):
+                manifest[str(path.relative_to(self.input_dir))] = hashlib.sha256(path.read_bytes()).hexdigest()
+        return manifest
+    
+    def diff_inputs(self) -> Optional[Dict[str, List[str]]]:
+        """New, changed and removed input documents since the last build (None if never recorded)"""
+        if not self.input_manifest_path.exists():
+            return None
+        previous = json.loads(self.input_manifest_path.read_text())
+        current = self._scan_inputs()
+        return {
+            "new": [name for name in current if name not in previous],
+            "changed": [name for name in current if name in previous and current[name] != previous[name]],
+            "removed": [name for name in previous if name not in current]
+        }
+    
+    def _plan_build(self, incremental: bool) -> Dict:
+        """Decide between a full build, an update run or no work at all"""
+        changes = self.diff_inputs()
+        plan = {"mode": "standard", "input_changes": changes, "notes": []}
+        if not incremental:
+            return plan
+        
+        if not all((self.output_dir / f"{table}.parquet").exists() for table in self.REQUIRED_TABLES):
+            plan["notes"].append("No existing index output; running a full build")
+        elif changes is not None and changes["removed"]:
+            # GraphRAG update runs only append; deleting documents needs a rebuild
+            plan["notes"].append(f"Input documents removed ({', '.join(changes['removed'])}); running a full build")
+        elif changes is not None and changes["changed"]:
+            # Update runs pick documents by title, so an edited document would be skipped as already indexed
+            plan["notes"].append(f"Input documents changed ({', '.join(changes['changed'])}); running a full build")
+        elif changes is not None and not changes["new"]:
+            plan["mode"] = "skipped"
+            plan["notes"].append("No new or changed input documents")
+        else:
+            plan["mode"] = "update"
+        return plan
+    
     @require_graphrag
-    async def build_index(self) -> Dict:
-        """Build GraphRAG index with simplified result processing"""
+    async def build_index(self, incremental: bool = False, callbacks: Optional[list] = None) -> Dict:
+        """Build GraphRAG index, or with incremental=True extract only new input documents
+
+        `callbacks` are GraphRAG WorkflowCallbacks notified of pipeline and workflow progress.
+        """
         try:
-            results = await api.build_index(config=self.graphrag_config)
+            plan = self._plan_build(incremental)
+            if plan["mode"] == "skipped":
+                return {"success": True, "workflows_completed": 0, "total_workflows": 0, "errors": [], **plan}
+            
+            # Update runs extract only the delta documents, merge entities/relationships into
+            # the existing graph and regenerate reports for the communities they touch
+            self.index_cache.start_run(self.index_config)
+            try:
+                results = await api.build_index(
+                    config=self.index_config,
+                    is_update_run=plan["mode"] == "update",
+                    callbacks=callbacks
+                )
+            finally:
+                cache_stats = self.index_cache.finish_run()
             
             success_count = 0
             all_errors = []
             
             for result in results:
                 if result.errors:
-                    all_errors.extend(result.errors)
+                    all_errors.extend(str(error) for error in result.errors)
                 else:
                     success_count += 1
             
+            if not all_errors:
+                try:
+                    digests = report_digests.build_report_digests(self.output_dir, settings.GLOBAL_TIER_DIGEST_TOKENS)
+                    logger.info(f"Built {len(digests)} community report digests")
+                except Exception as e:
+                    logger.warning(f"Community report digests not built: {e}")
+                self.input_manifest_path.write_text(json.dumps(self._scan_inputs(), indent=2))
+                if self.load_output:
+                    self.reload_output()
+            
             return {
                 "success": len(all_errors) == 0,
                 "workflows_completed": success_count,
                 "total_workflows": len(results),
-                "errors": all_errors
+                "errors": all_errors,
+                "cache": cache_stats,
+                **plan
             }
             
         except Exception as e:
             logger.error(f"Index building failed: {e}")
             return {"error": str(e)}
     
+    @require_graphrag
+    def get_index_cache_report(self) -> Dict:
+        """Size, last-run hit rate and stale-prompt stages of the indexing LLM cache"""
+        return self.index_cache.report(self.index_config)
+    
+    @require_graphrag
+    def prune_index_cache(self, stages: Optional[List[str]] = None,
+                          older_than_days: Optional[float] = None,
+                          stale_prompts: bool = False) -> Dict:
+        """Delete indexing LLM cache entries"""
+        try:
+            return self.index_cache.prune(stages, older_than_days, stale_prompts, self.index_config)
+        except ValueError as e:
+            return {"error": str(e)}
+    
+    # LocalSearchConfig fields that may be tuned per request
+    LOCAL_SEARCH_PARAMS = ('max_context_tokens', 'top_k_entities', 'top_k_relationships',
+                           'text_unit_prop', 'community_prop')
+    
+    def _with_local_search_params(self, params: Dict):
+        """Copy of the GraphRAG config with local search parameters overridden"""
+        params = {k: v for k, v in params.items() if k in self.LOCAL_SEARCH_PARAMS and v is not None}
+        if not params:
+            return self.graphrag_config
+        
+        local_search = self.graphrag_config.local_search.model_copy(update=params)
+        if local_search.text_unit_prop + local_search.community_prop > 1:
+            raise ValueError("text_unit_prop + community_prop must not exceed 1")
+        return self.graphrag_config.model_copy(update={"local_search": local_search})
+    
     @require_graphrag
     @require_data
     async def query_global(self, query: str, 
                           community_level: Optional[int] = None,
                           response_type: str = DEFAULT_RESPONSE_TYPE,
-                          dynamic_community_selection: bool = False) -> Dict:
-        """Global search using community reports"""
+                          dynamic_community_selection: bool = False,
+                          tiered: bool = False) -> Dict:
+        """Global search using community reports (with tiered=True, only those of the best digest groups)"""
         try:
             level = community_level or self.community_level
+            timer = StageTimer("graphrag-globalsearch")
             
-            response, context = await api.global_search(
-                config=self.graphrag_config,
-                entities=self._data['entities'],
-                communities=self._data['communities'],
-                community_reports=self._data['community_reports'],
-                community_level=level,
-                dynamic_community_selection=dynamic_community_selection,
-                response_type=response_type,
-                query=query,
-            )
+            community_reports = self._data['community_reports']
+            tier = None
+            with metered_usage() as usage:
+                if tiered and not dynamic_community_selection and self.report_digests is not None and not self.report_digests.empty:
+                    with timer.stage("digest_map"):
+                        tier = await self._select_report_groups(query)
+                    if tier["communities"]:
+                        community_reports = community_reports[community_reports['community'].astype(int).isin(tier["communities"])]
+                    tier = {**tier, "communities": len(tier["communities"]), "reports": len(community_reports),
+                            "reports_total": len(self._data['community_reports'])}
+                
+                stage_callbacks = SearchStageCallbacks(timer)
+                response, context = await api.global_search(
+                    config=self.graphrag_config,
+                    entities=self._data['entities'],
+                    communities=self._data['communities'],
+                    community_reports=community_reports,
+                    community_level=level,
+                    dynamic_community_selection=dynamic_community_selection,
+                    response_type=response_type,
+                    query=query,
+                    callbacks=[stage_callbacks],
+                )
+                stage_callbacks.finish()
             
             return {
                 "response": response,
                 "context": context,
+                "timings": timer.as_dict(),
+                "tokens": self._record_tokens("graphrag-globalsearch", response, usage),
+                "tier": tier,
                 "query_params": {
                     "community_level": level,
                     "response_type": response_type,
@@ -196,38 +532,98 @@ class GraphRAGClient:
             logger.error(f"Global search failed: {e}")
             return {"error": str(e)}
     
+    def _chat_model(self, name: str):
+        """The local search chat model of the query config, created once per name"""
+        model_settings = self.graphrag_config.get_language_model_config(
+            self.graphrag_config.local_search.chat_model_id
+        )
+        return ModelManager().get_or_create_chat_model(
+            name=name, model_type=model_settings.type, config=model_settings
+        )
+    
+    async def _select_report_groups(self, query: str) -> Dict:
+        """Score the report digests against the query and pick the groups to search in full"""
+        digests = self.report_digests
+        batches = report_digests.digest_batches(digests, settings.GLOBAL_TIER_MAP_TOKENS)
+        chat_model = self._chat_model("global_search_tier")
+        responses = await asyncio.gather(
+            *(chat_model.achat(report_digests.scoring_prompt(query, batch)) for batch in batches),
+            return_exceptions=True
+        )
+        scores: Dict[str, float] = {}
+        fallback = False
+        for batch, response in zip(batches, responses):
+            parsed = None
+            if not isinstance(response, BaseException):
+                parsed = report_digests.parse_scores(response.output.content, set(batch["group"]))
+            if parsed is None:
+                fallback = True
+                parsed = report_digests.lexical_scores(query, batch)
+            scores.update(parsed)
+        groups = report_digests.select_groups(scores, settings.GLOBAL_TIER_TOP_GROUPS, settings.GLOBAL_TIER_MIN_SCORE)
+        return {
+            "groups": [{"group": group, "score": scores[group]} for group in groups],
+            "digest_calls": len(batches),
+            "lexical_fallback": fallback,
+            "communities": report_digests.group_communities(digests, groups),
+        }
+    
     @require_graphrag 
     @require_data
     async def query_local(self, query: str,
                          community_level: Optional[int] = None,
-                         response_type: str = DEFAULT_RESPONSE_TYPE) -> Dict:
+                         response_type: str = DEFAULT_RESPONSE_TYPE,
+                         local_search_params: Optional[Dict] = None) -> Dict:
         """Local search using entities and relationships"""
         try:
             level = community_level or self.community_level
+            config = self._with_local_search_params(local_search_params or {})
+            timer = StageTimer("graphrag-localsearch")
+            stage_callbacks = SearchStageCallbacks(timer)
             
             # Handle DataFrame parameters safely
             relationships_df = self._data['relationships'] if self._data['relationships'] is not None else pd.DataFrame()
             text_units_df = self._data['text_units'] if self._data['text_units'] is not None else pd.DataFrame()
             
-            response, context = await api.local_search(
-                config=self.graphrag_config,
-                entities=self._data['entities'],
-                communities=self._data['communities'],
-                relationships=relationships_df,
-                text_units=text_units_df,
-                community_reports=self._data['community_reports'],
-                community_level=level,
-                response_type=response_type,
-                covariates=None,
-                query=query,
-            )
+            seeds, mentions = None, []
+            if settings.GAZETTEER_ENABLED and self.gazetteer is not None:
+                with timer.stage("entity_mentions"):
+                    mentions = self.gazetteer.find(query, fuzzy=settings.GAZETTEER_FUZZY)
+                if mentions:
+                    seeds = EntitySeeds(
+                        ids=[mention.entity_id for mention in mentions],
+                        confident=settings.GAZETTEER_SKIP_EMBEDDING and confident(mentions, settings.GAZETTEER_MIN_CONFIDENCE)
+                    )
+            
+            with entity_seeds(seeds), metered_usage() as usage:
+                response, context = await api.local_search(
+                    config=config,
+                    entities=self._data['entities'],
+                    communities=self._data['communities'],
+                    relationships=relationships_df,
+                    text_units=text_units_df,
+                    community_reports=self._data['community_reports'],
+                    community_level=level,
+                    response_type=response_type,
+                    covariates=None,
+                    query=query,
+                    callbacks=[stage_callbacks],
+                )
+            stage_callbacks.finish()
             
             return {
                 "response": response,
                 "context": context,
+                "timings": timer.as_dict(),
+                "tokens": self._record_tokens("graphrag-localsearch", response, usage),
+                "seed_entities": {
+                    "mentions": [{"title": m.title, "text": m.text, "kind": m.kind, "score": m.score} for m in mentions],
+                    "embedding_skipped": seeds.embedding_skipped if seeds else False
+                },
                 "query_params": {
                     "community_level": level,
-                    "response_type": response_type
+                    "response_type": response_type,
+                    **config.local_search.model_dump(include=set(self.LOCAL_SEARCH_PARAMS))
                 }
             }
             
@@ -249,25 +645,32 @@ class GraphRAGClient:
         
         try:
             level = community_level or self.community_level
+            timer = StageTimer("graphrag-drift")
+            stage_callbacks = SearchStageCallbacks(timer)
             
             # Handle DataFrame parameters safely
             text_units_df = self._data['text_units'] if self._data['text_units'] is not None else pd.DataFrame()
             
-            response, context = await api.drift_search(
-                config=self.graphrag_config,
-                entities=self._data['entities'],
-                communities=self._data['communities'],
-                relationships=self._data['relationships'],
-                text_units=text_units_df,
-                community_reports=self._data['community_reports'],
-                community_level=level,
-                response_type=response_type,
-                query=query,
-            )
+            with metered_usage() as usage:
+                response, context = await api.drift_search(
+                    config=self.graphrag_config,
+                    entities=self._data['entities'],
+                    communities=self._data['communities'],
+                    relationships=self._data['relationships'],
+                    text_units=text_units_df,
+                    community_reports=self._data['community_reports'],
+                    community_level=level,
+                    response_type=response_type,
+                    query=query,
+                    callbacks=[stage_callbacks],
+                )
+            stage_callbacks.finish()
             
             return {
                 "response": response,
                 "context": context,
+                "timings": timer.as_dict(),
+                "tokens": self._record_tokens("graphrag-drift", response, usage),
                 "query_params": {
                     "community_level": level,
                     "response_type": response_type
@@ -278,6 +681,96 @@ class GraphRAGClient:
             logger.error(f"Drift search failed: {e}")
             return {"error": str(e)}
     
+    PATH_SEARCH_PROMPT = """You are answering a question about the entities of a knowledge graph.
+Below are the entities the question refers to, and the chains of relationships that connect them in the graph.
+
+{context}
+
+Answer the question using only this information. Explain how the entities are connected, step by step,
+and say so if the relationships shown do not answer the question.
+Format the answer as: {response_type}
+
+Question: {query}
+"""
+    
+    def build_path_context(self, mentions: List[str], max_hops: int, neighbor_limit: int,
+                           max_description_chars: int) -> Dict:
+        """Shortest paths between the mentioned entities (or one entity's neighbourhood) as compact text"""
+        paths, missing = [], []
+        for source, target in zip(mentions, mentions[1:]):
+            steps = self.graph.shortest_path(source, target, max_hops)
+            if steps is None:
+                missing.append([source, target])
+            elif steps:
+                paths.append(steps)
+        neighbors = self.graph.neighborhood(mentions[0], 1, neighbor_limit) if len(mentions) == 1 else []
+        
+        nodes = list(dict.fromkeys(
+            [*mentions, *(title for steps in paths for step in steps for title in (step.source, step.target))]
+        ))
+        lines = ["Entities:"]
+        lines += [self.graph.describe_entity(title, max_description_chars) for title in nodes]
+        for steps in paths:
+            lines.append(f"\nPath from {steps[0].source} to {steps[-1].target} ({len(steps)} hops):")
+            lines += [f"{step.source} -> {step.target}: {step.description}" for step in steps]
+        for source, target in missing:
+            lines.append(f"\nNo path within {max_hops} hops between {source} and {target}.")
+        if neighbors:
+            lines.append(f"\nRelationships of {mentions[0]}:")
+            lines += [f"{mentions[0]} -> {n['title']}: {n['relationship']}" for n in neighbors]
+        return {
+            "text": "\n".join(lines),
+            "paths": [[{"source": s.source, "target": s.target, "description": s.description} for s in steps]
+                      for steps in paths],
+            "unconnected": missing,
+            "neighbors": [n["title"] for n in neighbors],
+        }
+    
+    @require_graphrag
+    @require_data
+    async def query_path(self, query: str,
+                        response_type: str = DEFAULT_RESPONSE_TYPE,
+                        max_hops: int = 4) -> Dict:
+        """Answer from the relationship paths between the entities named in the query"""
+        if self.graph is None or self.gazetteer is None:
+            return {"error": "Relationships data required for path search"}
+        
+        try:
+            timer = StageTimer("graphrag-path")
+            with timer.stage("retrieval"):
+                mentions = [m.title for m in self.gazetteer.find(query, fuzzy=settings.GAZETTEER_FUZZY)
+                            if m.title in self.graph.node_ids][:settings.GRAPH_PATH_MAX_ENTITIES]
+            if not mentions:
+                return {"error": "Path search needs at least one entity from the graph named in the question"}
+            
+            with timer.stage("context_build"):
+                context = self.build_path_context(
+                    mentions, max_hops, settings.GRAPH_NEIGHBORHOOD_LIMIT, settings.GRAPH_DESCRIPTION_MAX_CHARS
+                )
+                prompt = self.PATH_SEARCH_PROMPT.format(
+                    context=context["text"], response_type=response_type, query=query
+                )
+            
+            with timer.stage("generation"), metered_usage() as usage:
+                model_response = await self._chat_model("path_search").achat(prompt)
+                response = model_response.output.content
+            
+            return {
+                "response": response,
+                "context": context,
+                "timings": timer.as_dict(),
+                "tokens": self._record_tokens("graphrag-path", response, usage),
+                "query_params": {
+                    "entities": mentions,
+                    "max_hops": max_hops,
+                    "response_type": response_type
+                }
+            }
+            
+        except Exception as e:
+            logger.error(f"Path search failed: {e}")
+            return {"error": str(e)}
+    
     def get_status(self) -> Dict:
         """Get comprehensive client status"""
         data_summary = {k: len(v) if v is not None else 0 
@@ -0,0 +1,314 @@
+"""
+On-disk LLM response cache for GraphRAG indexing: instrumentation, inspection and pruning.
+
+GraphRAG already keys cached LLM responses by a hash of the prompt messages and
+model parameters, one subdirectory per stage (extract_graph,
+summarize_descriptions, community_reporting, ...). This module wraps that file
+cache to count hits and misses per stage, records which prompt files each stage
+was built with, and removes entries that can no longer be hit.
+
+Usage:
+    python -m api.services.index_cache report
+    python -m api.services.index_cache prune --stale-prompts
+    python -m api.services.index_cache prune --stage summarize_descriptions --older-than-days 30
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+try:
+    from graphrag.cache.factory import CacheFactory
+    from graphrag.cache.pipeline_cache import PipelineCache
+    GRAPHRAG_CACHE_AVAILABLE = True
+except ImportError as e:
+    GRAPHRAG_CACHE_AVAILABLE = False
+    logger.warning(f"GraphRAG cache not available: {e}")
+
+INSTRUMENTED_CACHE_TYPE = "instrumented_file"
+STATS_FILE = "_stats.json"
+PROMPTS_FILE = "_prompts.json"
+
+# Cache stage -> GraphRAG config attribute path of the prompt file it depends on
+STAGE_PROMPTS = {
+    "extract_graph": ("extract_graph", "prompt"),
+    "summarize_descriptions": ("summarize_descriptions", "prompt"),
+    "community_reporting": ("community_reports", "graph_prompt"),
+    "extract_claims": ("extract_claims", "prompt"),
+}
+
+class CacheStats:
+    """Hit/miss/write counters per cache stage for one indexing run"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages: Dict[str, Dict[str, int]] = {}
+        self.started_at = time.time()
+
+    def record(self, stage: str, event: str):
+        with self._lock:
+            counts = self.stages.setdefault(stage or "root", {"hits": 0, "misses": 0, "writes": 0})
+            counts[event] += 1
+        if event != "writes":
+            metrics.inc("rag_cache_requests_total", help="Cache lookups by cache and result",
+                        cache="index_llm", result="hit" if event == "hits" else "miss", stage=stage)
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {name: dict(counts) for name, counts in self.stages.items()}
+        hits = sum(c["hits"] for c in stages.values())
+        lookups = hits + sum(c["misses"] for c in stages.values())
+        return {
+            "started_at": self.started_at,
+            "stages": stages,
+            "hits": hits,
+            "lookups": lookups,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+        }
+
+if GRAPHRAG_CACHE_AVAILABLE:
+
+    class InstrumentedPipelineCache(PipelineCache):
+        """PipelineCache wrapper that counts hits, misses and writes per stage"""
+
+        def __init__(self, inner: "PipelineCache", stats: CacheStats, directory: Path, stage: str = ""):
+            self._inner = inner
+            self._stats = stats
+            self._directory = directory
+            self._stage = stage
+
+        async def get(self, key: str) -> Any:
+            value = await self._inner.get(key)
+            self._stats.record(self._stage, "misses" if value is None else "hits")
+            if value is not None:
+                # Entries still in use get a fresh mtime; see IndexCache.stale_prompt_stages
+                try:
+                    os.utime(self._directory / key)
+                except OSError:
+                    pass
+            return value
+
+        async def set(self, key: str, value: Any, debug_data: Optional[dict] = None) -> None:
+            self._stats.record(self._stage, "writes")
+            await self._inner.set(key, value, debug_data)
+
+        async def has(self, key: str) -> bool:
+            return await self._inner.has(key)
+
+        async def delete(self, key: str) -> None:
+            await self._inner.delete(key)
+
+        async def clear(self) -> None:
+            await self._inner.clear()
+
+        def child(self, name: str) -> "InstrumentedPipelineCache":
+            stage = f"{self._stage}/{name}" if self._stage else name
+            return InstrumentedPipelineCache(self._inner.child(name), self._stats, self._directory / name, stage)
+
+def _file_sha256(path: Path) -> Optional[str]:
+    return hashlib.sha256(path.read_bytes()).hexdigest() if path.exists() else None
+
+class IndexCache:
+    """The indexing LLM cache directory of a GraphRAG project"""
+
+    def __init__(self, cache_dir: Path, project_directory: Optional[Path] = None):
+        self.cache_dir = Path(cache_dir)
+        self.project_directory = Path(project_directory) if project_directory else self.cache_dir.parent
+        self.stats = CacheStats()
+
+    @classmethod
+    def from_config(cls, graphrag_config, project_directory: Path, cache_dir: Optional[str] = None) -> "IndexCache":
+        """Cache location: explicit override, else the GraphRAG config's file cache base_dir"""
+        base_dir = Path(cache_dir or graphrag_config.cache.base_dir or "cache")
+        if not base_dir.is_absolute():
+            base_dir = Path(project_directory) / base_dir
+        return cls(base_dir, project_directory)
+
+    def install(self, graphrag_config) -> bool:
+        """Route the config's file cache through the instrumented wrapper"""
+        if not GRAPHRAG_CACHE_AVAILABLE:
+            return False
+        cache_dir = self.cache_dir
+
+        def create_cache(**kwargs):
+            inner = CacheFactory.create_cache(
+                "file",
+                root_dir=str(cache_dir.parent),
+                kwargs={**kwargs, "type": "file", "base_dir": cache_dir.name}
+            )
+            return InstrumentedPipelineCache(inner, self.stats, cache_dir)
+
+        CacheFactory.register(INSTRUMENTED_CACHE_TYPE, create_cache)
+        graphrag_config.cache.type = INSTRUMENTED_CACHE_TYPE
+        graphrag_config.cache.base_dir = str(cache_dir)
+        return True
+
+    def _prompt_path(self, graphrag_config, stage: str) -> Optional[Path]:
+        section, attribute = STAGE_PROMPTS[stage]
+        prompt = getattr(getattr(graphrag_config, section, None), attribute, None)
+        if not prompt:
+            return None
+        path = Path(prompt)
+        return path if path.is_absolute() else self.project_directory / path
+
+    def current_prompt_hashes(self, graphrag_config) -> Dict[str, Optional[str]]:
+        hashes = {}
+        for stage in STAGE_PROMPTS:
+            path = self._prompt_path(graphrag_config, stage)
+            hashes[stage] = _file_sha256(path) if path else None
+        return hashes
+
+    def start_run(self, graphrag_config):
+        """Reset run counters and record when each stage's current prompt came into use"""
+        self.stats = CacheStats()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        recorded = self._read_json(PROMPTS_FILE)
+        now = time.time()
+        for stage, digest in self.current_prompt_hashes(graphrag_config).items():
+            if digest and recorded.get(stage, {}).get("sha256") != digest:
+                recorded[stage] = {"sha256": digest, "since": now}
+        (self.cache_dir / PROMPTS_FILE).write_text(json.dumps(recorded, indent=2))
+
+    def finish_run(self) -> Dict[str, Any]:
+        """Persist the run's hit/miss counters and return them"""
+        stats = {**self.stats.as_dict(), "finished_at": time.time()}
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        (self.cache_dir / STATS_FILE).write_text(json.dumps(stats, indent=2))
+        return stats
+
+    def _read_json(self, name: str) -> Dict[str, Any]:
+        path = self.cache_dir / name
+        try:
+            return json.loads(path.read_text()) if path.exists() else {}
+        except ValueError:
+            return {}
+
+    def _stage_dirs(self) -> List[Path]:
+        if not self.cache_dir.exists():
+            return []
+        return sorted(p for p in self.cache_dir.iterdir() if p.is_dir())
+
+    @staticmethod
+    def _entries(stage_dir: Path, before: Optional[float] = None) -> List[Path]:
+        return [
+            p for p in stage_dir.rglob("*")
+            if p.is_file() and (before is None or p.stat().st_mtime < before)
+        ]
+
+    def report(self, graphrag_config=None) -> Dict[str, Any]:
+        """Entries and bytes per stage, last run hit rate, and entries left behind by prompt changes"""
+        stages = {}
+        for stage_dir in self._stage_dirs():
+            files = self._entries(stage_dir)
+            stages[stage_dir.name] = {"entries": len(files), "bytes": sum(p.stat().st_size for p in files)}
+        stale = self.stale_prompt_stages(graphrag_config) if graphrag_config else {}
+        return {
+            "cache_dir": str(self.cache_dir),
+            "entries": sum(s["entries"] for s in stages.values()),
+            "bytes": sum(s["bytes"] for s in stages.values()),
+            "stages": stages,
+            "last_run": self._read_json(STATS_FILE) or None,
+            "stale_prompt_entries": {
+                stage: len(self._entries(self.cache_dir / stage, cutoff)) for stage, cutoff in stale.items()
+            },
+        }
+
+    def stale_prompt_stages(self, graphrag_config) -> Dict[str, float]:
+        """Stages holding entries for an outdated prompt, with the mtime cutoff below which entries are stale
+
+        Entries hit or written since the current prompt came into use have a
+        newer mtime; older ones were produced with a previous prompt version.
+        If the prompt changed after the last run, every entry is stale.
+        """
+        recorded = self._read_json(PROMPTS_FILE)
+        stale = {}
+        for stage, digest in self.current_prompt_hashes(graphrag_config).items():
+            if not digest or not (self.cache_dir / stage).exists():
+                continue
+            entry = recorded.get(stage)
+            if entry and entry.get("sha256") != digest:
+                stale[stage] = time.time()
+            elif entry and any(True for _ in self._entries(self.cache_dir / stage, entry["since"])):
+                stale[stage] = entry["since"]
+        return stale
+
+    def check_stages(self, stages: List[str]) -> None:
+        """Raise ValueError unless every stage names an existing stage directory (no paths)"""
+        known = {d.name for d in self._stage_dirs()}
+        for stage in stages:
+            if not stage or Path(stage).is_absolute() or Path(stage).name != stage or stage in (".", ".."):
+                raise ValueError(f"Invalid cache stage '{stage}'")
+            if stage not in known:
+                raise ValueError(f"Unknown cache stage '{stage}', expected one of {sorted(known)}")
+
+    def prune(self, stages: Optional[List[str]] = None, older_than_days: Optional[float] = None,
+              stale_prompts: bool = False, graphrag_config=None) -> Dict[str, Any]:
+        """Delete cache entries of whole stages, older than a given age, and/or for outdated prompts
+
+        Raises ValueError for a stage that is not a directory of this cache.
+        """
+        self.check_stages(stages or [])
+        cutoffs: Dict[str, Optional[float]] = {}
+        age_cutoff = time.time() - older_than_days * 86400 if older_than_days is not None else None
+        for stage in stages or []:
+            cutoffs[stage] = age_cutoff
+        if stages is None and age_cutoff is not None:
+            cutoffs.update({d.name: age_cutoff for d in self._stage_dirs()})
+        if stale_prompts and graphrag_config is not None:
+            for stage, cutoff in self.stale_prompt_stages(graphrag_config).items():
+                if stage not in cutoffs:
+                    cutoffs[stage] = cutoff
+                elif cutoffs[stage] is not None:
+                    cutoffs[stage] = max(cutoffs[stage], cutoff)
+
+        removed_entries, removed_bytes = 0, 0
+        for stage, cutoff in cutoffs.items():
+            stage_dir = self.cache_dir / stage
+            if not stage_dir.is_dir():
+                continue
+            for path in self._entries(stage_dir, cutoff):
+                removed_bytes += path.stat().st_size
+                path.unlink()
+                removed_entries += 1
+            if cutoff is None:
+                shutil.rmtree(stage_dir, ignore_errors=True)
+
+        return {"stages": sorted(cutoffs), "removed_entries": removed_entries, "removed_bytes": removed_bytes}
+
+def main(argv=None):
+    from api.config import settings
+    from graphrag.config.load_config import load_config
+
+    parser = argparse.ArgumentParser(description="Inspect and prune the GraphRAG indexing LLM cache")
+    parser.add_argument("--project-directory", default=settings.PROJECT_DIRECTORY)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("report", help="Show entries, size and last-run hit rate per stage")
+    prune_parser = subparsers.add_parser("prune", help="Delete cache entries")
+    prune_parser.add_argument("--stage", action="append", help="Stage to clear (repeatable)")
+    prune_parser.add_argument("--older-than-days", type=float)
+    prune_parser.add_argument("--stale-prompts", action="store_true", help="Remove entries produced with an outdated prompt")
+    args = parser.parse_args(argv)
+
+    config = load_config(Path(args.project_directory))
+    cache = IndexCache.from_config(config, Path(args.project_directory), settings.GRAPHRAG_CACHE_DIR)
+    if args.command == "report":
+        result = cache.report(config)
+    else:
+        try:
+            result = cache.prune(args.stage, args.older_than_days, args.stale_prompts, config)
+        except ValueError as e:
+            parser.error(str(e))
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
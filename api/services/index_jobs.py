@@ -0,0 +1,471 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from api.config import settings
+from api.models.schemas import IndexJob, IndexJobStatus, WorkflowProgress
+from .metering import TokenUsage, current_usage
+
+logger = logging.getLogger(__name__)
+
+# A job in one of these states owns the output directory; no other build may start
+ACTIVE_STATUSES = (IndexJobStatus.PENDING, IndexJobStatus.RUNNING, IndexJobStatus.CANCELLING)
+_ACTIVE_VALUES = tuple(status.value for status in ACTIVE_STATUSES)
+_ACTIVE_PLACEHOLDERS = ", ".join("?" * len(ACTIVE_STATUSES))
+
+class JobProgressCallbacks:
+    """GraphRAG WorkflowCallbacks that record per-workflow progress on an IndexJob
+
+    Implements the WorkflowCallbacks protocol structurally, so graphrag is not
+    imported until a build actually runs.
+    """
+
+    def __init__(self, job: IndexJob):
+        self.job = job
+        self._started: Dict[str, float] = {}
+
+    def _workflow(self, name: str) -> WorkflowProgress:
+        for workflow in self.job.workflows:
+            if workflow.name == name:
+                return workflow
+        workflow = WorkflowProgress(name=name)
+        self.job.workflows.append(workflow)
+        return workflow
+
+    def pipeline_start(self, names: List[str]) -> None:
+        self.job.workflows = [WorkflowProgress(name=name) for name in names]
+
+    def pipeline_end(self, results) -> None:
+        self.job.current_workflow = None
+
+    def workflow_start(self, name: str, instance: object) -> None:
+        workflow = self._workflow(name)
+        workflow.status = "running"
+        workflow.started_at = datetime.now().isoformat()
+        self._started[name] = time.monotonic()
+        self.job.current_workflow = name
+
+    def workflow_end(self, name: str, instance: object) -> None:
+        workflow = self._workflow(name)
+        workflow.status = "completed"
+        workflow.completed_at = datetime.now().isoformat()
+        if name in self._started:
+            workflow.elapsed_seconds = round(time.monotonic() - self._started[name], 3)
+
+    def progress(self, progress) -> None:
+        if not self.job.current_workflow:
+            return
+        workflow = self._workflow(self.job.current_workflow)
+        workflow.completed_items = getattr(progress, "completed_items", None)
+        workflow.total_items = getattr(progress, "total_items", None)
+        workflow.description = getattr(progress, "description", None)
+
+class IndexJobManager:
+    """Runs GraphRAG index builds as background jobs, one at a time
+
+    Builds run on a dedicated event loop thread so their coroutines are not
+    scheduled on the API's query event loop. With INDEX_BUILD_EXECUTOR=process
+    that thread only supervises a worker process (api.services.index_worker),
+    which keeps CPU-bound pipeline steps off the API process entirely.
+
+    Jobs are kept in memory, visible to this process only; see
+    SqliteIndexJobManager for several worker processes.
+    """
+
+    # Jobs are stored outside this process; the builds it runs report progress by heartbeat
+    shared = False
+
+    def __init__(self):
+        # Jobs whose build runs in this process (live objects updated by the build)
+        self.jobs: Dict[str, IndexJob] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._started: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _build_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            threading.Thread(target=self._loop.run_forever, name="index-build", daemon=True).start()
+        return self._loop
+
+    # Job storage (overridden by SqliteIndexJobManager)
+
+    def _claim(self, job: IndexJob) -> Optional[IndexJob]:
+        """Record a new job unless another one is active; returns the active job that blocks it"""
+        active = self.active_job()
+        if active is None:
+            self.jobs[job.job_id] = job
+        return active
+
+    def _save(self, job: IndexJob) -> None:
+        """Persist a job's current state (in memory the job object is the stored state)"""
+
+    def _load(self, job_id: str) -> Optional[IndexJob]:
+        return self.jobs.get(job_id)
+
+    def _load_all(self) -> List[IndexJob]:
+        return list(self.jobs.values())
+
+    def _request_cancel(self, job_id: str) -> Optional[IndexJob]:
+        """Ask the process running a job to cancel it; None if there is no such job"""
+        return None
+
+    def _cancel_requested(self, job_id: str) -> bool:
+        return False
+
+    def active_job(self) -> Optional[IndexJob]:
+        """The pending, running or still cancelling job, if any"""
+        for job in self._load_all():
+            if job.status in ACTIVE_STATUSES:
+                return job
+        return None
+
+    def is_servable(self, output_version: str) -> bool:
+        """Whether output at this version may be loaded
+
+        Not while a build is active. Once builds have run through the API,
+        only the output of the latest completed one: a failed or cancelled
+        build leaves partial output behind.
+        """
+        jobs = self._load_all()
+        if not jobs:
+            return True
+        if any(job.status in ACTIVE_STATUSES for job in jobs):
+            return False
+        completed = [job for job in jobs if job.status == IndexJobStatus.COMPLETED]
+        return bool(completed) and completed[-1].output_version == output_version
+
+    def start_job(self, graphrag_client, incremental: bool = False, resumed_from: Optional[str] = None) -> IndexJob:
+        """Start a build; raises RuntimeError if one is already in progress"""
+        with self._lock:
+            job = IndexJob(
+                job_id=str(uuid.uuid4()),
+                status=IndexJobStatus.PENDING,
+                incremental=incremental,
+                resumed_from=resumed_from,
+                created_at=datetime.now().isoformat()
+            )
+            active = self._claim(job)
+            if active:
+                raise RuntimeError(f"Index build {active.job_id} is already {active.status.value}")
+            self.jobs[job.job_id] = job
+            self._build_loop().call_soon_threadsafe(self._schedule, job, graphrag_client)
+        return job
+
+    def _schedule(self, job: IndexJob, graphrag_client) -> None:
+        """Create the build task (on the build loop)"""
+        task = self._loop.create_task(self._run(job, graphrag_client))
+        stopped = threading.Event()
+        # Fires once the build has exited, including a job cancelled before its build started
+        task.add_done_callback(lambda _: self._finished(job, stopped))
+        self._tasks[job.job_id] = task
+        if self.shared:
+            # A thread of its own, so a build holding the build loop can't stall the heartbeat
+            threading.Thread(target=self._heartbeat, args=(job, stopped), name="index-job-heartbeat", daemon=True).start()
+
+    def _heartbeat(self, job: IndexJob, stopped: threading.Event) -> None:
+        """Save the job's progress and pick up cancellations requested through other processes"""
+        while not stopped.wait(settings.INDEX_JOB_HEARTBEAT_SECONDS):
+            try:
+                if job.status in (IndexJobStatus.PENDING, IndexJobStatus.RUNNING) and self._cancel_requested(job.job_id):
+                    job.status = IndexJobStatus.CANCELLING
+                    self._loop.call_soon_threadsafe(self._tasks[job.job_id].cancel)
+                self._save(job)
+            except sqlite3.Error as e:
+                logger.warning(f"Could not save index build {job.job_id}: {e}")
+
+    def _finished(self, job: IndexJob, stopped: threading.Event) -> None:
+        stopped.set()
+        self._cancelled(job)
+        try:
+            self._save(job)
+        except sqlite3.Error as e:
+            logger.error(f"Could not save finished index build {job.job_id}: {e}")
+
+    def resume_job(self, job_id: str, graphrag_client) -> IndexJob:
+        """Re-run a failed or cancelled build; finished LLM calls are served from the indexing cache"""
+        job = self.get_job(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        if job.status not in (IndexJobStatus.FAILED, IndexJobStatus.CANCELLED):
+            raise RuntimeError(f"Only failed or cancelled jobs can be resumed (job is {job.status.value})")
+        return self.start_job(graphrag_client, incremental=job.incremental, resumed_from=job_id)
+
+    def cancel_job(self, job_id: str) -> IndexJob:
+        """Ask a pending or running build to stop
+
+        The job stays CANCELLING (and blocks new builds) until the build has
+        actually exited; only then is it marked CANCELLED.
+        """
+        job = self.jobs.get(job_id)
+        if job is None:
+            # Running in another worker process, which picks the request up on its next heartbeat
+            job = self._request_cancel(job_id)
+            if job is None:
+                raise KeyError(job_id)
+            return job
+        if job.status in (IndexJobStatus.PENDING, IndexJobStatus.RUNNING):
+            job.status = IndexJobStatus.CANCELLING
+            self._save(job)
+            # Queued after the job's _schedule, so its task exists by then
+            self._loop.call_soon_threadsafe(lambda: self._tasks[job_id].cancel())
+        return job
+
+    @staticmethod
+    def _cancelled(job: IndexJob) -> None:
+        if job.status == IndexJobStatus.CANCELLING:
+            job.status = IndexJobStatus.CANCELLED
+            job.completed_at = job.completed_at or datetime.now().isoformat()
+
+    def get_job(self, job_id: str) -> Optional[IndexJob]:
+        job = self.jobs.get(job_id) or self._load(job_id)
+        if job is not None:
+            self._update_elapsed(job)
+        return job
+
+    def list_jobs(self) -> List[IndexJob]:
+        jobs = [self.jobs.get(job.job_id, job) for job in self._load_all()]
+        for job in jobs:
+            self._update_elapsed(job)
+        return jobs
+
+    def _update_elapsed(self, job: IndexJob) -> None:
+        if job.status not in ACTIVE_STATUSES:
+            return
+        if job.job_id in self._started:
+            job.elapsed_seconds = round(time.monotonic() - self._started[job.job_id], 3)
+        elif job.started_at:
+            job.elapsed_seconds = round((datetime.now() - datetime.fromisoformat(job.started_at)).total_seconds(), 3)
+
+    def _start(self, job: IndexJob) -> None:
+        if job.status == IndexJobStatus.PENDING:
+            job.status = IndexJobStatus.RUNNING
+        job.started_at = datetime.now().isoformat()
+        self._started[job.job_id] = time.monotonic()
+        self._save(job)
+
+    async def _run(self, job: IndexJob, graphrag_client):
+        if settings.INDEX_BUILD_EXECUTOR == "process":
+            return await self._run_process(job, graphrag_client)
+        self._start(job)
+        usage = TokenUsage()
+        token = current_usage.set(usage)
+        try:
+            result = await graphrag_client.build_index(
+                incremental=job.incremental,
+                callbacks=[JobProgressCallbacks(job)]
+            )
+            job.result = result
+            if "error" in result or not result.get("success", False):
+                job.status = IndexJobStatus.FAILED
+                job.error = result.get("error") or "; ".join(result.get("errors", []))
+            else:
+                job.status = IndexJobStatus.COMPLETED
+                job.output_version = graphrag_client.output_version()
+        except asyncio.CancelledError:
+            job.status = IndexJobStatus.CANCELLED
+            logger.info(f"Index build {job.job_id} cancelled")
+        except Exception as e:
+            logger.error(f"Index build {job.job_id} failed: {e}")
+            job.status = IndexJobStatus.FAILED
+            job.error = str(e)
+        finally:
+            current_usage.reset(token)
+            job.token_usage = usage.as_dict()
+            job.current_workflow = None
+            job.completed_at = job.completed_at or datetime.now().isoformat()
+            job.elapsed_seconds = round(time.monotonic() - self._started[job.job_id], 3)
+
+    @staticmethod
+    def _sync_from_status_file(job: IndexJob, status_file: Path) -> Optional[IndexJob]:
+        try:
+            state = IndexJob.model_validate_json(status_file.read_text())
+        except (OSError, ValueError):
+            return None
+        job.workflows = state.workflows
+        job.current_workflow = state.current_workflow
+        job.token_usage = state.token_usage
+        return state
+
+    async def _run_process(self, job: IndexJob, graphrag_client):
+        """Build in a worker process, mirror its status file, then hot-swap the new output"""
+        status_file = graphrag_client.project_directory / "index_jobs" / f"{job.job_id}.json"
+        status_file.parent.mkdir(parents=True, exist_ok=True)
+        command = [
+            sys.executable, "-m", "api.services.index_worker",
+            "--job-id", job.job_id,
+            "--status-file", str(status_file),
+            "--project-directory", str(graphrag_client.project_directory),
+        ]
+        if job.incremental:
+            command.append("--incremental")
+        if job.resumed_from:
+            command += ["--resumed-from", job.resumed_from]
+
+        self._start(job)
+        process = subprocess.Popen(command)
+        logger.info(f"Index build {job.job_id} running in worker process {process.pid}")
+        try:
+            while process.poll() is None:
+                await asyncio.sleep(settings.INDEX_WORKER_POLL_SECONDS)
+                self._sync_from_status_file(job, status_file)
+
+            state = self._sync_from_status_file(job, status_file)
+            if state is not None and state.status == IndexJobStatus.COMPLETED:
+                # The only work left in the API process: swap in the new tables
+                graphrag_client.reload_output()
+                job.result = state.result
+                job.status = IndexJobStatus.COMPLETED
+                job.output_version = graphrag_client.output_version()
+            else:
+                job.result = state.result if state else None
+                job.status = IndexJobStatus.FAILED
+                job.error = (state.error if state else None) or f"Index worker exited with code {process.returncode}"
+        except asyncio.CancelledError:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+            job.status = IndexJobStatus.CANCELLED
+            logger.info(f"Index build {job.job_id} cancelled; worker process {process.pid} terminated")
+        except Exception as e:
+            logger.error(f"Index build {job.job_id} failed: {e}")
+            job.status = IndexJobStatus.FAILED
+            job.error = str(e)
+        finally:
+            job.current_workflow = None
+            job.completed_at = job.completed_at or datetime.now().isoformat()
+            job.elapsed_seconds = round(time.monotonic() - self._started[job.job_id], 3)
+
+class SqliteIndexJobManager(IndexJobManager):
+    """Index jobs in a SQLite file shared by every worker process on the host
+
+    Any worker can report on or cancel a job, whichever worker runs it. The
+    jobs table doubles as the build lock: a job is only recorded, in a write
+    transaction, when no other job is active, so two workers never build into
+    the same output directory. The worker running a build saves its progress
+    every INDEX_JOB_HEARTBEAT_SECONDS; an active job whose worker has been
+    silent for INDEX_JOB_STALE_SECONDS (it died) is marked failed.
+    """
+
+    shared = True
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS index_jobs ("
+            "job_id TEXT PRIMARY KEY, status TEXT NOT NULL, data TEXT NOT NULL, created_at TEXT NOT NULL, "
+            "heartbeat_at REAL NOT NULL, cancel_requested INTEGER NOT NULL DEFAULT 0)"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread and process: forked workers must not reuse the master's
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _expire_stale(self, conn: sqlite3.Connection) -> None:
+        """Fail active jobs whose worker stopped sending heartbeats"""
+        cutoff = time.time() - settings.INDEX_JOB_STALE_SECONDS
+        rows = conn.execute(
+            f"SELECT data FROM index_jobs WHERE status IN ({_ACTIVE_PLACEHOLDERS}) AND heartbeat_at < ?",
+            (*_ACTIVE_VALUES, cutoff)
+        ).fetchall()
+        for (data,) in rows:
+            job = IndexJob.model_validate_json(data)
+            if job.job_id in self.jobs:
+                continue
+            job.status = IndexJobStatus.FAILED
+            job.error = "The worker process running this build stopped"
+            job.completed_at = datetime.now().isoformat()
+            conn.execute("UPDATE index_jobs SET status = ?, data = ? WHERE job_id = ?",
+                         (job.status.value, job.model_dump_json(), job.job_id))
+            logger.warning(f"Index build {job.job_id} marked failed: no heartbeat from its worker")
+
+    def _claim(self, job: IndexJob) -> Optional[IndexJob]:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._expire_stale(conn)
+            row = conn.execute(
+                f"SELECT data FROM index_jobs WHERE status IN ({_ACTIVE_PLACEHOLDERS}) LIMIT 1", _ACTIVE_VALUES
+            ).fetchone()
+            if row is None:
+                conn.execute(
+                    "INSERT INTO index_jobs (job_id, status, data, created_at, heartbeat_at) VALUES (?, ?, ?, ?, ?)",
+                    (job.job_id, job.status.value, job.model_dump_json(), job.created_at, time.time())
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return IndexJob.model_validate_json(row[0]) if row else None
+
+    def _save(self, job: IndexJob) -> None:
+        self._connect().execute(
+            "UPDATE index_jobs SET status = ?, data = ?, heartbeat_at = ? WHERE job_id = ?",
+            (job.status.value, job.model_dump_json(), time.time(), job.job_id)
+        )
+
+    def _load(self, job_id: str) -> Optional[IndexJob]:
+        conn = self._connect()
+        self._expire_stale(conn)
+        row = conn.execute("SELECT data FROM index_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return IndexJob.model_validate_json(row[0]) if row else None
+
+    def _load_all(self) -> List[IndexJob]:
+        conn = self._connect()
+        self._expire_stale(conn)
+        rows = conn.execute("SELECT data FROM index_jobs ORDER BY created_at").fetchall()
+        return [IndexJob.model_validate_json(data) for (data,) in rows]
+
+    def _request_cancel(self, job_id: str) -> Optional[IndexJob]:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT data FROM index_jobs WHERE job_id = ?", (job_id,)).fetchone()
+            job = IndexJob.model_validate_json(row[0]) if row else None
+            if job is not None and job.status in (IndexJobStatus.PENDING, IndexJobStatus.RUNNING):
+                job.status = IndexJobStatus.CANCELLING
+                conn.execute(
+                    "UPDATE index_jobs SET status = ?, data = ?, cancel_requested = 1 WHERE job_id = ?",
+                    (job.status.value, job.model_dump_json(), job_id)
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return job
+
+    def _cancel_requested(self, job_id: str) -> bool:
+        row = self._connect().execute("SELECT cancel_requested FROM index_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+def create_index_job_manager() -> IndexJobManager:
+    """In-memory jobs for a single worker, SQLite when every worker must see them and share the build lock"""
+    store = settings.TASK_STORE or ("sqlite" if settings.WORKERS > 1 else "memory")
+    if store == "sqlite":
+        return SqliteIndexJobManager(str(Path(settings.SHARED_STATE_DIR) / "index_jobs.sqlite3"))
+    return IndexJobManager()
+
+# Global index job manager instance
+index_job_manager = create_index_job_manager()
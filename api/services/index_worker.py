@@ -0,0 +1,116 @@
+"""
+Out-of-process GraphRAG index build.
+
+Runs one build in its own process so graph clustering, embedding and parquet
+writes never hold the API's event loop or GIL. Progress is written as an
+IndexJob JSON document to a status file after every pipeline event; the API
+polls that file and reloads the output once the build has finished.
+
+Usage:
+    python -m api.services.index_worker --job-id <id> --status-file index_jobs/<id>.json [--incremental]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from api.models.schemas import IndexJob, IndexJobStatus
+from .index_jobs import JobProgressCallbacks
+from .metering import TokenUsage, current_usage
+
+logger = logging.getLogger(__name__)
+
+def write_status(job: IndexJob, status_file: Path) -> None:
+    """Atomically replace the status file with the job's current state"""
+    tmp = status_file.with_suffix(".tmp")
+    tmp.write_text(job.model_dump_json(indent=2))
+    os.replace(tmp, status_file)
+
+class StatusFileCallbacks(JobProgressCallbacks):
+    """JobProgressCallbacks that persist the job after every pipeline event"""
+
+    def __init__(self, job: IndexJob, status_file: Path, usage: TokenUsage):
+        super().__init__(job)
+        self.status_file = status_file
+        self.usage = usage
+
+    def _write(self):
+        self.job.token_usage = self.usage.as_dict()
+        write_status(self.job, self.status_file)
+
+    def pipeline_start(self, names):
+        super().pipeline_start(names)
+        self._write()
+
+    def workflow_start(self, name, instance):
+        super().workflow_start(name, instance)
+        self._write()
+
+    def workflow_end(self, name, instance):
+        super().workflow_end(name, instance)
+        self._write()
+
+    def progress(self, progress):
+        super().progress(progress)
+        self._write()
+
+async def run_build(job: IndexJob, status_file: Path, project_directory: str) -> IndexJob:
+    from .graphrag_client import GraphRAGClient
+
+    usage = TokenUsage()
+    current_usage.set(usage)
+    job.status = IndexJobStatus.RUNNING
+    job.started_at = datetime.now().isoformat()
+    write_status(job, status_file)
+    try:
+        # Build-only: the API process loads the new output once the build has finished
+        client = GraphRAGClient(project_directory, load_output=False)
+        result = await client.build_index(
+            incremental=job.incremental,
+            callbacks=[StatusFileCallbacks(job, status_file, usage)]
+        )
+        job.result = result
+        if "error" in result or not result.get("success", False):
+            job.status = IndexJobStatus.FAILED
+            job.error = result.get("error") or "; ".join(result.get("errors", []))
+        else:
+            job.status = IndexJobStatus.COMPLETED
+    except Exception as e:
+        logger.error(f"Index build {job.job_id} failed: {e}")
+        job.status = IndexJobStatus.FAILED
+        job.error = str(e)
+    job.token_usage = usage.as_dict()
+    job.current_workflow = None
+    job.completed_at = datetime.now().isoformat()
+    write_status(job, status_file)
+    return job
+
+def main(argv=None) -> int:
+    from api.config import settings
+
+    parser = argparse.ArgumentParser(description="Run a GraphRAG index build in a worker process")
+    parser.add_argument("--job-id", required=True)
+    parser.add_argument("--status-file", required=True)
+    parser.add_argument("--project-directory", default=settings.PROJECT_DIRECTORY)
+    parser.add_argument("--incremental", action="store_true")
+    parser.add_argument("--resumed-from")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    status_file = Path(args.status_file)
+    status_file.parent.mkdir(parents=True, exist_ok=True)
+    job = IndexJob(
+        job_id=args.job_id,
+        status=IndexJobStatus.PENDING,
+        incremental=args.incremental,
+        resumed_from=args.resumed_from,
+        created_at=datetime.now().isoformat()
+    )
+    job = asyncio.run(run_build(job, status_file, args.project_directory))
+    return 0 if job.status == IndexJobStatus.COMPLETED else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
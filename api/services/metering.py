@@ -0,0 +1,111 @@
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from .metrics import metrics
+from .tokens import count_tokens
+
+logger = logging.getLogger(__name__)
+
+METERED_PREFIX = "metered:"
+
+class TokenUsage:
+    """Prompt/completion token totals and call counts per GraphRAG model"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.models: Dict[str, Dict[str, int]] = {}
+
+    def add(self, model: str, prompt_tokens: int, completion_tokens: int):
+        with self._lock:
+            usage = self.models.setdefault(model, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+            usage["calls"] += 1
+            usage["prompt_tokens"] += prompt_tokens
+            usage["completion_tokens"] += completion_tokens
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            models = {name: dict(usage) for name, usage in self.models.items()}
+        return {
+            "calls": sum(u["calls"] for u in models.values()),
+            "prompt_tokens": sum(u["prompt_tokens"] for u in models.values()),
+            "completion_tokens": sum(u["completion_tokens"] for u in models.values()),
+            "models": models,
+        }
+
+# Usage collector of the job or search running in the current context
+current_usage: ContextVar[Optional[TokenUsage]] = ContextVar("current_usage", default=None)
+
+@contextmanager
+def metered_usage():
+    """Collect the token usage of the model calls made inside this block"""
+    usage = TokenUsage()
+    token = current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        current_usage.reset(token)
+
+def _prompt_text(prompt: str, history: Optional[list]) -> str:
+    parts = [str(message.get("content", "")) if isinstance(message, dict) else str(message) for message in history or []]
+    return "\n".join(parts + [prompt])
+
+def record_usage(model: str, prompt: str, history: Optional[list], completion: str):
+    """Count tokens of one LLM call into metrics and the current job, if any"""
+    prompt_tokens = count_tokens(_prompt_text(prompt, history))
+    completion_tokens = count_tokens(completion or "")
+    metrics.inc("rag_llm_tokens_total", prompt_tokens, help="Tokens per GraphRAG model call", model=model, kind="prompt")
+    metrics.inc("rag_llm_tokens_total", completion_tokens, help="Tokens per GraphRAG model call", model=model, kind="completion")
+    usage = current_usage.get()
+    if usage is not None:
+        usage.add(model, prompt_tokens, completion_tokens)
+
+class MeteredChatModel:
+    """GraphRAG ChatModel wrapper that records token usage of every call"""
+
+    def __init__(self, inner, name: str):
+        self.inner = inner
+        self.name = name
+        self.config = getattr(inner, "config", None)
+
+    async def achat(self, prompt: str, history: Optional[list] = None, **kwargs):
+        response = await self.inner.achat(prompt, history, **kwargs)
+        record_usage(self.name, prompt, history, response.output.content)
+        return response
+
+    async def achat_stream(self, prompt: str, history: Optional[list] = None, **kwargs):
+        chunks = []
+        async for chunk in self.inner.achat_stream(prompt, history, **kwargs):
+            chunks.append(chunk or "")
+            yield chunk
+        record_usage(self.name, prompt, history, "".join(chunks))
+
+    def chat(self, prompt: str, history: Optional[list] = None, **kwargs):
+        response = self.inner.chat(prompt, history, **kwargs)
+        record_usage(self.name, prompt, history, response.output.content)
+        return response
+
+    def chat_stream(self, prompt: str, history: Optional[list] = None, **kwargs):
+        chunks = []
+        for chunk in self.inner.chat_stream(prompt, history, **kwargs):
+            chunks.append(chunk or "")
+            yield chunk
+        record_usage(self.name, prompt, history, "".join(chunks))
+
+def install_metering(graphrag_config) -> None:
+    """Wrap every chat model of a GraphRAG config in MeteredChatModel"""
+    from graphrag.language_model.factory import ModelFactory
+
+    for model_id, model_config in graphrag_config.models.items():
+        model_type = str(getattr(model_config.type, "value", model_config.type))
+        if "embedding" in model_type.lower() or model_type.startswith(METERED_PREFIX):
+            continue
+        metered_type = f"{METERED_PREFIX}{model_type}"
+        if not ModelFactory.is_supported_chat_model(metered_type):
+            def create(inner_type=model_type, **kwargs):
+                inner = ModelFactory.create_chat_model(inner_type, **kwargs)
+                return MeteredChatModel(inner, kwargs.get("name", inner_type))
+            ModelFactory.register_chat(metered_type, create)
+        model_config.type = metered_type
@@ -0,0 +1,245 @@
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# OpenTelemetry is optional: spans are no-ops unless the package (and an SDK) is installed
+try:
+    from opentelemetry import trace
+    tracer = trace.get_tracer("rag-api")
+    OTEL_AVAILABLE = True
+except ImportError:
+    tracer = None
+    OTEL_AVAILABLE = False
+
+# Histogram buckets in milliseconds, from sub-millisecond lookups to multi-minute global searches
+DEFAULT_BUCKETS_MS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(key) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+def _to_snapshot(helps: Dict[str, str], counters: Dict[str, Dict[LabelKey, float]],
+                 histograms: Dict[str, Dict[LabelKey, List[float]]]) -> Dict[str, Any]:
+    return {
+        "help": helps,
+        "counters": {name: [[key, value] for key, value in series.items()] for name, series in counters.items()},
+        "histograms": {name: [[key, state] for key, state in series.items()] for name, series in histograms.items()},
+    }
+
+def _merge_snapshot(helps: Dict[str, str], counters: Dict[str, Dict[LabelKey, float]],
+                    histograms: Dict[str, Dict[LabelKey, List[float]]], snapshot: Dict[str, Any]) -> None:
+    """Add a snapshot's counters and histogram states to the given series (in place)"""
+    for name, help in snapshot.get("help", {}).items():
+        helps.setdefault(name, help)
+    for name, series in snapshot.get("counters", {}).items():
+        target = counters.setdefault(name, {})
+        for key, value in series:
+            key = tuple(tuple(pair) for pair in key)
+            target[key] = target.get(key, 0.0) + value
+    for name, series in snapshot.get("histograms", {}).items():
+        target = histograms.setdefault(name, {})
+        for key, state in series:
+            key = tuple(tuple(pair) for pair in key)
+            current = target.get(key)
+            target[key] = list(state) if current is None else [a + b for a, b in zip(current, state)]
+
+class MetricsRegistry:
+    """Thread-safe in-process counters, gauges and histograms rendered in Prometheus text format"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS_MS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._help: Dict[str, str] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, List[float]]] = {}
+        self._gauges: Dict[str, Callable[[], Dict[LabelKey, float]]] = {}
+
+    def inc(self, name: str, value: float = 1.0, help: str = "", **labels):
+        """Increment a counter"""
+        key = _label_key(labels)
+        with self._lock:
+            self._help.setdefault(name, help)
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, help: str = "", **labels):
+        """Record one histogram observation"""
+        key = _label_key(labels)
+        with self._lock:
+            self._help.setdefault(name, help)
+            series = self._histograms.setdefault(name, {})
+            # Layout: one count per bucket, then +Inf count, sum
+            state = series.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            state[bisect_left(self.buckets, value)] += 1
+            state[-1] += value
+
+    def register_gauge(self, name: str, callback: Callable[[], Dict[str, float]], label: str, help: str = ""):
+        """Register a gauge whose values (one per `label` value) are read at scrape time"""
+        def collect() -> Dict[LabelKey, float]:
+            return {((label, str(k)),): float(v) for k, v in callback().items()}
+        with self._lock:
+            self._help[name] = help
+            self._gauges[name] = collect
+
+    def get_counter(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_label_key(labels), 0.0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters and histograms as JSON-ready data, to be added up across worker processes"""
+        with self._lock:
+            return _to_snapshot(
+                dict(self._help),
+                {name: dict(series) for name, series in self._counters.items()},
+                {name: {k: list(v) for k, v in series.items()} for name, series in self._histograms.items()},
+            )
+
+    def render(self, snapshots: Iterable[Dict[str, Any]] = ()) -> str:
+        """Prometheus text exposition format (version 0.0.4), adding in other processes' snapshots"""
+        lines: List[str] = []
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {name: {k: list(v) for k, v in series.items()} for name, series in self._histograms.items()}
+            gauges = dict(self._gauges)
+            helps = dict(self._help)
+        for snapshot in snapshots:
+            _merge_snapshot(helps, counters, histograms, snapshot)
+
+        for name, series in sorted(counters.items()):
+            lines += [f"# HELP {name} {helps.get(name, '')}", f"# TYPE {name} counter"]
+            lines += [f"{name}{_format_labels(key)} {value}" for key, value in sorted(series.items())]
+
+        for name, collect in sorted(gauges.items()):
+            try:
+                series = collect()
+            except Exception as e:
+                logger.warning(f"Gauge {name} failed: {e}")
+                continue
+            lines += [f"# HELP {name} {helps.get(name, '')}", f"# TYPE {name} gauge"]
+            lines += [f"{name}{_format_labels(key)} {value}" for key, value in sorted(series.items())]
+
+        for name, series in sorted(histograms.items()):
+            lines += [f"# HELP {name} {helps.get(name, '')}", f"# TYPE {name} histogram"]
+            for key, state in sorted(series.items()):
+                cumulative = 0.0
+                for bound, count in zip(self.buckets, state):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(key, ('le', str(bound)))} {cumulative}")
+                cumulative += state[len(self.buckets)]
+                lines.append(f"{name}_bucket{_format_labels(key, ('le', '+Inf'))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(key)} {state[-1]}")
+                lines.append(f"{name}_count{_format_labels(key)} {cumulative}")
+
+        return "\n".join(lines) + "\n"
+
+class MultiprocessMetrics:
+    """Counters and histograms of every worker process, for a scrape served by any one of them
+
+    Each worker writes a snapshot of its registry to `directory` every few
+    seconds; a scrape adds the other workers' snapshots to its own live
+    values. Snapshots of exited workers are folded into one archive file
+    (gunicorn child_exit), so counters never go backwards. Gauges are read
+    from the scraped worker only.
+    """
+
+    ARCHIVE_FILE = "archive.json"
+
+    def __init__(self, directory: Path, registry: MetricsRegistry):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.registry = registry
+
+    def _path(self, pid: int) -> Path:
+        return self.directory / f"{pid}.json"
+
+    def _write(self, path: Path, snapshot: Dict[str, Any]) -> None:
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(snapshot))
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _read(path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def write(self) -> None:
+        """Save this process's snapshot"""
+        self._write(self._path(os.getpid()), self.registry.snapshot())
+
+    def others(self) -> List[Dict[str, Any]]:
+        """Snapshots of the other (live and exited) worker processes"""
+        own = self._path(os.getpid())
+        snapshots = (self._read(path) for path in sorted(self.directory.glob("*.json")) if path != own)
+        return [snapshot for snapshot in snapshots if snapshot is not None]
+
+    def archive(self, pid: int) -> None:
+        """Fold an exited worker's snapshot into the archive"""
+        path = self._path(pid)
+        snapshot = self._read(path)
+        if snapshot is None:
+            return
+        helps, counters, histograms = {}, {}, {}
+        for part in (self._read(self.directory / self.ARCHIVE_FILE), snapshot):
+            if part is not None:
+                _merge_snapshot(helps, counters, histograms, part)
+        self._write(self.directory / self.ARCHIVE_FILE, _to_snapshot(helps, counters, histograms))
+        path.unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        """Drop every snapshot (a new server starts counting from zero)"""
+        for path in self.directory.glob("*.json"):
+            path.unlink(missing_ok=True)
+
+    def start(self, interval: float) -> None:
+        """Write this process's snapshot every `interval` seconds from a daemon thread"""
+        def flush():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.write()
+                except OSError as e:
+                    logger.warning(f"Could not write metrics snapshot: {e}")
+        threading.Thread(target=flush, name="metrics-snapshot", daemon=True).start()
+
+def create_multiprocess_metrics() -> Optional[MultiprocessMetrics]:
+    """Snapshot sharing for multi-worker deployments (WORKERS > 1), None for a single process"""
+    from api.config import settings
+
+    if settings.WORKERS <= 1:
+        return None
+    return MultiprocessMetrics(Path(settings.SHARED_STATE_DIR) / "metrics", metrics)
+
+def record_span(name: str, start: float, end: float, **attributes):
+    """Emit an OpenTelemetry span for an interval measured with time.perf_counter()"""
+    if not OTEL_AVAILABLE:
+        return
+    # Translate perf_counter timestamps onto the wall clock OpenTelemetry expects
+    offset_ns = time.time_ns() - int(time.perf_counter() * 1e9)
+    span = tracer.start_span(
+        name,
+        start_time=int(start * 1e9) + offset_ns,
+        attributes={k: str(v) for k, v in attributes.items() if v is not None}
+    )
+    span.end(end_time=int(end * 1e9) + offset_ns)
+
+# Global metrics registry
+metrics = MetricsRegistry()
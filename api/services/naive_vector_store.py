@@ -0,0 +1,150 @@
+"""
+In-process vector store for naive RAG chunks.
+
+Chunk embeddings live in a memory-mapped MmapVectorIndex (exact, vectorised
+top-k) and chunk texts in documents.json next to it. NumpyCollection answers the
+subset of the Chroma collection API that TraditionalRAGClient uses (query, peek,
+count), so retrieval code is the same for both backends.
+
+Exports can also store int8 / binary codes of the embeddings; with
+NAIVE_RAG_QUANTIZATION set, queries scan those and rescore the best candidates
+at full precision.
+
+Usage:
+    python -m api.services.naive_vector_store export --chroma-db-path ./rag/chromadb --out ./rag/numpy_index
+    python -m api.services.naive_vector_store export --quantize int8 --quantize binary
+"""
+import argparse
+import importlib.util
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .vector_index import QUANTIZATIONS, VECTORS_FILE, MmapVectorIndex
+
+logger = logging.getLogger(__name__)
+
+DOCUMENTS_FILE = "documents.json"
+
+class NumpyCollection:
+    """Chroma-compatible read-only collection over an MmapVectorIndex and its chunk texts"""
+
+    def __init__(self, index: MmapVectorIndex, documents: Dict[str, str]):
+        self.index = index
+        self.documents = documents
+        self.metadata = {"hnsw:space": "cosine"}
+
+    @classmethod
+    def load(cls, directory: Path, quantization: Optional[str] = None, rescore_multiplier: int = 4) -> "NumpyCollection":
+        directory = Path(directory)
+        index = MmapVectorIndex.load(directory, quantization=quantization, rescore_multiplier=rescore_multiplier)
+        documents = json.loads((directory / DOCUMENTS_FILE).read_text(encoding="utf-8"))
+        return cls(index, documents)
+
+    @staticmethod
+    def save(directory: Path, ids: Sequence[str], embeddings, documents: Sequence[str],
+             quantizations: Sequence[str] = ()) -> None:
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        # Documents first: the index's vectors.npy is written last and marks a complete export
+        tmp_path = directory / f"{DOCUMENTS_FILE}.{os.getpid()}.tmp"
+        tmp_path.write_text(json.dumps(dict(zip(ids, documents))), encoding="utf-8")
+        os.replace(tmp_path, directory / DOCUMENTS_FILE)
+        MmapVectorIndex.save(directory, ids, embeddings, quantizations)
+
+    @staticmethod
+    def exists(directory: Path) -> bool:
+        return MmapVectorIndex.exists(directory) and (Path(directory) / DOCUMENTS_FILE).exists()
+
+    def query(self, query_embeddings: List[List[float]], n_results: int = 10, **kwargs) -> Dict[str, List]:
+        """Top-k per query embedding, shaped like chromadb QueryResult (cosine distances)"""
+        result = {"ids": [], "documents": [], "distances": []}
+        for embedding in query_embeddings:
+            hits = self.index.search(embedding, n_results)
+            result["ids"].append([doc_id for doc_id, _ in hits])
+            result["documents"].append([self.documents.get(doc_id, "") for doc_id, _ in hits])
+            result["distances"].append([1.0 - score for _, score in hits])
+        return result
+
+    def peek(self, limit: int = 10) -> Dict[str, List]:
+        ids = self.index.ids[:limit]
+        return {
+            "ids": ids,
+            "documents": [self.documents.get(doc_id, "") for doc_id in ids],
+            "embeddings": np.asarray(self.index.vectors[:len(ids)]),
+        }
+
+    def count(self) -> int:
+        return len(self.index)
+
+def export_chroma_collection(chroma_db_path: str, collection_name: str, directory: Path,
+                             quantizations: Sequence[str] = (), page_size: int = 1000) -> int:
+    """Copy a Chroma collection's embeddings and documents into a NumpyCollection directory"""
+    import chromadb
+
+    collection = chromadb.PersistentClient(path=chroma_db_path).get_collection(name=collection_name)
+    ids: List[str] = []
+    embeddings: List = []
+    documents: List[str] = []
+    offset = 0
+    while True:
+        page = collection.get(include=["embeddings", "documents"], limit=page_size, offset=offset)
+        if not page["ids"]:
+            break
+        ids.extend(page["ids"])
+        embeddings.extend(page["embeddings"])
+        documents.extend(doc or "" for doc in page["documents"])
+        offset += len(page["ids"])
+    if not ids:
+        raise ValueError(f"Collection '{collection_name}' is empty")
+    NumpyCollection.save(directory, ids, np.asarray(embeddings, dtype=np.float32), documents, quantizations)
+    return len(ids)
+
+def _newest_mtime(path: Path) -> float:
+    """Latest modification time of any file below path (0 if there are none)"""
+    mtimes = [p.stat().st_mtime for p in path.rglob("*") if p.is_file()] if path.is_dir() else []
+    return max(mtimes, default=0.0)
+
+def is_stale(directory: Path, chroma_db_path: str) -> bool:
+    """No export yet, or the Chroma store was written to after the export"""
+    if not NumpyCollection.exists(directory):
+        return True
+    return _newest_mtime(Path(chroma_db_path)) > (Path(directory) / VECTORS_FILE).stat().st_mtime
+
+def load_collection(directory: Path, chroma_db_path: Optional[str] = None, collection_name: str = "collection",
+                    quantization: Optional[str] = None, rescore_multiplier: int = 4) -> NumpyCollection:
+    """Open the NumPy collection, exporting it from Chroma first if it is missing or older than the Chroma store
+
+    Without chromadb installed an existing export is served as it is.
+    """
+    if chroma_db_path and is_stale(directory, chroma_db_path):
+        if importlib.util.find_spec("chromadb") is None and NumpyCollection.exists(directory):
+            logger.warning(f"chromadb is not installed; serving {directory} without re-exporting {chroma_db_path}")
+            return NumpyCollection.load(directory, quantization, rescore_multiplier)
+        quantizations = [quantization] if quantization else []
+        count = export_chroma_collection(chroma_db_path, collection_name, directory, quantizations)
+        logger.info(f"Exported {count} chunks from Chroma to {directory}")
+    return NumpyCollection.load(directory, quantization, rescore_multiplier)
+
+def main(argv=None):
+    from api.config import settings
+
+    parser = argparse.ArgumentParser(description="Manage the NumPy naive RAG vector store")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="Export the Chroma collection")
+    export_parser.add_argument("--chroma-db-path", default=settings.CHROMA_DB_PATH)
+    export_parser.add_argument("--collection", default="collection")
+    export_parser.add_argument("--out", type=Path, default=Path(settings.NAIVE_RAG_INDEX_DIR))
+    export_parser.add_argument("--quantize", action="append", choices=QUANTIZATIONS, default=[],
+                               help="Also store quantized codes for the first-pass scan (repeatable)")
+    args = parser.parse_args(argv)
+
+    count = export_chroma_collection(args.chroma_db_path, args.collection, args.out, args.quantize)
+    print(f"Exported {count} chunks to {args.out}")
+
+if __name__ == "__main__":
+    main()
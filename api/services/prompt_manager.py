@@ -0,0 +1,197 @@
+"""
+Few-shot example trimming for the GraphRAG graph extraction prompt.
+
+preprocessing/prompts/extract_graph.txt is mostly worked examples and is sent
+with every text unit, so it dominates indexing tokens. The extraction chat model
+is wrapped so that each formatted extraction prompt is rewritten before it is
+sent, according to EXTRACT_PROMPT_STRATEGY:
+
+    full    send the prompt unchanged
+    static  keep the first EXTRACT_PROMPT_MAX_EXAMPLES examples; every call then
+            shares a byte-identical prefix, which providers with automatic
+            prompt (prefix) caching can reuse
+    select  keep the EXTRACT_PROMPT_MAX_EXAMPLES examples whose text shares the
+            most vocabulary with the chunk being extracted
+
+Prompt tokens sent (and saved) per call go to the rag_extract_prompt_tokens
+histogram and, through the metered model underneath, to index job token usage.
+
+Usage:
+    python -m api.services.prompt_manager report preprocessing/prompts/extract_graph.txt
+"""
+import argparse
+import json
+import logging
+import math
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .metrics import metrics
+from .tokens import count_tokens
+
+logger = logging.getLogger(__name__)
+
+EXAMPLES_MARKER = "-Examples-"
+REAL_DATA_MARKER = "-Real Data-"
+TRIMMED_PREFIX = "extract_prompt:"
+STRATEGIES = ("full", "static", "select")
+
+_EXAMPLE_HEADER = re.compile(r"(?m)^Example \d+:[ \t]*\n")
+_WORD = re.compile(r"[A-Za-z][A-Za-z'\-]{2,}")
+
+class ExtractionPrompt:
+    """A formatted extraction prompt split into instructions, few-shot examples and real data"""
+
+    def __init__(self, head: str, examples_prefix: str, examples: List[str], tail: str):
+        self.head = head
+        self.examples_prefix = examples_prefix
+        self.examples = examples
+        self.tail = tail
+
+    @classmethod
+    def parse(cls, prompt: str) -> Optional["ExtractionPrompt"]:
+        """Split a prompt that follows the extract_graph layout; None for any other prompt"""
+        start = prompt.find(EXAMPLES_MARKER)
+        end = prompt.find(REAL_DATA_MARKER)
+        if start < 0 or end < start:
+            return None
+        head_end = start + len(EXAMPLES_MARKER)
+        parts = _EXAMPLE_HEADER.split(prompt[head_end:end])
+        if len(parts) < 2:
+            return None
+        return cls(prompt[:head_end], parts[0], parts[1:], prompt[end:])
+
+    @property
+    def input_text(self) -> str:
+        return _example_text(self.tail)
+
+    def render(self, indexes: List[int]) -> str:
+        examples = "".join(f"Example {n}:\n{self.examples[i]}" for n, i in enumerate(indexes, start=1))
+        return f"{self.head}{self.examples_prefix}{examples}{self.tail}"
+
+def _example_text(section: str) -> str:
+    """The `text:` part of an example (or of the real data section)"""
+    start = section.find("text:")
+    if start < 0:
+        return section
+    end = section.find("------------------------", start)
+    if end < 0:
+        end = section.find("######################", start)
+    return section[start + len("text:"):end if end >= 0 else None]
+
+def _vocabulary(text: str) -> frozenset:
+    return frozenset(word.lower() for word in _WORD.findall(text))
+
+@lru_cache(maxsize=16)
+def _example_vocabularies(examples: Tuple[str, ...]) -> Tuple[frozenset, ...]:
+    return tuple(_vocabulary(_example_text(example)) for example in examples)
+
+def select_examples(parsed: ExtractionPrompt, strategy: str, max_examples: int) -> List[int]:
+    """Indexes of the examples to keep, in their original order"""
+    count = len(parsed.examples)
+    if strategy == "full" or max_examples >= count:
+        return list(range(count))
+    max_examples = max(max_examples, 0)
+    if strategy == "static":
+        return list(range(max_examples))
+
+    chunk = _vocabulary(parsed.input_text)
+    vocabularies = _example_vocabularies(tuple(parsed.examples))
+    # Overlap normalised by example vocabulary size, so long examples don't win by default
+    scores = [len(chunk & vocab) / math.sqrt(len(vocab) or 1) for vocab in vocabularies]
+    best = sorted(range(count), key=lambda i: (-scores[i], i))[:max_examples]
+    return sorted(best)
+
+def trim_prompt(prompt: str, strategy: str, max_examples: int) -> str:
+    """Apply the example strategy to an extraction prompt; other prompts are returned unchanged"""
+    if strategy == "full":
+        return prompt
+    parsed = ExtractionPrompt.parse(prompt)
+    if parsed is None:
+        return prompt
+    return parsed.render(select_examples(parsed, strategy, max_examples))
+
+class TrimmedPromptChatModel:
+    """GraphRAG ChatModel wrapper that trims few-shot examples from extraction prompts"""
+
+    def __init__(self, inner, name: str, strategy: str, max_examples: int):
+        self.inner = inner
+        self.name = name
+        self.strategy = strategy
+        self.max_examples = max_examples
+        self.config = getattr(inner, "config", None)
+
+    def _trim(self, prompt: str) -> str:
+        trimmed = trim_prompt(prompt, self.strategy, self.max_examples)
+        if trimmed is not prompt:
+            sent, original = count_tokens(trimmed), count_tokens(prompt)
+            metrics.observe("rag_extract_prompt_tokens", sent, help="Extraction prompt tokens per call",
+                            strategy=self.strategy, kind="sent")
+            metrics.observe("rag_extract_prompt_tokens", original - sent, help="Extraction prompt tokens per call",
+                            strategy=self.strategy, kind="saved")
+            logger.debug(f"Extraction prompt for {self.name}: {sent} tokens ({original - sent} trimmed)")
+        return trimmed
+
+    async def achat(self, prompt: str, history: Optional[list] = None, **kwargs):
+        return await self.inner.achat(self._trim(prompt), history, **kwargs)
+
+    async def achat_stream(self, prompt: str, history: Optional[list] = None, **kwargs):
+        async for chunk in self.inner.achat_stream(self._trim(prompt), history, **kwargs):
+            yield chunk
+
+    def chat(self, prompt: str, history: Optional[list] = None, **kwargs):
+        return self.inner.chat(self._trim(prompt), history, **kwargs)
+
+    def chat_stream(self, prompt: str, history: Optional[list] = None, **kwargs):
+        yield from self.inner.chat_stream(self._trim(prompt), history, **kwargs)
+
+def install_prompt_trimming(graphrag_config, strategy: str, max_examples: int) -> bool:
+    """Wrap the graph extraction chat model of a GraphRAG config in TrimmedPromptChatModel"""
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown extraction prompt strategy '{strategy}', expected one of {STRATEGIES}")
+    if strategy == "full":
+        return False
+    from graphrag.language_model.factory import ModelFactory
+
+    model_config = graphrag_config.models[graphrag_config.extract_graph.model_id]
+    model_type = str(getattr(model_config.type, "value", model_config.type))
+    if model_type.startswith(TRIMMED_PREFIX):
+        return True
+    trimmed_type = f"{TRIMMED_PREFIX}{strategy}:{max_examples}:{model_type}"
+    if not ModelFactory.is_supported_chat_model(trimmed_type):
+        def create(inner_type=model_type, **kwargs):
+            inner = ModelFactory.create_chat_model(inner_type, **kwargs)
+            return TrimmedPromptChatModel(inner, kwargs.get("name", inner_type), strategy, max_examples)
+        ModelFactory.register_chat(trimmed_type, create)
+    model_config.type = trimmed_type
+    return True
+
+def report(prompt_path: Path, max_examples: int, sample_text: str = "") -> Dict:
+    """Prompt tokens per strategy for a prompt file (placeholders left unformatted)"""
+    template = prompt_path.read_text(encoding="utf-8")
+    prompt = template.replace("{input_text}", sample_text)
+    parsed = ExtractionPrompt.parse(prompt)
+    result = {"prompt": str(prompt_path), "examples": len(parsed.examples) if parsed else 0, "strategies": {}}
+    for strategy in STRATEGIES:
+        trimmed = trim_prompt(prompt, strategy, max_examples)
+        result["strategies"][strategy] = {"tokens": count_tokens(trimmed), "chars": len(trimmed)}
+    return result
+
+def main(argv=None):
+    from api.config import settings
+
+    parser = argparse.ArgumentParser(description="Show extraction prompt size per example strategy")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    report_parser = subparsers.add_parser("report")
+    report_parser.add_argument("prompt", type=Path)
+    report_parser.add_argument("--max-examples", type=int, default=settings.EXTRACT_PROMPT_MAX_EXAMPLES)
+    report_parser.add_argument("--text-file", type=Path, help="Sample chunk used by the 'select' strategy")
+    args = parser.parse_args(argv)
+
+    sample = args.text_file.read_text(encoding="utf-8") if args.text_file else ""
+    print(json.dumps(report(args.prompt, args.max_examples, sample), indent=2))
+
+if __name__ == "__main__":
+    main()
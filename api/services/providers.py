@@ -0,0 +1,215 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from api.config import settings
+
+logger = logging.getLogger(__name__)
+
+FAKE_CHAT_MODEL_TYPE = "fake_chat"
+FAKE_EMBEDDING_MODEL_TYPE = "fake_embedding"
+
+class ModelProvider:
+    """Base class for the LLM and embedding backend used by the RAG clients"""
+
+    name = "base"
+    requires_api_key = True
+
+    def embedding_function(self):
+        """ChromaDB embedding function used for naive RAG retrieval"""
+        raise NotImplementedError
+
+    def chat_model(self):
+        """LangChain runnable used to generate naive RAG answers"""
+        raise NotImplementedError
+
+    def configure_graphrag(self, graphrag_config) -> None:
+        """Point a loaded GraphRAG config at this provider's models"""
+
+class MistralProvider(ModelProvider):
+    """Mistral API backend (the production default)"""
+
+    name = "mistral"
+
+    def embedding_function(self):
+        import chromadb.utils.embedding_functions as embedding_functions
+        return embedding_functions.OpenAIEmbeddingFunction(
+            api_key=os.getenv("GRAPHRAG_API_KEY"),
+            api_base="https://api.mistral.ai/v1",
+            model_name=settings.EMBEDDING_MODEL
+        )
+
+    def chat_model(self):
+        from langchain.chat_models import init_chat_model
+        return init_chat_model(
+            settings.CHAT_MODEL,
+            model_provider="mistralai",
+            temperature=0,
+            api_key=settings.MISTRAL_API_KEY,
+            max_retries=5
+        )
+
+class FakeProvider(ModelProvider):
+    """Deterministic offline backend for load tests and CI
+
+    Embeddings are L2-normalised hashed bag-of-words vectors, completions are
+    canned text derived from the prompt, and every call sleeps for a latency
+    drawn from the configured distribution.
+    """
+
+    name = "fake"
+    requires_api_key = False
+
+    def __init__(self, dimension: int = None, latency_distribution: str = None,
+                 latency_ms: float = None, latency_jitter_ms: float = None, seed: int = None):
+        self.dimension = dimension or settings.FAKE_EMBEDDING_DIM
+        self.latency_distribution = latency_distribution or settings.FAKE_LATENCY_DISTRIBUTION
+        self.latency_ms = settings.FAKE_LATENCY_MS if latency_ms is None else latency_ms
+        self.latency_jitter_ms = settings.FAKE_LATENCY_JITTER_MS if latency_jitter_ms is None else latency_jitter_ms
+        self._random = random.Random(settings.FAKE_SEED if seed is None else seed)
+        self._random_lock = threading.Lock()
+
+    def sample_latency(self) -> float:
+        """Draw one call latency, in seconds, from the configured distribution"""
+        mean, jitter = self.latency_ms, self.latency_jitter_ms
+        with self._random_lock:
+            if self.latency_distribution == "uniform":
+                value = self._random.uniform(mean - jitter, mean + jitter)
+            elif self.latency_distribution == "normal":
+                value = self._random.gauss(mean, jitter)
+            elif self.latency_distribution == "lognormal" and mean > 0:
+                # Parameterised so the distribution's mean and std match latency_ms / jitter_ms
+                sigma2 = math.log(1 + (jitter / mean) ** 2)
+                value = self._random.lognormvariate(math.log(mean) - sigma2 / 2, math.sqrt(sigma2))
+            else:
+                value = mean
+        return max(value, 0.0) / 1000
+
+    def embed(self, text: str) -> List[float]:
+        """Hashed bag-of-words embedding: identical text always maps to the same vector"""
+        vector = [0.0] * self.dimension
+        for token in re.findall(r"\w+", text.lower()):
+            digest = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[digest % self.dimension] += 1.0 if digest >> 63 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def complete(self, prompt: str, json_mode: bool = False) -> str:
+        """Canned completion, stable for a given prompt"""
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        if json_mode:
+            # Shape expected by GraphRAG's global-search map step
+            return json.dumps({"points": [{"description": f"Fake point {digest}", "score": 50}]})
+        return f"Fake answer {digest}, based on a prompt of {len(prompt)} characters."
+
+    def embedding_function(self):
+        from chromadb import Documents, EmbeddingFunction, Embeddings
+        provider = self
+
+        class FakeEmbeddingFunction(EmbeddingFunction):
+            def __call__(self, input: Documents) -> Embeddings:
+                time.sleep(provider.sample_latency())
+                if isinstance(input, str):
+                    input = [input]
+                return [provider.embed(doc) for doc in input]
+
+            def name(self) -> str:
+                return "fake-hashed-bow"
+
+        return FakeEmbeddingFunction()
+
+    def chat_model(self):
+        from langchain_core.messages import AIMessage
+        from langchain_core.runnables import RunnableLambda
+
+        def invoke(prompt_value) -> AIMessage:
+            time.sleep(self.sample_latency())
+            return AIMessage(content=self.complete(prompt_value.to_string()))
+
+        return RunnableLambda(invoke)
+
+    def configure_graphrag(self, graphrag_config) -> None:
+        from graphrag.language_model.factory import ModelFactory
+
+        if not ModelFactory.is_supported_chat_model(FAKE_CHAT_MODEL_TYPE):
+            ModelFactory.register_chat(FAKE_CHAT_MODEL_TYPE, lambda **kwargs: FakeGraphRAGChatModel(self, **kwargs))
+        if not ModelFactory.is_supported_embedding_model(FAKE_EMBEDDING_MODEL_TYPE):
+            ModelFactory.register_embedding(FAKE_EMBEDDING_MODEL_TYPE, lambda **kwargs: FakeGraphRAGEmbeddingModel(self, **kwargs))
+
+        for model_id, model_config in graphrag_config.models.items():
+            is_embedding = "embedding" in str(model_config.type).lower()
+            model_config.type = FAKE_EMBEDDING_MODEL_TYPE if is_embedding else FAKE_CHAT_MODEL_TYPE
+            logger.info(f"GraphRAG model '{model_id}' routed to fake provider")
+
+def _graphrag_response(content: str, prompt: str, history: Optional[list]):
+    """Wrap text in GraphRAG's ModelResponse shape"""
+    from graphrag.language_model.response.base import BaseModelOutput, BaseModelResponse
+    return BaseModelResponse(
+        output=BaseModelOutput(content=content),
+        history=[*(history or []), {"role": "user", "content": prompt}, {"role": "assistant", "content": content}]
+    )
+
+class FakeGraphRAGChatModel:
+    """GraphRAG ChatModel protocol implementation backed by FakeProvider"""
+
+    def __init__(self, provider: FakeProvider, **kwargs):
+        self.provider = provider
+        self.config = kwargs.get("config")
+
+    async def achat(self, prompt: str, history: Optional[list] = None, **kwargs):
+        await asyncio.sleep(self.provider.sample_latency())
+        return _graphrag_response(self.provider.complete(prompt, kwargs.get("json", False)), prompt, history)
+
+    async def achat_stream(self, prompt: str, history: Optional[list] = None, **kwargs):
+        response = await self.achat(prompt, history, **kwargs)
+        yield response.output.content
+
+    def chat(self, prompt: str, history: Optional[list] = None, **kwargs):
+        time.sleep(self.provider.sample_latency())
+        return _graphrag_response(self.provider.complete(prompt, kwargs.get("json", False)), prompt, history)
+
+    def chat_stream(self, prompt: str, history: Optional[list] = None, **kwargs):
+        yield self.chat(prompt, history, **kwargs).output.content
+
+class FakeGraphRAGEmbeddingModel:
+    """GraphRAG EmbeddingModel protocol implementation backed by FakeProvider"""
+
+    def __init__(self, provider: FakeProvider, **kwargs):
+        self.provider = provider
+        self.config = kwargs.get("config")
+
+    async def aembed_batch(self, text_list: List[str], **kwargs) -> List[List[float]]:
+        await asyncio.sleep(self.provider.sample_latency())
+        return [self.provider.embed(text) for text in text_list]
+
+    async def aembed(self, text: str, **kwargs) -> List[float]:
+        return (await self.aembed_batch([text]))[0]
+
+    def embed_batch(self, text_list: List[str], **kwargs) -> List[List[float]]:
+        time.sleep(self.provider.sample_latency())
+        return [self.provider.embed(text) for text in text_list]
+
+    def embed(self, text: str, **kwargs) -> List[float]:
+        return self.embed_batch([text])[0]
+
+PROVIDERS: Dict[str, type] = {
+    MistralProvider.name: MistralProvider,
+    FakeProvider.name: FakeProvider,
+}
+
+@lru_cache(maxsize=None)
+def get_provider(name: Optional[str] = None) -> ModelProvider:
+    """Return the (shared) provider selected by settings.MODEL_PROVIDER"""
+    name = name or settings.MODEL_PROVIDER
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown model provider '{name}'. Available: {', '.join(PROVIDERS)}")
+    return PROVIDERS[name]()
@@ -0,0 +1,112 @@
+"""
+Rule-based routing for the "auto" method.
+
+Picks the cheapest enabled method likely to answer a question from its shape
+and the GraphRAG entities it mentions:
+
+- broad / thematic questions ("main themes", "overall", "summarize") -> global search
+- how two or more named entities are connected -> path search
+- questions about named entities, their relationships or comparisons -> local search
+- short factual lookups without a known entity -> naive RAG
+
+Entity mentions come from the GraphRAG client's gazetteer. No model is called;
+routing a query costs a few dictionary lookups.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+
+from api.models.schemas import RAGMethod
+
+if TYPE_CHECKING:
+    from .gazetteer import Gazetteer
+
+# Cheapest first; used to fall back when the preferred method is not enabled
+METHOD_COST_ORDER = [
+    RAGMethod.NAIVE_RAG,
+    RAGMethod.GRAPHRAG_PATH,
+    RAGMethod.GRAPHRAG_LOCAL,
+    RAGMethod.GRAPHRAG_DRIFT,
+    RAGMethod.GRAPHRAG_GLOBAL,
+]
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+_BROAD_PATTERNS = [re.compile(p) for p in (
+    r"\b(main|major|key|central|recurring|overarching|common) (themes?|ideas?|topics?|conflicts?|trends?|motifs?)\b",
+    r"\bthemes?\b",
+    r"\b(overall|in general|generally|overview|big picture|as a whole|across the (books?|series|story|saga))\b",
+    r"\b(summari[sz]e|summary of)\b",
+    r"\bwhat (is|are) (this|the) (book|books|series|story|saga) about\b",
+    r"\b(most important|most significant|most influential)\b",
+)]
+_RELATIONAL_PATTERNS = [re.compile(p) for p in (
+    r"\b(relat(ed|ion|ionship|ionships)|connect(ed|ion|ions)?|link(ed)?|between)\b",
+    r"\b(compare|comparison|differ(ence|ent)?|similar(ity)?|versus|vs)\b",
+    r"\b(ally|allies|enem(y|ies)|rival|married|betroth|father|mother|son|daughter|brother|sister|sibling|family)\b",
+    r"\b(why did|how did|what happened|role of|motivations?)\b",
+)]
+_CONNECTION_PATTERN = re.compile(r"\b(relat(ed|ion|ionship)|connect(ed|ion)?|link(ed)?|between|know each other)\b")
+_FACTUAL_PATTERN = re.compile(r"^(who|what|when|where|which|how many|how much|how old|is|was|did|does)\b")
+
+def query_terms(query: str) -> List[str]:
+    return _WORD.findall(query.lower())
+
+@dataclass
+class RoutingDecision:
+    method: RAGMethod
+    reason: str
+    entities: List[str] = field(default_factory=list)
+    signals: Dict[str, Any] = field(default_factory=dict)
+
+    def to_metadata(self) -> Dict[str, Any]:
+        return {
+            "requested": RAGMethod.AUTO.value,
+            "method": self.method.value,
+            "reason": self.reason,
+            "entities": self.entities,
+            "signals": self.signals,
+        }
+
+class QueryRouter:
+    """Routes "auto" queries to the cheapest enabled method that fits the question"""
+
+    def __init__(self, gazetteer: Optional["Gazetteer"] = None, fuzzy: bool = True):
+        self.gazetteer = gazetteer
+        self.fuzzy = fuzzy
+
+    def route(self, query: str, enabled: Sequence[RAGMethod]) -> RoutingDecision:
+        candidates = [m for m in METHOD_COST_ORDER if m in enabled]
+        if not candidates:
+            raise ValueError("No query methods are enabled")
+        text = " ".join(query_terms(query))
+        entities = self.gazetteer.titles(query, self.fuzzy) if self.gazetteer else []
+        broad = any(p.search(text) for p in _BROAD_PATTERNS)
+        relational = any(p.search(text) for p in _RELATIONAL_PATTERNS)
+        connection = bool(_CONNECTION_PATTERN.search(text))
+        factual = bool(_FACTUAL_PATTERN.match(text)) and len(text.split()) <= 12
+        signals = {"broad": broad, "relational": relational, "connection": connection, "factual": factual,
+                   "words": len(text.split()), "entity_index": self.gazetteer is not None}
+
+        if broad and not entities:
+            preferred = [RAGMethod.GRAPHRAG_GLOBAL, RAGMethod.GRAPHRAG_DRIFT, RAGMethod.GRAPHRAG_LOCAL]
+            reason = "broad or thematic question"
+        elif len(entities) > 1 and connection:
+            preferred = [RAGMethod.GRAPHRAG_PATH, RAGMethod.GRAPHRAG_LOCAL, RAGMethod.GRAPHRAG_DRIFT]
+            reason = "connection between known entities"
+        elif entities and (relational or len(entities) > 1 or not factual):
+            preferred = [RAGMethod.GRAPHRAG_LOCAL, RAGMethod.GRAPHRAG_DRIFT]
+            reason = "question about known entities" + (" and their relationships" if relational else "")
+        elif factual:
+            preferred = [RAGMethod.NAIVE_RAG, RAGMethod.GRAPHRAG_LOCAL]
+            reason = "short factual lookup"
+        else:
+            preferred = [RAGMethod.NAIVE_RAG]
+            reason = "no entity or thematic signal; cheapest method"
+
+        # Path search only answers questions that name entities
+        fallback = [m for m in candidates if m != RAGMethod.GRAPHRAG_PATH or entities] or candidates
+        method = next((m for m in preferred if m in candidates), fallback[0])
+        if method not in preferred[:1]:
+            reason += f" ({preferred[0].value} not enabled)"
+        return RoutingDecision(method=method, reason=reason, entities=entities, signals=signals)
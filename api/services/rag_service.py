@@ -1,34 +1,255 @@
+import asyncio
 import logging
-from typing import Dict, Any
-from api.models.schemas import RAGRequest, RAGResponse, RAGMethod
-from .graphrag_client import GraphRAGClient
-from .traditional_rag_client import TraditionalRAGClient
+import threading
+import time
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Any, List, Optional
+from api.models.schemas import RAGRequest, RAGResponse, RAGMethod, BatchResultItem, IndexJob
+from .answer_store import AnswerStore
+from .index_jobs import index_job_manager
+from .metrics import metrics
+from .query_router import QueryRouter, RoutingDecision
 from api.config import settings
 
+# Clients (and with them graphrag, pandas, chromadb, langchain) are imported on first use
+if TYPE_CHECKING:
+    from .graphrag_client import GraphRAGClient
+    from .traditional_rag_client import TraditionalRAGClient
+
 logger = logging.getLogger(__name__)
 
+# GraphRAG search behind each GraphRAG method
+GRAPHRAG_SEARCHES = {
+    RAGMethod.GRAPHRAG_LOCAL: "local",
+    RAGMethod.GRAPHRAG_GLOBAL: "global",
+    RAGMethod.GRAPHRAG_DRIFT: "drift",
+    RAGMethod.GRAPHRAG_PATH: "path",
+}
+
+METHOD_INFO = {
+    RAGMethod.NAIVE_RAG: ("Traditional RAG", "Traditional RAG using ChromaDB and embeddings"),
+    RAGMethod.GRAPHRAG_LOCAL: ("GraphRAG Local Search", "GraphRAG local search using entities and relationships"),
+    RAGMethod.GRAPHRAG_GLOBAL: ("GraphRAG Global Search", "GraphRAG global search using community reports"),
+    RAGMethod.GRAPHRAG_DRIFT: ("GraphRAG Drift Search", "GraphRAG drift search for temporal and contextual analysis"),
+    RAGMethod.GRAPHRAG_PATH: ("GraphRAG Path Search", "Relationship paths between the entities named in the question"),
+    RAGMethod.AUTO: ("Automatic", "Routes each question to the cheapest method likely to answer it"),
+}
+
+def enabled_methods() -> List[RAGMethod]:
+    """Methods listed in ENABLED_METHODS, in enum order"""
+    configured = set(settings.ENABLED_METHODS)
+    unknown = configured - {method.value for method in RAGMethod}
+    if unknown:
+        logger.warning(f"Ignoring unknown methods in ENABLED_METHODS: {', '.join(sorted(unknown))}")
+    return [method for method in RAGMethod if method.value in configured]
+
+def enabled_graphrag_searches() -> List[str]:
+    return [GRAPHRAG_SEARCHES[method] for method in enabled_methods() if method in GRAPHRAG_SEARCHES]
+
+# GraphRAG client loaded in the master process before workers fork (see preload_shared_state)
+_preloaded_graphrag_client: Optional["GraphRAGClient"] = None
+
+def preload_shared_state() -> None:
+    """Load GraphRAG tables and memory-mapped entity indexes once, before forking workers
+
+    Forked workers inherit the loaded DataFrames copy-on-write and the mapped
+    index pages through the page cache, so N workers don't hold N copies.
+    Clients with connections or threads (Chroma, LLM clients) are created
+    after the fork, per worker.
+    """
+    from .entity_index import warm_up_indexes
+    from .graphrag_client import GraphRAGClient
+    
+    global _preloaded_graphrag_client
+    if _preloaded_graphrag_client is None and enabled_graphrag_searches():
+        _preloaded_graphrag_client = GraphRAGClient(settings.PROJECT_DIRECTORY, enabled_graphrag_searches())
+        warm_up_indexes()
+
 class RAGService:
     """Main service for orchestrating RAG operations"""
     
     def __init__(self):
-        self.graphrag_client = GraphRAGClient(settings.PROJECT_DIRECTORY)
-        self.traditional_rag_client = TraditionalRAGClient(
-            settings.INPUT_DIRECTORY,
-            settings.CHROMA_DB_PATH
-        )
+        self.enabled_methods = enabled_methods()
+        self._graphrag_client: Optional["GraphRAGClient"] = _preloaded_graphrag_client
+        self._traditional_rag_client: Optional["TraditionalRAGClient"] = None
+        self._clients_lock = threading.Lock()
+        self._output_lock = threading.Lock()
+        self._output_checked_at = time.monotonic()
+        self.answer_store: Optional[AnswerStore] = None
+        if settings.ANSWER_STORE_ENABLED:
+            self.answer_store = AnswerStore(
+                settings.ANSWER_STORE_PATH,
+                min_similarity=settings.ANSWER_STORE_MIN_SIMILARITY,
+                check_seconds=settings.ANSWER_STORE_CHECK_SECONDS
+            )
+    
+    @property
+    def graphrag_client(self) -> "GraphRAGClient":
+        """GraphRAG client, created (config, parquet tables, entity index) on first use"""
+        if self._graphrag_client is None:
+            with self._clients_lock:
+                if self._graphrag_client is None:
+                    from .graphrag_client import GraphRAGClient
+                    self._graphrag_client = GraphRAGClient(settings.PROJECT_DIRECTORY, enabled_graphrag_searches())
+        return self._graphrag_client
+    
+    @property
+    def traditional_rag_client(self) -> "TraditionalRAGClient":
+        """Naive RAG client, created (vector store, LLM chain) on first use"""
+        if self._traditional_rag_client is None:
+            with self._clients_lock:
+                if self._traditional_rag_client is None:
+                    from .traditional_rag_client import TraditionalRAGClient
+                    self._traditional_rag_client = TraditionalRAGClient(
+                        settings.INPUT_DIRECTORY,
+                        settings.CHROMA_DB_PATH
+                    )
+        return self._traditional_rag_client
+    
+    def refresh_graphrag_output(self) -> None:
+        """Pick up GraphRAG output rebuilt since it was loaded (by another worker, or outside the API)
 
+        Checked at most every GRAPHRAG_OUTPUT_CHECK_SECONDS. Only output the
+        job manager considers servable is loaded: none while a build is
+        writing it, nor what a failed or cancelled build left behind.
+        """
+        client = self._graphrag_client
+        if client is None or not self._output_check_due():
+            return
+        # One check at a time; concurrent queries keep serving the tables already loaded
+        if not self._output_lock.acquire(blocking=False):
+            return
+        try:
+            self._output_checked_at = time.monotonic()
+            client.reload_if_changed(index_job_manager.is_servable)
+        except Exception as e:
+            logger.warning(f"Could not refresh GraphRAG output: {e}")
+        finally:
+            self._output_lock.release()
+    
+    def _output_check_due(self) -> bool:
+        return time.monotonic() - self._output_checked_at >= settings.GRAPHRAG_OUTPUT_CHECK_SECONDS
+    
+    @property
+    def graphrag_enabled(self) -> bool:
+        return any(method in GRAPHRAG_SEARCHES for method in self.enabled_methods)
+    
+    @property
+    def naive_rag_enabled(self) -> bool:
+        return RAGMethod.NAIVE_RAG in self.enabled_methods
+    
+    @property
+    def routable_methods(self) -> List[RAGMethod]:
+        """Enabled methods "auto" can route to"""
+        return [method for method in self.enabled_methods if method != RAGMethod.AUTO]
+    
+    def route_query(self, query: str) -> RoutingDecision:
+        """Pick the method for an "auto" query from its shape and the entities it mentions
+
+        Entities are only matched once the GraphRAG client is loaded; routing
+        never loads it. Blocking (gazetteer scan): call it off the event loop.
+        """
+        client = self._graphrag_client
+        gazetteer = client.gazetteer if client is not None and settings.GAZETTEER_ENABLED else None
+        return QueryRouter(gazetteer, settings.GAZETTEER_FUZZY).route(query, self.routable_methods)
+    
+    def is_method_available(self, method: RAGMethod) -> bool:
+        """Enabled and backed by a working client (creates the client if needed)"""
+        if method not in self.enabled_methods:
+            return False
+        if method == RAGMethod.AUTO:
+            return any(self.is_method_available(m) for m in self.routable_methods)
+        if method == RAGMethod.NAIVE_RAG:
+            return self.traditional_rag_client.is_available()
+        return self.graphrag_client._has_required_data()
+    
+    def available_methods(self) -> List[Dict[str, str]]:
+        """Methods this deployment can currently answer, for /methods"""
+        return [
+            {"name": method.value, "description": METHOD_INFO[method][1], "display_name": METHOD_INFO[method][0]}
+            for method in self.enabled_methods
+            if self.is_method_available(method)
+        ]
     
     async def process_query(self, request: RAGRequest) -> RAGResponse:
         """Process a RAG query based on the specified method"""
+        started = time.perf_counter()
+        routing = None
+        if request.method == RAGMethod.AUTO and RAGMethod.AUTO in self.enabled_methods and self.routable_methods:
+            routing = await asyncio.to_thread(self.route_query, request.query)
+            request = request.model_copy(update={"method": routing.method})
+            metrics.inc("rag_routed_queries_total", help="Auto-routed queries by chosen method", method=routing.method.value)
+        
+        response = await self._lookup_stored_answer(request)
+        if response is None:
+            response = await self._dispatch_query(request)
+        if routing is not None:
+            response.metadata = {**(response.metadata or {}), "routing": routing.to_metadata()}
+        
+        method = getattr(request.method, "value", request.method)
+        metrics.inc("rag_queries_total", help="Queries processed by method and outcome",
+                    method=method, success=str(response.success).lower())
+        metrics.observe("rag_query_duration_ms", (time.perf_counter() - started) * 1000,
+                        help="End-to-end query processing time", method=method)
+        return response
+    
+    async def _lookup_stored_answer(self, request: RAGRequest) -> Optional[RAGResponse]:
+        """Precomputed FAQ answer for the request, if the answer store has a current one"""
+        if self.answer_store is None or request.method not in self.enabled_methods:
+            return None
+        if self.answer_store.refresh_due():
+            # Stats the index files; keep it off the event loop
+            await asyncio.to_thread(self.answer_store.refresh)
+        response = self.answer_store.lookup(request)
+        if len(self.answer_store):
+            metrics.inc("rag_cache_requests_total", help="Cache lookups by cache and result",
+                        cache="answer_store", result="hit" if response is not None else "miss")
+        return response
+    
+    @staticmethod
+    def _instrumentation_metadata(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Stage timings and token counts for response metadata, if enabled"""
+        if not settings.METRICS_IN_METADATA:
+            return {}
+        return {"timings": result.get("timings"), "tokens": result.get("tokens")}
+    
+    def _context_metadata(self, request: RAGRequest, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Compact GraphRAG context summary with prompt/completion token counts, if requested"""
+        if not request.include_context or "context" not in result:
+            return {}
+        summary = self.graphrag_client.summarize_context(
+            result["context"],
+            max_items=settings.CONTEXT_SUMMARY_MAX_ITEMS
+        )
+        tokens = result.get("tokens") or {}
+        # Rendered prompts as sent (templates, context, map/reduce steps), not just the context
+        summary["prompt_tokens"] = tokens.get("prompt")
+        summary["completion_tokens"] = tokens.get("completion")
+        summary["llm_calls"] = tokens.get("llm_calls")
+        return {"context": summary}
+    
+    async def _dispatch_query(self, request: RAGRequest) -> RAGResponse:
+        """Route a query to the handler for its method"""
         try:
             logger.info(f"Processing query with method: {request.method}")
             
+            if request.method not in self.enabled_methods:
+                return RAGResponse(
+                    success=False,
+                    method=request.method,
+                    error=f"Method {getattr(request.method, 'value', request.method)} is not enabled"
+                )
+            
+            if request.method in GRAPHRAG_SEARCHES and self._output_check_due():
+                await asyncio.to_thread(self.refresh_graphrag_output)
+            
             if request.method == RAGMethod.GRAPHRAG_LOCAL:
                 return await self._handle_graphrag_local(request)
             elif request.method == RAGMethod.GRAPHRAG_GLOBAL:
                 return await self._handle_graphrag_global(request)
             elif request.method == RAGMethod.GRAPHRAG_DRIFT:
                 return await self._handle_graphrag_drift(request)
+            elif request.method == RAGMethod.GRAPHRAG_PATH:
+                return await self._handle_graphrag_path(request)
             elif request.method == RAGMethod.NAIVE_RAG:
                 return await self._handle_naive_rag(request)
             else:
@@ -51,10 +272,20 @@ class RAGService:
         community_level = request.community_level or settings.DEFAULT_COMMUNITY_LEVEL
         response_type = request.response_type or settings.DEFAULT_RESPONSE_TYPE
         
+        local_search_params = {
+            "max_context_tokens": settings.LOCAL_SEARCH_MAX_CONTEXT_TOKENS,
+            "top_k_entities": settings.LOCAL_SEARCH_TOP_K_ENTITIES,
+            "top_k_relationships": settings.LOCAL_SEARCH_TOP_K_RELATIONSHIPS,
+            "text_unit_prop": settings.LOCAL_SEARCH_TEXT_UNIT_PROP,
+            "community_prop": settings.LOCAL_SEARCH_COMMUNITY_PROP,
+            **request.local_search_overrides()
+        }
+        
         result = await self.graphrag_client.query_local(
             query=request.query,
             community_level=community_level,
-            response_type=response_type
+            response_type=response_type,
+            local_search_params=local_search_params
         )
         
         if "error" in result:
@@ -69,9 +300,16 @@ class RAGService:
             response=result.get("response"),
             method=request.method,
             metadata={
-                "community_level": result.get("community_level"),
-                "response_type": result.get("response_type"),
-                "context_available": "context" in result
+                "community_level": result.get("query_params", {}).get("community_level"),
+                "response_type": result.get("query_params", {}).get("response_type"),
+                "local_search": {
+                    k: v for k, v in result.get("query_params", {}).items()
+                    if k in self.graphrag_client.LOCAL_SEARCH_PARAMS
+                },
+                "seed_entities": result.get("seed_entities"),
+                "context_available": "context" in result,
+                **self._context_metadata(request, result),
+                **self._instrumentation_metadata(result)
             }
         )
     
@@ -80,12 +318,14 @@ class RAGService:
         community_level = request.community_level or settings.DEFAULT_COMMUNITY_LEVEL
         response_type = request.response_type or settings.DEFAULT_RESPONSE_TYPE
         dynamic_selection = request.dynamic_community_selection or False
+        tiered = settings.GLOBAL_SEARCH_TIERED if request.tiered is None else request.tiered
         
         result = await self.graphrag_client.query_global(
             query=request.query,
             community_level=community_level,
             response_type=response_type,
-            dynamic_community_selection=dynamic_selection
+            dynamic_community_selection=dynamic_selection,
+            tiered=tiered
         )
         
         if "error" in result:
@@ -100,10 +340,13 @@ class RAGService:
             response=result.get("response"),
             method=request.method,
             metadata={
-                "community_level": result.get("community_level"),
-                "response_type": result.get("response_type"),
-                "dynamic_community_selection": result.get("dynamic_community_selection"),
-                "context_available": "context" in result
+                "community_level": result.get("query_params", {}).get("community_level"),
+                "response_type": result.get("query_params", {}).get("response_type"),
+                "dynamic_community_selection": result.get("query_params", {}).get("dynamic_selection"),
+                "tier": result.get("tier"),
+                "context_available": "context" in result,
+                **self._context_metadata(request, result),
+                **self._instrumentation_metadata(result)
             }
         )
     
@@ -130,10 +373,44 @@ class RAGService:
             response=result.get("response"),
             method=request.method,
             metadata={
-                "community_level": result.get("community_level"),
-                "response_type": result.get("response_type"),
+                "community_level": result.get("query_params", {}).get("community_level"),
+                "response_type": result.get("query_params", {}).get("response_type"),
                 "drift_analysis": result.get("drift_analysis"),
-                "context_available": "context" in result
+                "context_available": "context" in result,
+                **self._context_metadata(request, result),
+                **self._instrumentation_metadata(result)
+            }
+        )
+    
+    async def _handle_graphrag_path(self, request: RAGRequest) -> RAGResponse:
+        """Handle GraphRAG path search"""
+        response_type = request.response_type or settings.DEFAULT_RESPONSE_TYPE
+        
+        result = await self.graphrag_client.query_path(
+            query=request.query,
+            response_type=response_type,
+            max_hops=settings.GRAPH_PATH_MAX_HOPS
+        )
+        
+        if "error" in result:
+            return RAGResponse(
+                success=False,
+                method=request.method,
+                error=result["error"]
+            )
+        
+        context = result.get("context", {})
+        return RAGResponse(
+            success=True,
+            response=result.get("response"),
+            method=request.method,
+            metadata={
+                "entities": result.get("query_params", {}).get("entities"),
+                "response_type": result.get("query_params", {}).get("response_type"),
+                "paths": context.get("paths"),
+                "unconnected": context.get("unconnected"),
+                "neighbors": context.get("neighbors"),
+                **self._instrumentation_metadata(result)
             }
         )
     
@@ -152,7 +429,8 @@ class RAGService:
         result = await loop.run_in_executor(
             None, 
             self.traditional_rag_client.query_traditional, 
-            request.query
+            request.query,
+            request.num_results or settings.DEFAULT_NUM_RESULTS
         )
         
         if "error" in result:
@@ -168,25 +446,110 @@ class RAGService:
             method=request.method,
             metadata={
                 "num_docs_retrieved": result.get("num_docs_retrieved", 0),
-                "retrieved_docs_available": "retrieved_docs" in result
+                "retrieved_docs_available": "retrieved_docs" in result,
+                **self._instrumentation_metadata(result)
             }
         )
     
+    async def process_batch(self, requests: List[RAGRequest],
+                            max_concurrency: Optional[int] = None) -> AsyncIterator[BatchResultItem]:
+        """Process many queries with bounded concurrency, yielding results as they complete"""
+        semaphore = asyncio.Semaphore(max_concurrency or settings.BATCH_MAX_CONCURRENCY)
+        
+        async def run_query(request: RAGRequest) -> RAGResponse:
+            async with semaphore:
+                return await self.process_query(request)
+        
+        # Identical requests (same query, method and parameters) share one execution
+        shared: Dict[str, asyncio.Task] = {}
+        
+        async def run_item(index: int, request: RAGRequest) -> BatchResultItem:
+            started = time.perf_counter()
+            key = request.model_dump_json()
+            if key not in shared:
+                shared[key] = asyncio.ensure_future(run_query(request))
+            response = await shared[key]
+            return BatchResultItem(
+                index=index,
+                query=request.query,
+                method=request.method,
+                elapsed_ms=round((time.perf_counter() - started) * 1000, 2),
+                result=response
+            )
+        
+        items = [asyncio.ensure_future(run_item(i, r)) for i, r in enumerate(requests)]
+        try:
+            for next_item in asyncio.as_completed(items):
+                yield await next_item
+        finally:
+            # Client went away or batch aborted: don't keep paying for queued queries
+            for task in list(items) + list(shared.values()):
+                if not task.done():
+                    task.cancel()
+    
     def get_system_status(self) -> Dict[str, Any]:
         """Get system status and availability"""
+        graphrag_client = self.graphrag_client if self.graphrag_enabled else None
         return {
-            "graphrag_available": hasattr(self.graphrag_client, 'graphrag_config') and self.graphrag_client.graphrag_config is not None,
-            "traditional_rag_available": self.traditional_rag_client.is_available(),
+            "graphrag_available": graphrag_client is not None and graphrag_client.graphrag_config is not None,
+            "traditional_rag_available": self.naive_rag_enabled and self.traditional_rag_client.is_available(),
             "project_directory": settings.PROJECT_DIRECTORY,
-            "data_summary": self.graphrag_client.get_data_summary() if self.graphrag_client else None
+            "data_summary": graphrag_client.get_data_summary() if graphrag_client else None,
+            "enabled_methods": [method.value for method in self.enabled_methods]
         }
     
-    async def build_graphrag_index(self) -> Dict[str, Any]:
-        """Build GraphRAG index"""
-        return await self.graphrag_client.build_index()
+    def warm_up(self) -> Dict[str, Any]:
+        """Create the clients and load vector indexes into memory before serving; returns warm-up timings"""
+        from .entity_index import warm_up_indexes
+        
+        result: Dict[str, Any] = {}
+        if self.graphrag_enabled:
+            started = time.perf_counter()
+            self.graphrag_client
+            result["graphrag_setup_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            started = time.perf_counter()
+            result["entity_indexes"] = warm_up_indexes()
+            result["entity_index_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        if self.naive_rag_enabled:
+            result["naiverag_ms"] = self.traditional_rag_client.warm_up()
+        if self.answer_store is not None:
+            self.answer_store.refresh()
+            result["stored_answers"] = len(self.answer_store)
+        return result
+    
+    def get_graph_lookup(self):
+        """Read-only indexes over the loaded GraphRAG tables, or None if they are not loaded"""
+        if not self.graphrag_enabled:
+            return None
+        self.refresh_graphrag_output()
+        return self.graphrag_client.graph_lookup()
+    
+    async def build_graphrag_index(self, incremental: bool = False) -> Dict[str, Any]:
+        """Build GraphRAG index (incrementally for new input documents if requested)"""
+        return await self.graphrag_client.build_index(incremental=incremental)
+    
+    def start_index_build(self, incremental: bool = False) -> IndexJob:
+        """Start a background GraphRAG index build job"""
+        return index_job_manager.start_job(self.graphrag_client, incremental=incremental)
+    
+    def resume_index_build(self, job_id: str) -> IndexJob:
+        """Re-run a failed or cancelled index build job"""
+        return index_job_manager.resume_job(job_id, self.graphrag_client)
 
+    def get_index_cache_report(self) -> Dict[str, Any]:
+        """Report on the GraphRAG indexing LLM cache"""
+        return self.graphrag_client.get_index_cache_report()
+    
+    def prune_index_cache(self, stages: Optional[List[str]] = None,
+                          older_than_days: Optional[float] = None,
+                          stale_prompts: bool = False) -> Dict[str, Any]:
+        """Prune the GraphRAG indexing LLM cache"""
+        return self.graphrag_client.prune_index_cache(stages, older_than_days, stale_prompts)
+    
     async def get_document_count(self) -> int:
         """Get the number of documents in the index"""
+        if not self.naive_rag_enabled:
+            return 0
         # RUN IN THREAD POOL
         # to avoid blocking the event loop  
         import asyncio
@@ -0,0 +1,194 @@
+"""
+Coarse tier of community report digests for global search.
+
+Community reports are grouped per top-level community (a level-0 community and
+all its descendants) and per book (the input document most of a community's
+text units come from). Each group gets an extractive digest: the titles and
+summaries of its reports, highest rank first, cut at a token budget. The
+digests are built with the index and written to output/report_digests.parquet.
+
+Tiered global search first scores the digests against the question, in a
+handful of model calls. It then maps only over the full reports of the best
+groups, instead of every report at the chosen community level.
+
+Usage:
+    python -m api.services.report_digests build --output-dir ./graphragtest/output
+"""
+import argparse
+import json
+import logging
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+import pandas as pd
+
+from .tokens import count_tokens
+
+logger = logging.getLogger(__name__)
+
+DIGESTS_FILE = "report_digests.parquet"
+
+DIGEST_SCORING_PROMPT = """You are selecting which parts of a knowledge base can answer a question.
+Each group below is a digest of the community reports in one part of the knowledge base.
+
+{groups}
+
+Question: {query}
+
+Rate how useful the full reports of each group would be for answering the question, from 0 (irrelevant) to 100 (essential).
+Respond only with JSON of the form: [{{"group": "<group id>", "score": <0-100>}}, ...]
+"""
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+def _root_communities(communities: pd.DataFrame) -> Dict[int, int]:
+    """Top-level ancestor of every community"""
+    parents = {int(c): int(p) for c, p in zip(communities["community"], communities["parent"].fillna(-1))}
+    roots = {}
+    for community in parents:
+        node, seen = community, set()
+        while parents.get(node, -1) != -1 and node not in seen:
+            seen.add(node)
+            node = parents[node]
+        roots[community] = node
+    return roots
+
+def _community_books(communities: pd.DataFrame, text_units: pd.DataFrame, documents: pd.DataFrame) -> Dict[int, str]:
+    """Document (book) title most of each community's text units come from"""
+    document_titles = dict(zip(documents["id"], documents["title"]))
+    unit_documents = {
+        unit_id: [document_titles.get(d) for d in document_ids if d in document_titles]
+        for unit_id, document_ids in zip(text_units["id"], text_units["document_ids"])
+    }
+    books = {}
+    for community, unit_ids in zip(communities["community"], communities["text_unit_ids"]):
+        counts = Counter(book for unit_id in (unit_ids if unit_ids is not None else []) for book in unit_documents.get(unit_id, ()))
+        if counts:
+            books[int(community)] = counts.most_common(1)[0][0]
+    return books
+
+def _digest(title: str, reports: pd.DataFrame, max_tokens: int) -> str:
+    lines = [f"# {title}"]
+    tokens = count_tokens(lines[0])
+    for report in reports.sort_values("rank", ascending=False).itertuples():
+        line = f"- {report.title}: {report.summary}"
+        line_tokens = count_tokens(line)
+        if tokens + line_tokens > max_tokens:
+            break
+        lines.append(line)
+        tokens += line_tokens
+    return "\n".join(lines)
+
+def build_report_digests(output_dir: Path, max_tokens: int = 1500) -> pd.DataFrame:
+    """Group the community reports per top-level community and per book and digest each group"""
+    output_dir = Path(output_dir)
+    reports = pd.read_parquet(output_dir / "community_reports.parquet")
+    communities = pd.read_parquet(output_dir / "communities.parquet")
+
+    groups: Dict[str, Dict] = {}
+    roots = _root_communities(communities)
+    root_titles = dict(zip(communities["community"].astype(int), communities["title"]))
+    report_titles = dict(zip(reports["community"].astype(int), reports["title"]))
+    for community, root in roots.items():
+        group = groups.setdefault(f"community:{root}", {
+            "kind": "community",
+            "title": report_titles.get(root) or root_titles.get(root) or f"Community {root}",
+            "communities": set(),
+        })
+        group["communities"].add(community)
+
+    text_units_path, documents_path = output_dir / "text_units.parquet", output_dir / "documents.parquet"
+    if text_units_path.exists() and documents_path.exists():
+        books = _community_books(communities, pd.read_parquet(text_units_path), pd.read_parquet(documents_path))
+        for community, book in books.items():
+            groups.setdefault(f"book:{book}", {"kind": "book", "title": str(book), "communities": set()})["communities"].add(community)
+
+    rows = []
+    for group_id, group in groups.items():
+        group_reports = reports[reports["community"].astype(int).isin(group["communities"])]
+        if group_reports.empty:
+            continue
+        digest = _digest(group["title"], group_reports, max_tokens)
+        rows.append({
+            "group": group_id,
+            "kind": group["kind"],
+            "title": group["title"],
+            "digest": digest,
+            "n_tokens": count_tokens(digest),
+            "communities": sorted(group["communities"]),
+            "report_count": len(group_reports),
+        })
+    digests = pd.DataFrame(rows)
+    # Replaced atomically: API workers may be loading the previous digests
+    tmp_path = output_dir / f"{DIGESTS_FILE}.{os.getpid()}.tmp"
+    digests.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, output_dir / DIGESTS_FILE)
+    return digests
+
+def digest_batches(digests: pd.DataFrame, max_tokens: int) -> List[pd.DataFrame]:
+    """Split the digests into prompt-sized batches"""
+    batches, start, tokens = [], 0, 0
+    for i, n_tokens in enumerate(digests["n_tokens"]):
+        if i > start and tokens + n_tokens > max_tokens:
+            batches.append(digests.iloc[start:i])
+            start, tokens = i, 0
+        tokens += n_tokens
+    if start < len(digests):
+        batches.append(digests.iloc[start:])
+    return batches
+
+def scoring_prompt(query: str, batch: pd.DataFrame) -> str:
+    groups = "\n\n".join(f"Group id: {row.group}\n{row.digest}" for row in batch.itertuples())
+    return DIGEST_SCORING_PROMPT.format(groups=groups, query=query)
+
+def parse_scores(text: str, group_ids: Set[str]) -> Optional[Dict[str, float]]:
+    """Scores from the model's JSON answer (None if it can't be read)"""
+    match = re.search(r"\[.*\]", text, re.DOTALL)
+    if not match:
+        return None
+    try:
+        items = json.loads(match.group(0))
+        scores = {str(item["group"]): float(item["score"]) for item in items if str(item.get("group")) in group_ids}
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return None
+    return scores or None
+
+def lexical_scores(query: str, digests: pd.DataFrame) -> Dict[str, float]:
+    """Share of the question's words found in each digest (0-100), when the model's scores are unusable"""
+    words = set(_WORD.findall(query.lower()))
+    if not words:
+        return {}
+    return {
+        row.group: 100 * len(words & set(_WORD.findall(row.digest.lower()))) / len(words)
+        for row in digests.itertuples()
+    }
+
+def select_groups(scores: Dict[str, float], top_groups: int, min_score: float) -> List[str]:
+    """Best-scoring groups (at most top_groups, each scoring at least min_score)"""
+    ranked = sorted(scores.items(), key=lambda item: -item[1])
+    return [group for group, score in ranked[:top_groups] if score >= min_score]
+
+def group_communities(digests: pd.DataFrame, groups: List[str]) -> Set[int]:
+    """Communities whose reports make up the given groups"""
+    selected = digests[digests["group"].isin(groups)]
+    return {int(community) for communities in selected["communities"] for community in communities}
+
+def main(argv=None):
+    from api.config import settings
+
+    parser = argparse.ArgumentParser(description="Build community report digests for tiered global search")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Digest the reports of an index output")
+    build_parser.add_argument("--output-dir", type=Path, default=Path(settings.PROJECT_DIRECTORY) / "output")
+    build_parser.add_argument("--max-tokens", type=int, default=settings.GLOBAL_TIER_DIGEST_TOKENS)
+    args = parser.parse_args(argv)
+
+    digests = build_report_digests(args.output_dir, args.max_tokens)
+    kinds = digests["kind"].value_counts().to_dict() if not digests.empty else {}
+    print(f"Wrote {len(digests)} digests ({kinds}) to {args.output_dir / DIGESTS_FILE}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+class SqliteCache:
+    """Small JSON key/value cache in a SQLite file, shared by the worker processes on one host
+
+    Entries past `max_entries` are evicted least-recently-used first.
+    """
+
+    def __init__(self, path: str, max_entries: int = 1024):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, accessed_at REAL NOT NULL)"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        # Per process too: forked workers must not reuse the master's connection
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            conn = self._connect()
+            row = conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            return json.loads(row[0])
+        except sqlite3.Error as e:
+            logger.warning(f"Shared cache read failed: {e}")
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        try:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, accessed_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, default=str), time.time())
+            )
+            conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Shared cache write failed: {e}")
@@ -1,8 +1,16 @@
+import logging
+import os
+import sqlite3
+import threading
 import uuid
 from datetime import datetime
+from pathlib import Path
 from typing import Dict, Optional
+from api.config import settings
 from api.models.schemas import TaskStatus, TaskResult, RAGResponse
 
+logger = logging.getLogger(__name__)
+
 class TaskManager:
     """Simple in-memory task manager for async operations"""
     
@@ -45,6 +53,101 @@ class TaskManager:
     def get_task(self, task_id: str) -> Optional[TaskResult]:
         """Get task by ID"""
         return self.tasks.get(task_id)
+    
+    def count_by_status(self) -> Dict[str, int]:
+        """Number of tasks in each status (queue depth = pending + running)"""
+        counts = {status.value: 0 for status in TaskStatus}
+        for task in list(self.tasks.values()):
+            counts[task.status.value] += 1
+        return counts
+
+class SqliteTaskManager(TaskManager):
+    """Task manager backed by a SQLite file, shared by every worker process on the host
+
+    An async query can be started by one worker and polled through another.
+    """
+    
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                "task_id TEXT PRIMARY KEY, status TEXT NOT NULL, data TEXT NOT NULL, created_at TEXT NOT NULL)"
+            )
+    
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread and process (forked workers must not reuse the master's);
+        # WAL lets readers poll while another worker writes
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+    
+    def _save(self, task: TaskResult):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO tasks (task_id, status, data, created_at) VALUES (?, ?, ?, ?)",
+            (task.task_id, task.status.value, task.model_dump_json(), task.created_at)
+        )
+    
+    def create_task(self) -> str:
+        """Create a new task and return its ID"""
+        task_id = str(uuid.uuid4())
+        self._save(TaskResult(
+            task_id=task_id,
+            status=TaskStatus.PENDING,
+            created_at=datetime.now().isoformat()
+        ))
+        return task_id
+    
+    def update_task_status(self, task_id: str, status: TaskStatus):
+        """Update task status"""
+        task = self.get_task(task_id)
+        if task:
+            task.status = status
+            self._save(task)
+    
+    def complete_task(self, task_id: str, result: RAGResponse):
+        """Mark task as completed with result"""
+        task = self.get_task(task_id)
+        if task:
+            task.status = TaskStatus.COMPLETED
+            task.result = result
+            task.completed_at = datetime.now().isoformat()
+            self._save(task)
+    
+    def fail_task(self, task_id: str, error: str):
+        """Mark task as failed with error"""
+        task = self.get_task(task_id)
+        if task:
+            task.status = TaskStatus.FAILED
+            task.result = RAGResponse(success=False, method="unknown", error=error)
+            task.completed_at = datetime.now().isoformat()
+            self._save(task)
+    
+    def get_task(self, task_id: str) -> Optional[TaskResult]:
+        """Get task by ID"""
+        row = self._connect().execute("SELECT data FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+        return TaskResult.model_validate_json(row[0]) if row else None
+    
+    def count_by_status(self) -> Dict[str, int]:
+        """Number of tasks in each status (queue depth = pending + running)"""
+        counts = {status.value: 0 for status in TaskStatus}
+        for status, count in self._connect().execute("SELECT status, COUNT(*) FROM tasks GROUP BY status"):
+            counts[status] = count
+        return counts
+
+def create_task_manager() -> TaskManager:
+    """In-memory store for a single worker, SQLite when tasks must be visible to every worker"""
+    store = settings.TASK_STORE or ("sqlite" if settings.WORKERS > 1 else "memory")
+    if store == "sqlite":
+        logger.info(f"Using shared SQLite task store at {settings.SHARED_STATE_DIR}")
+        return SqliteTaskManager(str(Path(settings.SHARED_STATE_DIR) / "tasks.sqlite3"))
+    return TaskManager()
 
 # Global task manager instance
-task_manager = TaskManager()
+task_manager = create_task_manager()
@@ -0,0 +1,79 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from .metrics import metrics, record_span
+
+class StageTimer:
+    """Collects wall-clock durations (ms) for the stages of a single query
+
+    Every stage is also recorded in the rag_stage_duration_ms histogram and
+    emitted as an OpenTelemetry span labelled with `method`.
+    """
+
+    def __init__(self, method: Optional[str] = None):
+        self.method = method
+        self.timings: Dict[str, float] = {}
+        self._started = time.perf_counter()
+        self._last_mark = self._started
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block as stage `name`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(name, start, time.perf_counter())
+
+    def mark(self, name: str):
+        """Close stage `name` as running from the previous mark until now"""
+        now = time.perf_counter()
+        self._add(name, self._last_mark, now)
+
+    def _add(self, name: str, start: float, end: float):
+        elapsed_ms = (end - start) * 1000
+        self.timings[name] = round(self.timings.get(name, 0.0) + elapsed_ms, 3)
+        self._last_mark = end
+        metrics.observe("rag_stage_duration_ms", elapsed_ms, help="Duration of each query/load stage",
+                        method=self.method, stage=name)
+        record_span(f"rag.{name}", start, end, method=self.method)
+
+    def as_dict(self) -> Dict[str, float]:
+        """Stage durations plus the total since the timer was created"""
+        return {**self.timings, "total": round((time.perf_counter() - self._started) * 1000, 3)}
+
+class SearchStageCallbacks:
+    """GraphRAG QueryCallbacks that split a search into context build, map and generation"""
+
+    def __init__(self, timer: StageTimer):
+        self.timer = timer
+        self._context_built = False
+
+    def _close_context_build(self):
+        if not self._context_built:
+            self._context_built = True
+            self.timer.mark("context_build")
+
+    def on_context(self, context) -> None:
+        self._close_context_build()
+
+    def on_map_response_start(self, map_response_contexts: List[str]) -> None:
+        self._close_context_build()
+
+    def on_map_response_end(self, map_response_outputs) -> None:
+        self.timer.mark("map")
+
+    def on_reduce_response_start(self, reduce_response_context) -> None:
+        pass
+
+    def on_reduce_response_end(self, reduce_response_output: str) -> None:
+        pass
+
+    def on_llm_new_token(self, token) -> None:
+        pass
+
+    def finish(self):
+        """Close the generation stage once the search call has returned"""
+        self._close_context_build()
+        self.timer.mark("generation")
@@ -0,0 +1,23 @@
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=1)
+def _encoding():
+    """Tokenizer used for accounting; falls back to a character heuristic without tiktoken"""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken unavailable, estimating tokens from characters: {e}")
+        return None
+
+def count_tokens(text: str) -> int:
+    """Approximate token count of `text`"""
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is None:
+        return max(1, len(text) // 4)
+    return len(encoding.encode(text, disallowed_special=()))
@@ -1,32 +1,57 @@
+import importlib.util
 import os
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 import logging
 import sys
+import threading
+import time
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import settings
 
 logger = logging.getLogger(__name__)
 
-try:
-    import chromadb
-    from chromadb import Documents, EmbeddingFunction, Embeddings
-    from langchain.chat_models import init_chat_model
-    from langchain_core.prompts import ChatPromptTemplate
-    from langchain_core.output_parsers import StrOutputParser
-    from langchain_mistralai import MistralAIEmbeddings
-    TRADITIONAL_RAG_AVAILABLE = True
-except ImportError as e:
-    TRADITIONAL_RAG_AVAILABLE = False
-    logger.warning(f"Traditional RAG dependencies not available: {e}")
-
-import chromadb.utils.embedding_functions as embedding_functions
-
-mistral_embedding_function = embedding_functions.OpenAIEmbeddingFunction(
-                api_key=os.getenv("GRAPHRAG_API_KEY"),
-                api_base="https://api.mistral.ai/v1",
-                model_name="mistral-embed"
-            )
+# chromadb and langchain are imported when the client is set up, not with this module.
+# The NumPy backend serves its export without chromadb, which it only needs to (re-)export.
+_required = ("langchain_core",) if settings.NAIVE_RAG_VECTOR_BACKEND == "numpy" else ("chromadb", "langchain_core")
+_missing = [name for name in _required if importlib.util.find_spec(name) is None]
+TRADITIONAL_RAG_AVAILABLE = not _missing
+if _missing:
+    logger.warning(f"Traditional RAG dependencies not available: {', '.join(_missing)}")
+
+from .metrics import metrics
+from .providers import get_provider
+from .shared_cache import SqliteCache
+from .timing import StageTimer
+from .tokens import count_tokens
+
+COLLECTION_NAME = "collection"
+
+def hnsw_metadata() -> Dict:
+    """Collection metadata fixing the HNSW build parameters (only honoured when a collection is created)"""
+    return {
+        "hnsw:space": settings.CHROMA_HNSW_SPACE,
+        "hnsw:construction_ef": settings.CHROMA_HNSW_CONSTRUCTION_EF,
+        "hnsw:M": settings.CHROMA_HNSW_M,
+    }
+
+def create_collection(chroma_client, embedding_function, name: str = COLLECTION_NAME, reset: bool = False):
+    """Create the naive RAG collection with the configured HNSW parameters
+
+    Space, construction ef and M cannot be changed on an existing collection,
+    so reset=True drops it first; documents must then be re-added.
+    """
+    if reset:
+        try:
+            chroma_client.delete_collection(name=name)
+        except Exception:
+            pass
+    return chroma_client.get_or_create_collection(
+        name=name,
+        embedding_function=embedding_function,
+        metadata=hnsw_metadata()
+    )
 
 
 class TraditionalRAGClient:
@@ -36,13 +61,29 @@ class TraditionalRAGClient:
         self.chroma_db_path = Path(chroma_db_path)
         self.chroma_client = None
         self.collection = None
+        self.embedding_function = None
         self.llm = None
         self.rag_chain = None
         self._setup_successful = False
+        self.warm_up_ms: Optional[float] = None
+        
+        # Retrieval cache shared by concurrent (batch) queries, keyed by (store version, query, num_results)
+        self._retrieval_cache: "OrderedDict[tuple, Dict]" = OrderedDict()
+        self._store_version: Optional[str] = None
+        self._store_checked_at = float("-inf")
+        self._retrieval_cache_lock = threading.Lock()
+        # Second level shared with the other worker processes (multi-worker deployments)
+        self._shared_cache = None
+        shared = settings.SHARED_CACHE if settings.SHARED_CACHE is not None else settings.WORKERS > 1
+        if shared:
+            self._shared_cache = SqliteCache(
+                str(Path(settings.SHARED_STATE_DIR) / "retrieval_cache.sqlite3"), settings.RETRIEVAL_CACHE_SIZE * 4
+            )
         
         self.api_key = os.getenv('GRAPHRAG_API_KEY')
+        self.provider = get_provider()
         
-        if TRADITIONAL_RAG_AVAILABLE and self.api_key:
+        if TRADITIONAL_RAG_AVAILABLE and (self.api_key or not self.provider.requires_api_key):
             try:
                 self._setup_successful = self._setup_traditional_rag()
             except Exception as e:
@@ -56,20 +97,30 @@ class TraditionalRAGClient:
             if not TRADITIONAL_RAG_AVAILABLE:
                 return False
             
-            if not self.api_key:
+            if not self.api_key and self.provider.requires_api_key:
                 return False
+            
+            from langchain_core.prompts import ChatPromptTemplate
+            from langchain_core.output_parsers import StrOutputParser
                         
-            self.chroma_db_path.mkdir(parents=True, exist_ok=True)
-            self.chroma_client = chromadb.PersistentClient(path=str(self.chroma_db_path))
-            
-            self.collection = self.chroma_client.get_collection(name="collection", embedding_function=mistral_embedding_function)
-            self.llm = init_chat_model(
-                "mistral-medium-latest", 
-                model_provider="mistralai", 
-                temperature=0, 
-                api_key=settings.MISTRAL_API_KEY,
-                max_retries=5
-            )
+            self.embedding_function = self.provider.embedding_function()
+            if settings.NAIVE_RAG_VECTOR_BACKEND == "numpy":
+                from .naive_vector_store import load_collection
+                # Exact in-process search; exported from the Chroma store on first use
+                self.collection = load_collection(
+                    Path(settings.NAIVE_RAG_INDEX_DIR), str(self.chroma_db_path), COLLECTION_NAME,
+                    settings.NAIVE_RAG_QUANTIZATION, settings.NAIVE_RAG_RESCORE_MULTIPLIER
+                )
+                logger.info(f"Naive RAG serving {self.collection.count()} chunks from {settings.NAIVE_RAG_INDEX_DIR}")
+                # Versioned now: a later re-export is not what this process serves
+                self.store_version()
+            else:
+                import chromadb
+                self.chroma_db_path.mkdir(parents=True, exist_ok=True)
+                self.chroma_client = chromadb.PersistentClient(path=str(self.chroma_db_path))
+                self.collection = self.chroma_client.get_collection(name=COLLECTION_NAME, embedding_function=self.embedding_function)
+                self._apply_search_ef()
+            self.llm = self.provider.chat_model()
             
             rag_prompt_template = """
 Generate a response that responds to the user's question, summarizing all information in the input data tables appropriate for the response, and incorporating any relevant general knowledge.
@@ -94,15 +145,112 @@ User Question: {query}
             logger.error(f"Error setting up traditional RAG: {e}")
             return False
     
-    def retrieval(self, query: str, num_results: int = 5) -> Dict:
+    def _apply_search_ef(self):
+        """Set the query-time HNSW ef (recall vs. latency) on the opened collection"""
+        search_ef = settings.CHROMA_HNSW_SEARCH_EF
+        if not search_ef:
+            return
+        try:
+            self.collection.modify(configuration={"hnsw": {"ef_search": search_ef}})
+        except Exception as e:
+            # Older Chroma versions take it as collection metadata
+            try:
+                self.collection.modify(metadata={**(self.collection.metadata or {}), "hnsw:search_ef": search_ef})
+            except Exception:
+                logger.warning(f"Could not set HNSW ef_search={search_ef}: {e}")
+                return
+        logger.info(f"Chroma HNSW ef_search set to {search_ef}")
+    
+    def store_version(self) -> str:
+        """Version of the vector store served, part of every retrieval cache key
+
+        From the store's files (count, total size, newest mtime) and chunk
+        count, so cached retrievals end with a re-ingest or re-export. The
+        Chroma store is rechecked every RETRIEVAL_CACHE_CHECK_SECONDS; a NumPy
+        export is only read when loaded.
+        """
+        numpy_backend = settings.NAIVE_RAG_VECTOR_BACKEND == "numpy"
+        now = time.monotonic()
+        if self._store_version is not None and (
+            numpy_backend or now - self._store_checked_at < settings.RETRIEVAL_CACHE_CHECK_SECONDS
+        ):
+            return self._store_version
+        store_path = Path(settings.NAIVE_RAG_INDEX_DIR) if numpy_backend else self.chroma_db_path
+        stats = []
+        for path in store_path.rglob("*"):
+            try:
+                if path.is_file():
+                    stats.append(path.stat())
+            except OSError:
+                continue
+        self._store_version = SqliteCache.make_key(
+            len(stats), sum(st.st_size for st in stats), max((st.st_mtime_ns for st in stats), default=0),
+            self.collection.count()
+        )[:16]
+        self._store_checked_at = now
+        return self._store_version
+    
+    def warm_up(self) -> Optional[float]:
+        """Run one nearest-neighbour query so the HNSW index is loaded before traffic arrives
+
+        Uses a stored embedding, so no embedding API call is made. Returns the
+        warm-up duration in milliseconds (None if there is nothing to warm).
+        """
+        if not self.collection:
+            return None
+        try:
+            started = time.perf_counter()
+            sample = self.collection.peek(limit=1)
+            embeddings = sample.get("embeddings")
+            if embeddings is None or len(embeddings) == 0:
+                return None
+            self.collection.query(query_embeddings=[list(embeddings[0])], n_results=1)
+            self.warm_up_ms = round((time.perf_counter() - started) * 1000, 3)
+            logger.info(f"Chroma collection warmed up in {self.warm_up_ms} ms")
+            return self.warm_up_ms
+        except Exception as e:
+            logger.warning(f"Chroma warm-up failed: {e}")
+            return None
+    
+    def retrieval(self, query: str, num_results: int = 5, timer: Optional[StageTimer] = None) -> Dict:
         try:
             if not self.collection:
                 return {"documents": [[]]}
             
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=num_results
-            )
+            timer = timer or StageTimer("naiverag")
+            version = self.store_version()
+            cache_key = (version, query, num_results)
+            with self._retrieval_cache_lock:
+                if cache_key in self._retrieval_cache:
+                    self._retrieval_cache.move_to_end(cache_key)
+                    metrics.inc("rag_cache_requests_total", help="Cache lookups by cache and result",
+                                cache="retrieval", result="hit")
+                    return self._retrieval_cache[cache_key]
+            metrics.inc("rag_cache_requests_total", help="Cache lookups by cache and result",
+                        cache="retrieval", result="miss")
+            
+            shared_key = SqliteCache.make_key(settings.NAIVE_RAG_VECTOR_BACKEND, version, query, num_results)
+            results = self._shared_cache.get(shared_key) if self._shared_cache else None
+            if self._shared_cache:
+                metrics.inc("rag_cache_requests_total", help="Cache lookups by cache and result",
+                            cache="retrieval_shared", result="miss" if results is None else "hit")
+            
+            if results is None:
+                with timer.stage("embedding"):
+                    query_embeddings = self.embedding_function([query])
+                
+                with timer.stage("ann_search"):
+                    results = self.collection.query(
+                        query_embeddings=query_embeddings,
+                        n_results=num_results
+                    )
+                if self._shared_cache:
+                    self._shared_cache.set(shared_key, {key: results.get(key) for key in ("ids", "documents", "distances")})
+            
+            with self._retrieval_cache_lock:
+                self._retrieval_cache[cache_key] = results
+                while len(self._retrieval_cache) > settings.RETRIEVAL_CACHE_SIZE:
+                    self._retrieval_cache.popitem(last=False)
             
             return results
                 
@@ -117,23 +265,36 @@ User Question: {query}
         })
         return response
     
-    def query_traditional(self, query: str) -> Dict:
+    def query_traditional(self, query: str, num_results: Optional[int] = None) -> Dict:
         try:
             if not self._setup_successful:
                 return {"error": "Traditional RAG not available or not setup"}
             
-            results = self.retrieval(query)
-            retrieved_docs = results.get("documents", [[]])[0]
+            timer = StageTimer("naiverag")
+            with timer.stage("retrieval"):
+                results = self.retrieval(query, num_results or settings.DEFAULT_NUM_RESULTS, timer)
+                retrieved_docs = results.get("documents", [[]])[0]
             
             if not retrieved_docs:
                 return {"error": "No relevant documents found"}
             
-            response = self._run_rag_chain(retrieved_docs, query)
+            with timer.stage("generation"):
+                response = self._run_rag_chain(retrieved_docs, query)
+            
+            tokens = {
+                "prompt": count_tokens(query) + sum(count_tokens(doc) for doc in retrieved_docs),
+                "completion": count_tokens(response)
+            }
+            for kind, value in tokens.items():
+                metrics.inc("rag_tokens_total", value, help="Tokens sent to / generated by the LLM",
+                            method="naiverag", kind=kind)
             
             return {
                 "response": response,
                 "method": "Traditional RAG",
-                "num_docs_retrieved": len(retrieved_docs)
+                "num_docs_retrieved": len(retrieved_docs),
+                "timings": timer.as_dict(),
+                "tokens": tokens
             }
             
         except Exception as e:
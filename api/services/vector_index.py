@@ -0,0 +1,191 @@
+import json
+import logging
+import os
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Optional approximate index for large collections
+try:
+    import hnswlib
+    HNSWLIB_AVAILABLE = True
+except ImportError:
+    HNSWLIB_AVAILABLE = False
+
+VECTORS_FILE = "vectors.npy"
+IDS_FILE = "ids.json"
+QUANTIZED_FILES = {"int8": "vectors_int8.npy", "binary": "vectors_binary.npy"}
+INT8_SCALE_FILE = "int8_scale.npy"
+QUANTIZATIONS = tuple(QUANTIZED_FILES)
+
+# Rows scored per block in the int8 first pass (bounds the float32 temporary)
+_SCAN_BLOCK = 16384
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint16)
+
+def quantize(vectors: np.ndarray, quantization: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Compress unit-length rows for the first-pass scan
+
+    int8: symmetric per-dimension scale, 4x smaller than float32.
+    binary: one sign bit per dimension packed into bytes, 32x smaller.
+    Returns (codes, int8 scale or None).
+    """
+    if quantization == "int8":
+        scale = np.abs(vectors).max(axis=0).astype(np.float32) / 127
+        scale[scale == 0] = 1.0
+        codes = np.clip(np.rint(vectors / scale), -127, 127).astype(np.int8)
+        return codes, scale
+    if quantization == "binary":
+        return np.packbits(vectors > 0, axis=1), None
+    raise ValueError(f"Unknown quantization '{quantization}', expected one of {QUANTIZATIONS}")
+
+def _replace(path: Path, write) -> None:
+    """Write a file under a temporary name and move it into place"""
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+class MmapVectorIndex:
+    """Row-normalised float32 embedding matrix, memory-mapped from disk, with exact top-k search
+
+    Scores are cosine similarities computed as one matrix-vector product; top-k
+    uses argpartition so the cost is linear in the number of rows. Above
+    `hnsw_threshold` rows an HNSW graph is built at load time when hnswlib is
+    installed.
+
+    With `quantization` ("int8" or "binary") the scan runs over compressed
+    codes and only the best `rescore_multiplier * k` candidates are rescored
+    against the full-precision rows, which stay on disk behind the memory map.
+    """
+
+    def __init__(self, ids: Sequence[str], vectors: np.ndarray, hnsw_threshold: Optional[int] = None,
+                 quantization: Optional[str] = None, codes: Optional[np.ndarray] = None,
+                 scale: Optional[np.ndarray] = None, rescore_multiplier: int = 4):
+        if len(ids) != vectors.shape[0]:
+            raise ValueError(f"{len(ids)} ids for {vectors.shape[0]} vectors")
+        self.ids = list(ids)
+        self.vectors = vectors
+        self._positions = {doc_id: i for i, doc_id in enumerate(self.ids)}
+        self._hnsw = None
+        self.quantization = quantization
+        self.rescore_multiplier = max(rescore_multiplier, 1)
+        self._codes, self._scale = codes, scale
+        if quantization and codes is None:
+            logger.warning(f"No stored {quantization} codes; quantizing {len(self.ids)} vectors in memory")
+            self._codes, self._scale = quantize(np.asarray(vectors), quantization)
+        if not quantization and hnsw_threshold and HNSWLIB_AVAILABLE and len(self.ids) >= hnsw_threshold:
+            self._build_hnsw()
+
+    @property
+    def dimension(self) -> int:
+        return self.vectors.shape[1]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @staticmethod
+    def normalize(vectors) -> np.ndarray:
+        """float32, C-contiguous, unit-length rows"""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    @classmethod
+    def save(cls, directory: Path, ids: Sequence[str], vectors, quantizations: Sequence[str] = ()) -> None:
+        """Write an index directory (vectors.npy + ids.json, plus codes for each requested quantization)
+
+        Files are replaced, not rewritten in place: processes that still map
+        the previous export keep reading it until they reload. vectors.npy is
+        written last, so its mtime marks a complete export.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        vectors = cls.normalize(vectors)
+        _replace(directory / IDS_FILE, lambda f: f.write(json.dumps(list(ids)).encode()))
+        for quantization in quantizations:
+            codes, scale = quantize(vectors, quantization)
+            _replace(directory / QUANTIZED_FILES[quantization], lambda f: np.save(f, codes))
+            if scale is not None:
+                _replace(directory / INT8_SCALE_FILE, lambda f: np.save(f, scale))
+        _replace(directory / VECTORS_FILE, lambda f: np.save(f, vectors))
+
+    @classmethod
+    def load(cls, directory: Path, mmap: bool = True, hnsw_threshold: Optional[int] = None,
+             quantization: Optional[str] = None, rescore_multiplier: int = 4) -> "MmapVectorIndex":
+        """Open an index directory; with mmap=True the matrix is paged in on demand and shared between processes"""
+        directory = Path(directory)
+        mmap_mode = "r" if mmap else None
+        vectors = np.load(directory / VECTORS_FILE, mmap_mode=mmap_mode)
+        ids = json.loads((directory / IDS_FILE).read_text())
+        codes, scale = None, None
+        if quantization:
+            codes_path = directory / QUANTIZED_FILES[quantization]
+            if codes_path.exists():
+                codes = np.load(codes_path, mmap_mode=mmap_mode)
+                scale = np.load(directory / INT8_SCALE_FILE) if quantization == "int8" else None
+        return cls(ids, vectors, hnsw_threshold=hnsw_threshold, quantization=quantization,
+                   codes=codes, scale=scale, rescore_multiplier=rescore_multiplier)
+
+    @staticmethod
+    def exists(directory: Path) -> bool:
+        directory = Path(directory)
+        return (directory / VECTORS_FILE).exists() and (directory / IDS_FILE).exists()
+
+    def _build_hnsw(self):
+        logger.info(f"Building HNSW index over {len(self.ids)} vectors")
+        index = hnswlib.Index(space="ip", dim=self.dimension)
+        index.init_index(max_elements=len(self.ids), ef_construction=200, M=16)
+        index.add_items(np.asarray(self.vectors), np.arange(len(self.ids)))
+        index.set_ef(64)
+        self._hnsw = index
+
+    def _approximate_scores(self, query: np.ndarray) -> np.ndarray:
+        """First-pass scores over the quantized codes (higher is better)"""
+        if self.quantization == "binary":
+            distances = _POPCOUNT[np.bitwise_xor(self._codes, np.packbits(query > 0))].sum(axis=1)
+            # Hamming distance mapped onto [-1, 1], comparable to a cosine
+            return 1.0 - 2.0 * distances / self.dimension
+        weights = (query * self._scale).astype(np.float32)
+        return np.concatenate([
+            self._codes[start:start + _SCAN_BLOCK] @ weights
+            for start in range(0, len(self.ids), _SCAN_BLOCK)
+        ])
+
+    @staticmethod
+    def _top(scores: np.ndarray, k: int) -> np.ndarray:
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])]
+
+    def search(self, query_vector, k: int = 10, rescore: bool = True) -> List[Tuple[str, float]]:
+        """Top-k (id, cosine similarity) pairs, best first
+
+        For a quantized index, rescore=False returns the first-pass ranking and
+        approximate scores without touching the full-precision rows.
+        """
+        if not self.ids:
+            return []
+        k = min(k, len(self.ids))
+        query = self.normalize(np.asarray(query_vector, dtype=np.float32).reshape(-1))
+
+        if self._hnsw is not None:
+            labels, distances = self._hnsw.knn_query(query, k=k)
+            return [(self.ids[i], float(1 - d)) for i, d in zip(labels[0], distances[0])]
+
+        if self._codes is not None:
+            approximate = self._approximate_scores(query)
+            if not rescore:
+                return [(self.ids[i], float(approximate[i])) for i in self._top(approximate, k)]
+            candidates = np.sort(self._top(approximate, min(k * self.rescore_multiplier, len(self.ids))))
+            scores = np.asarray(self.vectors[candidates]) @ query
+            return [(self.ids[candidates[i]], float(scores[i])) for i in self._top(scores, k)]
+
+        scores = self.vectors @ query
+        return [(self.ids[i], float(scores[i])) for i in self._top(scores, k)]
+
+    def get_vector(self, doc_id: str) -> Optional[np.ndarray]:
+        position = self._positions.get(doc_id)
+        return None if position is None else np.asarray(self.vectors[position])
@@ -0,0 +1,223 @@
+"""
+End-to-end benchmark for the RAG API query paths.
+
+Drives /query (sync), /query/async + /task polling (async) for each RAG method
+at a fixed concurrency and reports latency percentiles, throughput and the
+per-stage split (retrieval / context build / map / generation) taken from
+response metadata. Results are written as JSON so runs can be diffed between
+commits.
+
+Without --base-url the API is started in-process on a free port with the fake
+model provider (MODEL_PROVIDER=fake), so no network or API quota is used.
+
+Usage:
+    python benchmarks/api_benchmark.py --requests 50 --concurrency 8 --output bench.json
+    python benchmarks/api_benchmark.py --baseline bench.json --output bench_new.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+DEFAULT_QUERIES = [
+    "How is Daenerys Targaryen related to the old man from the Night's Watch?",
+    "Is it possible that Jon Snow is the son of Lyanna Stark and Rhaegar Targaryen?",
+    "What were the key events that led to the downfall of House Stark?",
+    "Who ruled the Seven Kingdoms before and after Robert Baratheon?",
+    "Who are the main candidates for the prince that was promised?",
+    "What are all the cities Daenerys Targaryen has visited?",
+]
+DEFAULT_METHODS = ["naiverag", "graphrag-localsearch", "graphrag-globalsearch"]
+MODES = ["sync", "async"]
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Linearly interpolated percentile (pct in 0-100)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return round(ordered[low] + (ordered[high] - ordered[low]) * (rank - low), 3)
+
+def summarize(latencies: List[float], stages: List[Dict[str, float]], errors: int, wall_seconds: float) -> Dict[str, Any]:
+    """Aggregate raw samples for one mode x method"""
+    stage_names = sorted({name for sample in stages for name in sample})
+    return {
+        "count": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall_seconds, 3) if wall_seconds > 0 else None,
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "mean": round(statistics.fmean(latencies), 3) if latencies else None,
+            "max": round(max(latencies), 3) if latencies else None,
+        },
+        "stages_ms": {
+            name: {
+                "p50": percentile([s[name] for s in stages if name in s], 50),
+                "mean": round(statistics.fmean([s[name] for s in stages if name in s]), 3),
+            }
+            for name in stage_names
+        },
+    }
+
+async def run_one(client, mode: str, payload: Dict[str, Any], poll_interval: float) -> Dict[str, Any]:
+    """Issue one query and return its latency and server-side stage timings"""
+    started = time.perf_counter()
+    if mode == "sync":
+        response = await client.post("/api/v1/query", json=payload)
+        body = response.json() if response.status_code == 200 else None
+    else:
+        response = await client.post("/api/v1/query/async", json=payload)
+        task_id = response.json()["task_id"]
+        while True:
+            await asyncio.sleep(poll_interval)
+            task = (await client.get(f"/api/v1/task/{task_id}")).json()
+            if task["status"] in ("completed", "failed"):
+                break
+        body = task.get("result")
+    latency = (time.perf_counter() - started) * 1000
+    ok = bool(body and body.get("success"))
+    timings = ((body or {}).get("metadata") or {}).get("timings") or {}
+    return {"latency_ms": latency, "ok": ok, "timings": {k: v for k, v in timings.items() if k != "total"}}
+
+async def run_scenario(client, mode: str, method: str, queries: List[str], num_requests: int,
+                       concurrency: int, poll_interval: float) -> Dict[str, Any]:
+    """Run num_requests queries for one mode x method with bounded concurrency"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def worker(i: int):
+        async with semaphore:
+            payload = {"query": queries[i % len(queries)], "method": method}
+            try:
+                return await run_one(client, mode, payload, poll_interval)
+            except Exception as e:
+                return {"latency_ms": None, "ok": False, "timings": {}, "exception": str(e)}
+
+    started = time.perf_counter()
+    samples = await asyncio.gather(*(worker(i) for i in range(num_requests)))
+    wall_seconds = time.perf_counter() - started
+
+    ok_samples = [s for s in samples if s["ok"]]
+    return summarize(
+        [s["latency_ms"] for s in ok_samples],
+        [s["timings"] for s in ok_samples],
+        errors=len(samples) - len(ok_samples),
+        wall_seconds=wall_seconds,
+    )
+
+def start_local_server() -> str:
+    """Start the API in a background thread with the fake provider and return its URL"""
+    os.environ.setdefault("MODEL_PROVIDER", "fake")
+    import uvicorn
+    from api.main import app
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Human-readable latency deltas against a previous run"""
+    lines = []
+    for mode, methods in current["results"].items():
+        for method, result in methods.items():
+            previous = baseline.get("results", {}).get(mode, {}).get(method)
+            if not previous:
+                continue
+            for pct in ("p50", "p95", "p99"):
+                new, old = result["latency_ms"][pct], previous["latency_ms"][pct]
+                if new is None or not old:
+                    continue
+                lines.append(f"{mode:5} {method:24} {pct}: {old:10.1f} -> {new:10.1f} ms ({(new - old) / old:+.1%})")
+    return lines
+
+async def main_async(args) -> Dict[str, Any]:
+    import httpx
+
+    base_url = args.base_url or start_local_server()
+    queries = [q.strip() for q in Path(args.queries).read_text().splitlines() if q.strip()] if args.queries else DEFAULT_QUERIES
+
+    results: Dict[str, Dict[str, Any]] = {}
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout) as client:
+        for mode in args.modes:
+            results[mode] = {}
+            for method in args.methods:
+                if args.warmup:
+                    await run_scenario(client, mode, method, queries, args.warmup, args.concurrency, args.poll_interval)
+                results[mode][method] = await run_scenario(
+                    client, mode, method, queries, args.requests, args.concurrency, args.poll_interval
+                )
+                latency = results[mode][method]["latency_ms"]
+                print(f"{mode:5} {method:24} p50={latency['p50']} p95={latency['p95']} p99={latency['p99']} "
+                      f"rps={results[mode][method]['throughput_rps']} errors={results[mode][method]['errors']}")
+
+    return {
+        "git_commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "base_url": args.base_url or "in-process",
+            "model_provider": os.environ.get("MODEL_PROVIDER") if not args.base_url else None,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "modes": args.modes,
+            "methods": args.methods,
+        },
+        "results": results,
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the RAG API query paths")
+    parser.add_argument("--base-url", help="Running API to benchmark (default: start one in-process with the fake provider)")
+    parser.add_argument("--methods", nargs="+", default=DEFAULT_METHODS)
+    parser.add_argument("--modes", nargs="+", default=MODES, choices=MODES)
+    parser.add_argument("--requests", type=int, default=30, help="Requests per mode x method")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured requests per mode x method")
+    parser.add_argument("--queries", help="Text file with one query per line")
+    parser.add_argument("--poll-interval", type=float, default=0.05, help="Task polling interval (s) for async mode")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--output", help="Write JSON results here")
+    parser.add_argument("--baseline", help="Previous JSON results to compare against")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = asyncio.run(main_async(args))
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        print("\nComparison with baseline:")
+        for line in compare(report, json.loads(Path(args.baseline).read_text())):
+            print(line)
+
+if __name__ == "__main__":
+    main()
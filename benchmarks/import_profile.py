@@ -0,0 +1,118 @@
+"""
+Import-time profile of the API.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter and
+reports the total import time, the slowest modules (cumulative) and the time
+per top-level package, so heavy dependencies pulled in at startup stand out.
+Optionally also times a full cold start: launching uvicorn until /health answers.
+
+Usage:
+    python benchmarks/import_profile.py
+    python benchmarks/import_profile.py --module api.services.graphrag_client --top 30
+    python benchmarks/import_profile.py --cold-start --output import_profile.json
+"""
+import argparse
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def profile_imports(module: str) -> List[Dict[str, Any]]:
+    """Per-module self and cumulative import times (microseconds) in import order"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, env={**os.environ, "PYTHONPATH": str(ROOT)}
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+    entries = []
+    for line in completed.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append({
+                "module": name,
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+                "depth": len(indent) // 2,
+            })
+    return entries
+
+def summarize(entries: List[Dict[str, Any]], top: int) -> Dict[str, Any]:
+    packages: Dict[str, int] = defaultdict(int)
+    for entry in entries:
+        packages[entry["module"].split(".")[0]] += entry["self_us"]
+    return {
+        "total_ms": round(sum(e["self_us"] for e in entries) / 1000, 1),
+        "modules_imported": len(entries),
+        "slowest_modules": [
+            {"module": e["module"], "cumulative_ms": round(e["cumulative_us"] / 1000, 1)}
+            for e in sorted(entries, key=lambda e: -e["cumulative_us"])[:top]
+        ],
+        "packages_ms": {
+            name: round(us / 1000, 1)
+            for name, us in sorted(packages.items(), key=lambda item: -item[1])[:top]
+        },
+    }
+
+def measure_cold_start(timeout: float = 120.0) -> float:
+    """Seconds from launching uvicorn until /health responds"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env={**os.environ, "PYTHONPATH": str(ROOT)}
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1):
+                    return round(time.perf_counter() - started, 3)
+            except OSError:
+                time.sleep(0.02)
+        raise TimeoutError("API did not become healthy")
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile API import time")
+    parser.add_argument("--module", default="api.main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--cold-start", action="store_true", help="Also time uvicorn start until /health answers")
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = {"module": args.module, **summarize(profile_imports(args.module), args.top)}
+    if args.cold_start:
+        report["cold_start_seconds"] = measure_cold_start()
+
+    print(f"import {args.module}: {report['total_ms']} ms, {report['modules_imported']} modules")
+    print("\nSlowest modules (cumulative):")
+    for entry in report["slowest_modules"]:
+        print(f"  {entry['cumulative_ms']:>9.1f} ms  {entry['module']}")
+    print("\nSelf time by package:")
+    for name, ms in report["packages_ms"].items():
+        print(f"  {ms:>9.1f} ms  {name}")
+    if "cold_start_seconds" in report:
+        print(f"\nCold start until /health: {report['cold_start_seconds']} s")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
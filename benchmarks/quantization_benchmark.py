@@ -0,0 +1,115 @@
+"""
+Recall vs. speed of quantized naive RAG vector search.
+
+Compares the full-precision exact scan of MmapVectorIndex with int8 and binary
+first-pass scans, with and without full-precision rescoring, over the exported
+naive RAG index (NAIVE_RAG_INDEX_DIR) or a synthetic matrix. Queries are stored
+vectors with added noise, so no embedding API calls are made. Recall@k is
+measured against the full-precision top-k.
+
+Usage:
+    python benchmarks/quantization_benchmark.py --index-dir rag/numpy_index --k 5
+    python benchmarks/quantization_benchmark.py --synthetic 100000 --dim 1024 --output quant.json
+"""
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from api.services.vector_index import INT8_SCALE_FILE, QUANTIZATIONS, QUANTIZED_FILES, MmapVectorIndex, quantize
+
+def make_queries(index: MmapVectorIndex, count: int, noise: float, rng: np.random.Generator) -> np.ndarray:
+    """Perturbed copies of random stored vectors"""
+    rows = rng.choice(len(index), size=min(count, len(index)), replace=False)
+    vectors = np.asarray(index.vectors[np.sort(rows)])
+    return vectors + rng.normal(0, noise, size=vectors.shape).astype(np.float32)
+
+def run_variant(index: MmapVectorIndex, queries: np.ndarray, truth: List[set], k: int, rescore: bool) -> Dict[str, Any]:
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        hits = index.search(query, k, rescore=rescore)
+        latencies.append((time.perf_counter() - started) * 1000)
+        recalls.append(len(expected & {doc_id for doc_id, _ in hits}) / k)
+    ordered = sorted(latencies)
+    return {
+        "recall_at_k": round(statistics.fmean(recalls), 4),
+        "latency_ms": {
+            "p50": round(ordered[len(ordered) // 2], 4),
+            "p95": round(ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)], 4),
+            "mean": round(statistics.fmean(latencies), 4),
+        },
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark quantized vector search recall and latency")
+    parser.add_argument("--index-dir", type=Path, help="MmapVectorIndex directory (e.g. NAIVE_RAG_INDEX_DIR)")
+    parser.add_argument("--synthetic", type=int, default=20000, help="Rows of a random matrix when no --index-dir")
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--noise", type=float, default=0.01)
+    parser.add_argument("--rescore-multipliers", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    index_dir = args.index_dir
+    if index_dir is None:
+        index_dir = Path(tempfile.mkdtemp(prefix="quant_bench_"))
+        ids = [f"chunk_{i}" for i in range(args.synthetic)]
+        MmapVectorIndex.save(index_dir, ids, rng.standard_normal((args.synthetic, args.dim), dtype=np.float32), QUANTIZATIONS)
+    else:
+        # Make sure codes exist so the variants measure the stored (memory-mapped) layout
+        missing = [q for q in QUANTIZATIONS if not (index_dir / QUANTIZED_FILES[q]).exists()]
+        if missing:
+            full = MmapVectorIndex.load(index_dir)
+            for quantization in missing:
+                codes, scale = quantize(np.asarray(full.vectors), quantization)
+                np.save(index_dir / QUANTIZED_FILES[quantization], codes)
+                if scale is not None:
+                    np.save(index_dir / INT8_SCALE_FILE, scale)
+
+    full = MmapVectorIndex.load(index_dir)
+    queries = make_queries(full, args.queries, args.noise, rng)
+    truth = [{doc_id for doc_id, _ in full.search(query, args.k)} for query in queries]
+
+    results: Dict[str, Any] = {"float32": run_variant(full, queries, truth, args.k, rescore=True)}
+    bytes_per_row = {"float32": full.dimension * 4}
+    for quantization in QUANTIZATIONS:
+        index = MmapVectorIndex.load(index_dir, quantization=quantization)
+        bytes_per_row[quantization] = index._codes.shape[1] * index._codes.itemsize
+        results[quantization] = run_variant(index, queries, truth, args.k, rescore=False)
+        for multiplier in args.rescore_multipliers:
+            index.rescore_multiplier = multiplier
+            results[f"{quantization}+rescore_x{multiplier}"] = run_variant(index, queries, truth, args.k, rescore=True)
+
+    print(f"{len(full)} vectors x {full.dimension} dims, {len(queries)} queries, k={args.k}")
+    for name, result in results.items():
+        print(f"{name:22} recall@{args.k}={result['recall_at_k']:.4f} "
+              f"p50={result['latency_ms']['p50']}ms p95={result['latency_ms']['p95']}ms")
+
+    if args.output:
+        report = {
+            "index_dir": str(index_dir),
+            "rows": len(full),
+            "dim": full.dimension,
+            "k": args.k,
+            "bytes_per_row": bytes_per_row,
+            "results": results,
+        }
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 import requests
 import json
 import os
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List, Optional, Union
 from IPython.display import display, Markdown
 import pandas as pd
 
@@ -81,6 +81,70 @@ def compare_query_methods(query: str, methods: List[str], base_url: str = None)
     
     return markdown
 
+def load_queries_jsonl(path: str) -> List[Dict[str, Any]]:
+    """
+    Load batch queries from a JSONL file.
+    
+    Each line is a JSON object with a "query" and either a single "method" or a
+    list of "methods"; any other RAGRequest field (community_level, ...) is kept.
+    
+    Args:
+        path: Path to the JSONL file
+    
+    Returns:
+        One request dict per query x method
+    """
+    requests_list = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            methods = item.pop("methods", None) or [item.pop("method")]
+            for method in methods:
+                requests_list.append({**item, "method": method})
+    return requests_list
+
+def batch_query_methods(queries: Union[str, List[Dict[str, Any]]], methods: Optional[List[str]] = None,
+                        base_url: str = None, max_concurrency: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Run many queries through the batch endpoint, yielding results as they complete.
+    
+    Args:
+        queries: Path to a JSONL file (see load_queries_jsonl), a list of request
+            dicts, or a list of query strings (combined with `methods`)
+        methods: Methods to run for every query string
+        base_url: Base URL for the API (default: from API_URL env var or localhost:8000)
+        max_concurrency: Maximum queries the server keeps in flight
+    
+    Yields:
+        Result dicts with index, query, method, elapsed_ms and result (a RAGResponse)
+    """
+    if base_url is None:
+        base_url = os.getenv('API_URL', 'http://localhost:8000')
+    
+    if isinstance(queries, str):
+        requests_list = load_queries_jsonl(queries)
+    elif queries and isinstance(queries[0], str):
+        requests_list = [{"query": q, "method": m} for q in queries for m in (methods or [])]
+    else:
+        requests_list = list(queries)
+    
+    params = {"max_concurrency": max_concurrency} if max_concurrency else None
+    body = "\n".join(json.dumps(r) for r in requests_list)
+    
+    with requests.post(
+        f"{base_url}/api/v1/query/batch",
+        data=body.encode('utf-8'),
+        params=params,
+        headers={"Content-Type": "application/x-ndjson"},
+        stream=True
+    ) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if line:
+                yield json.loads(line)
+
 # Example usage function
 def display_comparison(query: str, methods: List[str]):
     """
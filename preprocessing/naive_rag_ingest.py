@@ -0,0 +1,68 @@
+"""Chunk the input documents and (re)build the naive RAG Chroma collection.
+
+Script version of naive_rag_indexing.ipynb that creates the collection with the
+HNSW parameters from the API settings (CHROMA_HNSW_SPACE, CHROMA_HNSW_CONSTRUCTION_EF,
+CHROMA_HNSW_M). Run from the repository root:
+
+    python preprocessing/naive_rag_ingest.py --reset
+"""
+import argparse
+import glob
+import os
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from api.config import settings
+from api.services.providers import get_provider
+from api.services.traditional_rag_client import COLLECTION_NAME, create_collection, hnsw_metadata
+
+
+def load_files_from_directory(input_dir: str) -> str:
+    """Return the concatenated content of every file in input_dir."""
+    content = ''
+    for file_path in sorted(glob.glob(os.path.join(input_dir, "*"))):
+        if os.path.isfile(file_path):
+            with open(file_path, 'r', encoding='utf-8') as f:
+                content += f.read()
+    return content
+
+
+def main():
+    """Split the input documents into chunks and add them to the collection."""
+    import chromadb
+    from langchain_text_splitters import TokenTextSplitter
+
+    parser = argparse.ArgumentParser(description="Build the naive RAG Chroma collection")
+    parser.add_argument("--input-dir", default=settings.INPUT_DIRECTORY)
+    parser.add_argument("--chroma-db-path", default=settings.CHROMA_DB_PATH)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--reset", action="store_true",
+                        help="Drop the existing collection (needed to change HNSW build parameters)")
+    args = parser.parse_args()
+
+    texts = TokenTextSplitter(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap).split_text(
+        load_files_from_directory(args.input_dir)
+    )
+    print(f"Split input into {len(texts)} chunks")
+
+    chroma_client = chromadb.PersistentClient(path=args.chroma_db_path)
+    collection = create_collection(chroma_client, get_provider().embedding_function(), COLLECTION_NAME, args.reset)
+    print(f"Collection '{COLLECTION_NAME}' HNSW settings: {hnsw_metadata()}")
+
+    for start in range(0, len(texts), args.batch_size):
+        batch = texts[start:start + args.batch_size]
+        collection.add(
+            documents=batch,
+            ids=[f"chunk_{index}" for index in range(start, start + len(batch))]
+        )
+        print(f"Added chunks {start}-{start + len(batch) - 1}")
+
+    print(f"✅ Collection holds {collection.count()} chunks")
+
+
+if __name__ == "__main__":
+    main()
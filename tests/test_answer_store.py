@@ -0,0 +1,97 @@
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from api.config import settings
+from api.models.schemas import RAGMethod, RAGRequest
+from api.services.answer_store import STORE_FORMAT, AnswerStore, index_fingerprint, write_store
+from api.services.providers import FakeProvider
+
+QUESTIONS = ["Who is Ebenezer Scrooge?", "What are the main themes of the story?"]
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PROJECT_DIRECTORY", str(tmp_path / "project"))
+    monkeypatch.setattr(settings, "CHROMA_DB_PATH", str(tmp_path / "chroma_db"))
+    output = tmp_path / "project" / "output"
+    output.mkdir(parents=True)
+    (output / "entities.parquet").write_bytes(b"v1")
+    return output
+
+def _build(path, methods=(RAGMethod.NAIVE_RAG,), store_format=STORE_FORMAT):
+    provider = FakeProvider(seed=0)
+    write_store(path, {
+        "format": store_format,
+        "version": index_fingerprint(),
+        "created_at": "2026-01-01T00:00:00",
+        "answers": [
+            {"question": q, "method": m.value, "response": provider.complete(q), "metadata": {"sources": 3}}
+            for q in QUESTIONS for m in methods
+        ],
+    })
+
+@pytest.fixture
+def store(project, tmp_path):
+    path = tmp_path / "answers.json"
+    _build(path)
+    store = AnswerStore(str(path), min_similarity=0.85, check_seconds=0)
+    store.refresh()
+    return store
+
+def _match(store, query, method=RAGMethod.NAIVE_RAG, **options):
+    response = store.lookup(RAGRequest(query=query, method=method, **options))
+    return response and response.metadata["answer_store"]
+
+def test_exact_match_ignores_case_and_punctuation(store):
+    response = store.lookup(RAGRequest(query="  who IS ebenezer scrooge ", method=RAGMethod.NAIVE_RAG))
+    assert response.response == FakeProvider(seed=0).complete(QUESTIONS[0])
+    assert response.metadata["sources"] == 3
+    assert response.metadata["answer_store"]["match"] == "exact"
+    assert response.metadata["answer_store"]["question"] == QUESTIONS[0]
+
+def test_near_match_on_terms(store):
+    match = _match(store, "Main themes of the story")
+    assert (match["match"], match["similarity"], match["question"]) == ("near", 1.0, QUESTIONS[1])
+    # {main, themes, this, story} vs {main, themes, story}: 0.75, below min_similarity
+    assert _match(store, "main themes of this story") is None
+
+def test_no_match_for_other_methods_or_options(store):
+    assert _match(store, QUESTIONS[0], RAGMethod.GRAPHRAG_LOCAL) is None
+    assert _match(store, QUESTIONS[0], num_results=settings.DEFAULT_NUM_RESULTS + 1) is None
+    assert _match(store, QUESTIONS[0], include_context=True) is None
+    assert _match(store, QUESTIONS[0], num_results=settings.DEFAULT_NUM_RESULTS)["match"] == "exact"
+
+def test_dropped_when_the_index_changes(store, project, tmp_path):
+    # Exports derived from the output at load time and temp files don't change the fingerprint
+    (project / "entity_index").mkdir()
+    (project / "entity_index" / "vectors.npy").write_bytes(b"derived")
+    (project / "report_digests.parquet").write_bytes(b"derived")
+    (project / "relationships.parquet.tmp").write_bytes(b"partial")
+    store.refresh()
+    assert len(store) == len(QUESTIONS)
+
+    (project / "entities.parquet").write_bytes(b"rebuilt")
+    store.refresh()
+    assert len(store) == 0
+    assert _match(store, QUESTIONS[0]) is None
+
+    # Rebuilt against the new index: picked up on the next refresh
+    _build(tmp_path / "answers.json")
+    store.refresh()
+    assert _match(store, QUESTIONS[0])["match"] == "exact"
+
+def test_settings_are_part_of_the_fingerprint(store, monkeypatch):
+    monkeypatch.setattr(settings, "CHAT_MODEL", "another-model")
+    store.refresh()
+    assert len(store) == 0
+
+def test_unknown_format_and_missing_file(project, tmp_path):
+    path = tmp_path / "answers.json"
+    _build(path, store_format=STORE_FORMAT + 1)
+    store = AnswerStore(str(path), check_seconds=0)
+    store.refresh()
+    assert len(store) == 0
+
+    path.unlink()
+    store.refresh()
+    assert len(store) == 0 and store.refresh_due()
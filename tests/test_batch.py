@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("fastapi")
+
+from api.api.routes import _parse_batch_body
+from api.models.schemas import RAGMethod, RAGRequest, RAGResponse
+from api.services.providers import FakeProvider
+from api.services.rag_service import RAGService
+
+def test_parse_ndjson_skips_blank_lines():
+    body = "\n".join([
+        json.dumps({"query": "Who is Scrooge?", "method": "naiverag"}),
+        "",
+        json.dumps({"query": "Who is Marley?", "method": "graphrag-localsearch", "community_level": 1}),
+    ]).encode()
+
+    requests = _parse_batch_body(body, "application/x-ndjson")
+
+    assert [(r.query, r.method) for r in requests] == [
+        ("Who is Scrooge?", RAGMethod.NAIVE_RAG), ("Who is Marley?", RAGMethod.GRAPHRAG_LOCAL)
+    ]
+    assert requests[1].community_level == 1
+
+def test_parse_json_expands_queries_by_methods():
+    body = json.dumps({
+        "queries": ["q1", "q2"], "methods": ["naiverag", "graphrag-globalsearch"], "community_level": 3
+    }).encode()
+
+    requests = _parse_batch_body(body, "application/json")
+
+    assert [(r.query, r.method) for r in requests] == [
+        ("q1", RAGMethod.NAIVE_RAG), ("q1", RAGMethod.GRAPHRAG_GLOBAL),
+        ("q2", RAGMethod.NAIVE_RAG), ("q2", RAGMethod.GRAPHRAG_GLOBAL),
+    ]
+    assert all(r.community_level == 3 for r in requests)
+
+def test_parse_msgpack_list_and_map():
+    msgpack = pytest.importorskip("msgpack")
+    as_list = msgpack.packb([{"query": "q1", "method": "naiverag"}, {"query": "q2", "method": "graphrag-drift"}])
+    as_map = msgpack.packb({"queries": ["q1"], "methods": ["naiverag", "graphrag-drift"]})
+
+    listed = _parse_batch_body(as_list, "application/msgpack")
+    mapped = _parse_batch_body(as_map, "application/x-msgpack")
+
+    assert [(r.query, r.method) for r in listed] == [("q1", RAGMethod.NAIVE_RAG), ("q2", RAGMethod.GRAPHRAG_DRIFT)]
+    assert [(r.query, r.method) for r in mapped] == [("q1", RAGMethod.NAIVE_RAG), ("q1", RAGMethod.GRAPHRAG_DRIFT)]
+
+def test_parse_rejects_invalid_lines():
+    with pytest.raises(ValueError):
+        _parse_batch_body(b'{"query": "", "method": "naiverag"}\n', "application/x-ndjson")
+
+def test_process_batch_runs_identical_requests_once(monkeypatch):
+    provider = FakeProvider(seed=0)
+    calls = []
+
+    async def process_query(request):
+        calls.append((request.query, request.method))
+        await asyncio.sleep(0.01)
+        return RAGResponse(success=True, response=provider.complete(request.query), method=request.method.value)
+
+    service = RAGService()
+    monkeypatch.setattr(service, "process_query", process_query)
+    requests = [
+        RAGRequest(query="q1", method=RAGMethod.NAIVE_RAG),
+        RAGRequest(query="q1", method=RAGMethod.NAIVE_RAG),
+        RAGRequest(query="q1", method=RAGMethod.GRAPHRAG_LOCAL),
+        RAGRequest(query="q1", method=RAGMethod.NAIVE_RAG, community_level=1),
+    ]
+
+    async def collect():
+        return [item async for item in service.process_batch(requests, max_concurrency=2)]
+
+    items = asyncio.run(collect())
+
+    assert sorted(item.index for item in items) == [0, 1, 2, 3]
+    assert len(calls) == 3
+    by_index = {item.index: item for item in items}
+    assert by_index[0].result is by_index[1].result
+    assert by_index[0].result.response == by_index[1].result.response
+    assert by_index[3].result is not by_index[0].result
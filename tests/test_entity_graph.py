@@ -0,0 +1,53 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from api.services.entity_graph import EntityGraph, PathStep
+
+@pytest.fixture(scope="module")
+def graph():
+    entities = pd.DataFrame({
+        "title": ["A", "B", "C", "D", "E", "F", "G"],
+        "type": ["PERSON"] * 7,
+        "description": [f"entity {t}" for t in "ABCDEFG"],
+    })
+    relationships = pd.DataFrame({
+        "source": ["A", "B", "C", "D", "A", "F", "A"],
+        "target": ["B", "C", "D", "E", "F", "E", "UNKNOWN"],
+        "description": ["a-b", "b-c", "c-d", "d-e", "a-f", "f-e", "dangling"],
+        "weight": [1.0, 2.0, 3.0, 4.0, 5.0, None, 1.0],
+    })
+    return EntityGraph.from_tables(entities, relationships)
+
+def _hops(path):
+    return [(step.source, step.target) for step in path]
+
+def test_relationships_to_unknown_entities_are_skipped(graph):
+    assert graph.num_edges == 6
+    assert graph.degree("A") == 2
+    assert graph.degree("G") == 0
+
+def test_fewest_hops(graph):
+    path = graph.shortest_path("A", "E")
+    assert path == [PathStep("A", "F", "a-f", 5.0), PathStep("F", "E", "f-e", 1.0)]
+    assert _hops(graph.shortest_path("B", "D")) == [("B", "C"), ("C", "D")]
+
+def test_relationships_are_undirected(graph):
+    assert _hops(graph.shortest_path("E", "A")) == [("E", "F"), ("F", "A")]
+    assert graph.shortest_path("D", "C")[0].description == "c-d"
+
+def test_same_entity_and_unreachable(graph):
+    assert graph.shortest_path("C", "C") == []
+    assert graph.shortest_path("A", "G") is None
+    with pytest.raises(KeyError):
+        graph.shortest_path("A", "UNKNOWN")
+
+def test_max_hops(graph):
+    assert graph.shortest_path("B", "E", max_hops=2) is None
+    assert len(graph.shortest_path("B", "E", max_hops=3)) == 3
+
+def test_neighborhood_nearest_then_strongest(graph):
+    assert [(n["title"], n["hops"], n["via"]) for n in graph.neighborhood("A", hops=2)] == [
+        ("F", 1, "A"), ("B", 1, "A"), ("C", 2, "B"), ("E", 2, "F")
+    ]
+    assert [n["title"] for n in graph.neighborhood("A", hops=2, limit=1)] == ["F"]
@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("graphrag")
+
+from graphrag.config.embeddings import create_collection_name, entity_description_embedding
+from graphrag.config.models.vector_store_config import VectorStoreConfig
+from graphrag.utils.api import get_embedding_store
+from graphrag.vector_stores.factory import VectorStoreFactory
+
+from api.services.entity_index import (
+    ENTITY_INDEX_DIRNAME, NUMPY_VECTOR_STORE_TYPE, NumpyVectorStore, prepare_entity_index
+)
+from api.services.vector_index import MmapVectorIndex
+
+def test_prepare_entity_index_registers_with_graphrag_factory(tmp_path):
+    output_dir = tmp_path / "output"
+    store = VectorStoreConfig(type="lancedb", db_uri=str(output_dir / "lancedb"), container_name="default")
+    collection = create_collection_name(store.container_name, entity_description_embedding)
+    vectors = np.eye(3, 8, dtype=np.float32)
+    MmapVectorIndex.save(output_dir / ENTITY_INDEX_DIRNAME / collection, ["a", "b", "c"], vectors)
+    config = SimpleNamespace(vector_store={"default_vector_store": store})
+
+    assert prepare_entity_index(config, output_dir)
+
+    assert VectorStoreFactory.vector_store_types[NUMPY_VECTOR_STORE_TYPE] is NumpyVectorStore
+    assert store.type == NUMPY_VECTOR_STORE_TYPE
+    # Resolved the way GraphRAG's query API opens its embedding store
+    embedding_store = get_embedding_store({"default_vector_store": store.model_dump()}, entity_description_embedding)
+    assert isinstance(embedding_store, NumpyVectorStore)
+    results = embedding_store.similarity_search_by_vector(vectors[1].tolist(), k=1)
+    assert [r.document.id for r in results] == ["b"]
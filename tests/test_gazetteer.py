@@ -0,0 +1,56 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from api.services.gazetteer import Gazetteer, confident, tokenize
+
+@pytest.fixture(scope="module")
+def gazetteer():
+    entities = pd.DataFrame({
+        "id": ["e1", "e2", "e3", "e4", "e5", "e6"],
+        "title": ["DAENERYS TARGARYEN", "JON SNOW", "JON ARRYN", "WINTERFELL", "NIGHT'S WATCH", "TYRION LANNISTER"],
+        "aliases": [["Khaleesi", "Mother of Dragons"], None, None, None, None, "The Imp"],
+    })
+    return Gazetteer.from_entities(entities)
+
+def _found(gazetteer, query, fuzzy=True):
+    return [(m.title, m.kind, m.score) for m in gazetteer.find(query, fuzzy)]
+
+def test_tokenize_drops_possessives():
+    assert tokenize("Who guards the Night's Watch?") == ["who", "guards", "the", "night", "watch"]
+
+def test_titles_take_the_longest_match(gazetteer):
+    assert _found(gazetteer, "Was Jon Snow ever at Winterfell?") == [
+        ("JON SNOW", "title", 1.0), ("WINTERFELL", "title", 1.0)
+    ]
+    mention = gazetteer.find("Who joined the Night's Watch")[0]
+    assert (mention.title, mention.text, mention.start, mention.end) == ("NIGHT'S WATCH", "night watch", 3, 5)
+
+def test_aliases(gazetteer):
+    assert _found(gazetteer, "Where did the Mother of Dragons go?") == [("DAENERYS TARGARYEN", "alias", 0.9)]
+    assert _found(gazetteer, "what does the imp drink") == [("TYRION LANNISTER", "alias", 0.9)]
+    # A unique first name is an alias; one shared by two entities is not
+    assert _found(gazetteer, "Is Daenerys alive?") == [("DAENERYS TARGARYEN", "alias", 0.9)]
+    assert gazetteer.find("Is Jon alive?") == []
+
+def test_one_edit_typos(gazetteer):
+    assert _found(gazetteer, "Daenerys Targaryan and Tyrion Lanister") == [
+        ("DAENERYS TARGARYEN", "fuzzy", 0.75), ("TYRION LANNISTER", "fuzzy", 0.75)
+    ]
+    assert _found(gazetteer, "Winterfel") == [("WINTERFELL", "fuzzy", 0.75)]
+    assert gazetteer.find("Winterfel", fuzzy=False) == []
+    # Two edits away, and words too short to correct
+    assert gazetteer.find("Wintrfel") == []
+    assert gazetteer.find("Jon Snaw") == []
+
+def test_each_entity_reported_once(gazetteer):
+    assert gazetteer.titles("Jon Snow, and again Jon Snow") == ["JON SNOW"]
+
+def test_confident(gazetteer):
+    assert confident(gazetteer.find("Jon Snow and the Khaleesi"), 0.9)
+    assert not confident(gazetteer.find("Jon Snow and Winterfel"), 0.9)
+    assert not confident([], 0.5)
+
+def test_without_titles():
+    assert Gazetteer.from_entities(None).find("Jon Snow") == []
+    assert Gazetteer.from_entities(pd.DataFrame({"id": ["e1"]})).size == 0
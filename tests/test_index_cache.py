@@ -0,0 +1,74 @@
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from api.services.index_cache import IndexCache
+
+DAY = 86400
+
+def _entry(cache_dir, stage, name, age_days=0.0, text="cached"):
+    path = cache_dir / stage / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    mtime = time.time() - age_days * DAY
+    os.utime(path, (mtime, mtime))
+    return path
+
+@pytest.fixture
+def cache(tmp_path):
+    cache_dir = tmp_path / "cache"
+    _entry(cache_dir, "extract_graph", "old", age_days=40)
+    _entry(cache_dir, "extract_graph", "new", age_days=1)
+    _entry(cache_dir, "summarize_descriptions", "old", age_days=40)
+    (tmp_path / "keep").mkdir()
+    _entry(tmp_path, "keep", "outside")
+    return IndexCache(cache_dir, tmp_path)
+
+def test_prune_whole_stage(cache):
+    result = cache.prune(["extract_graph"])
+
+    assert result == {"stages": ["extract_graph"], "removed_entries": 2, "removed_bytes": 12}
+    assert not (cache.cache_dir / "extract_graph").exists()
+    assert (cache.cache_dir / "summarize_descriptions" / "old").exists()
+
+def test_prune_older_than_applies_to_every_stage(cache):
+    result = cache.prune(older_than_days=30)
+
+    assert result["stages"] == ["extract_graph", "summarize_descriptions"]
+    assert result["removed_entries"] == 2
+    assert (cache.cache_dir / "extract_graph" / "new").exists()
+    assert not (cache.cache_dir / "extract_graph" / "old").exists()
+    assert not (cache.cache_dir / "summarize_descriptions" / "old").exists()
+
+def test_prune_stale_prompts(cache, tmp_path):
+    prompt = tmp_path / "prompts" / "extract_graph.txt"
+    prompt.parent.mkdir()
+    prompt.write_text("v1")
+    config = SimpleNamespace(extract_graph=SimpleNamespace(prompt="prompts/extract_graph.txt"))
+    cache.start_run(config)
+    fresh = _entry(cache.cache_dir, "extract_graph", "fresh")
+
+    # Entries predating the recorded prompt are stale; entries used since are kept
+    result = cache.prune(stale_prompts=True, graphrag_config=config)
+    assert result["stages"] == ["extract_graph"]
+    assert fresh.exists() and not (cache.cache_dir / "extract_graph" / "new").exists()
+
+    # A changed prompt makes every entry of its stage stale
+    prompt.write_text("v2")
+    cache.prune(stale_prompts=True, graphrag_config=config)
+    assert not fresh.exists()
+
+@pytest.mark.parametrize("stage", ["", "..", ".", "/", "../keep", "extract_graph/..", "extract_graph/old"])
+def test_prune_rejects_paths(cache, tmp_path, stage):
+    with pytest.raises(ValueError, match="Invalid cache stage"):
+        cache.prune([stage])
+    assert (tmp_path / "keep" / "outside").exists()
+    assert (cache.cache_dir / "extract_graph" / "old").exists()
+
+def test_prune_rejects_unknown_stage(cache):
+    with pytest.raises(ValueError, match="Unknown cache stage"):
+        cache.prune(["community_reporting"])
@@ -0,0 +1,146 @@
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from api.config import settings
+from api.models.schemas import IndexJob, IndexJobStatus
+from api.services.index_jobs import IndexJobManager, SqliteIndexJobManager
+
+class FakeBuildClient:
+    """Stands in for GraphRAGClient.build_index; each build waits until released"""
+
+    def __init__(self, success=True, version="v1", cancel_delay=0.0):
+        self.success = success
+        self.version = version
+        self.cancel_delay = cancel_delay
+        self.release = False
+
+    async def build_index(self, incremental=False, callbacks=None):
+        try:
+            while not self.release:
+                await asyncio.sleep(0.01)
+        except asyncio.CancelledError:
+            # A pipeline step still winding down after the cancel
+            await asyncio.sleep(self.cancel_delay)
+            raise
+        return {"success": self.success, "errors": [] if self.success else ["workflow failed"]}
+
+    def output_version(self):
+        return self.version
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+@pytest.fixture(autouse=True)
+def fast_jobs(monkeypatch):
+    monkeypatch.setattr(settings, "INDEX_BUILD_EXECUTOR", "thread")
+    monkeypatch.setattr(settings, "INDEX_JOB_HEARTBEAT_SECONDS", 0.05)
+    monkeypatch.setattr(settings, "INDEX_JOB_STALE_SECONDS", 120.0)
+
+def _status(manager, job):
+    return manager.get_job(job.job_id).status
+
+def test_completed_build_records_output_version():
+    manager, client = IndexJobManager(), FakeBuildClient()
+    job = manager.start_job(client)
+    _wait_for(lambda: _status(manager, job) == IndexJobStatus.RUNNING)
+
+    with pytest.raises(RuntimeError, match="already running"):
+        manager.start_job(client)
+
+    client.release = True
+    _wait_for(lambda: _status(manager, job) == IndexJobStatus.COMPLETED)
+    assert manager.get_job(job.job_id).output_version == "v1"
+    with pytest.raises(RuntimeError, match="Only failed or cancelled"):
+        manager.resume_job(job.job_id, client)
+
+def test_failed_build_can_be_resumed():
+    manager, client = IndexJobManager(), FakeBuildClient(success=False)
+    client.release = True
+    job = manager.start_job(client)
+    _wait_for(lambda: _status(manager, job) == IndexJobStatus.FAILED)
+    assert manager.get_job(job.job_id).error == "workflow failed"
+
+    resumed = manager.resume_job(job.job_id, client)
+    assert resumed.resumed_from == job.job_id
+    _wait_for(lambda: _status(manager, resumed) == IndexJobStatus.FAILED)
+
+def test_cancel_blocks_new_builds_until_the_build_exits():
+    manager, client = IndexJobManager(), FakeBuildClient(cancel_delay=0.3)
+    job = manager.start_job(client)
+    _wait_for(lambda: _status(manager, job) == IndexJobStatus.RUNNING)
+
+    assert manager.cancel_job(job.job_id).status == IndexJobStatus.CANCELLING
+    with pytest.raises(RuntimeError, match="already cancelling"):
+        manager.start_job(client)
+
+    _wait_for(lambda: _status(manager, job) == IndexJobStatus.CANCELLED)
+    client.release = True
+    resumed = manager.resume_job(job.job_id, client)
+    assert resumed.resumed_from == job.job_id
+    _wait_for(lambda: _status(manager, resumed) == IndexJobStatus.COMPLETED)
+    with pytest.raises(KeyError):
+        manager.cancel_job("no-such-job")
+
+def test_is_servable_only_for_latest_completed_output():
+    manager, client = IndexJobManager(), FakeBuildClient(version="good")
+    assert manager.is_servable("anything")
+
+    job = manager.start_job(client)
+    assert not manager.is_servable("good")
+    client.release = True
+    _wait_for(lambda: _status(manager, job) == IndexJobStatus.COMPLETED)
+    assert manager.is_servable("good")
+    assert not manager.is_servable("partial")
+
+    failing = FakeBuildClient(success=False, version="partial")
+    failing.release = True
+    job = manager.start_job(failing)
+    _wait_for(lambda: _status(manager, job) == IndexJobStatus.FAILED)
+    assert manager.is_servable("good")
+    assert not manager.is_servable("partial")
+
+def test_sqlite_build_lock_and_cancel_across_managers(tmp_path):
+    path = tmp_path / "index_jobs.sqlite3"
+    worker_a, worker_b = SqliteIndexJobManager(str(path)), SqliteIndexJobManager(str(path))
+    client = FakeBuildClient()
+    job = worker_a.start_job(client)
+    _wait_for(lambda: _status(worker_b, job) == IndexJobStatus.RUNNING)
+
+    # The other worker sees the job and cannot start a second build
+    assert [j.job_id for j in worker_b.list_jobs()] == [job.job_id]
+    with pytest.raises(RuntimeError, match="already running"):
+        worker_b.start_job(client)
+    assert not worker_b.is_servable("v1")
+
+    # Cancelled through the other worker, picked up on the running worker's heartbeat
+    assert worker_b.cancel_job(job.job_id).status == IndexJobStatus.CANCELLING
+    _wait_for(lambda: _status(worker_b, job) == IndexJobStatus.CANCELLED)
+    assert _status(worker_a, job) == IndexJobStatus.CANCELLED
+
+    client.release = True
+    job = worker_b.start_job(client)
+    _wait_for(lambda: _status(worker_a, job) == IndexJobStatus.COMPLETED)
+    assert worker_a.is_servable("v1")
+
+def test_sqlite_expires_jobs_without_heartbeat(tmp_path, monkeypatch):
+    path = tmp_path / "index_jobs.sqlite3"
+    dead_worker = SqliteIndexJobManager(str(path))
+    orphan = IndexJob(job_id="orphan", status=IndexJobStatus.RUNNING, incremental=False,
+                      created_at=datetime.now().isoformat())
+    assert dead_worker._claim(orphan) is None
+
+    worker = SqliteIndexJobManager(str(path))
+    assert worker.get_job("orphan").status == IndexJobStatus.RUNNING
+    monkeypatch.setattr(settings, "INDEX_JOB_STALE_SECONDS", 0.0)
+    expired = worker.get_job("orphan")
+    assert expired.status == IndexJobStatus.FAILED
+    assert "stopped" in expired.error
+    assert worker.active_job() is None
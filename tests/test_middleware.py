@@ -0,0 +1,99 @@
+import gzip
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from api.middleware import CompressionMiddleware, accepted_encodings, choose_encoding
+
+BODY = "x" * 4096
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate, br", ["gzip", "deflate", "br"]),
+    ("GZIP;q=0.5, zstd;q=0", ["gzip"]),
+    ("identity;q=1, *;q=0.1", ["identity", "*"]),
+    ("gzip;q=abc", []),
+    ("", []),
+])
+def test_accepted_encodings(header, expected):
+    assert accepted_encodings(header) == expected
+
+@pytest.mark.parametrize("header, zstd, expected", [
+    ("gzip, zstd", True, "zstd"),
+    ("gzip, zstd", False, "gzip"),
+    ("zstd", False, None),
+    ("zstd;q=0, gzip", True, "gzip"),
+    ("*", True, "gzip"),
+    ("br, identity", True, None),
+])
+def test_choose_encoding(header, zstd, expected):
+    assert choose_encoding(header, zstd=zstd) == expected
+
+@pytest.fixture(scope="module")
+def client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/large")
+    def large():
+        return PlainTextResponse(BODY, headers={"ETag": '"abc"'})
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse("tiny", headers={"ETag": '"abc"'})
+
+    @app.get("/not-modified")
+    def not_modified():
+        return Response(status_code=304, headers={"ETag": 'W/"abc"'})
+
+    @app.get("/image")
+    def image():
+        return Response(BODY.encode(), media_type="image/png")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((f"{i}\n" for i in range(100)), media_type="application/x-ndjson")
+
+    return TestClient(app)
+
+def _get(client, path, accept_encoding):
+    # Undecoded body, as sent on the wire
+    with client.stream("GET", path, headers={"Accept-Encoding": accept_encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+def test_compresses_large_bodies_and_weakens_etag(client):
+    response, raw = _get(client, "/large", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == 'W/"abc"'
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) == len(raw)
+    assert gzip.decompress(raw).decode() == BODY
+
+@pytest.mark.parametrize("path, accept_encoding", [("/large", "identity"), ("/small", "gzip")])
+def test_uncompressed_responses_still_vary(client, path, accept_encoding):
+    response, _ = _get(client, path, accept_encoding)
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == '"abc"'
+    assert response.headers["vary"] == "Accept-Encoding"
+
+def test_not_modified_passes_through(client):
+    response, raw = _get(client, "/not-modified", "gzip")
+    assert response.status_code == 304 and raw == b""
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+
+def test_skipped_content_types(client):
+    response, raw = _get(client, "/image", "gzip")
+    assert "content-encoding" not in response.headers
+    assert "vary" not in response.headers
+    assert raw == BODY.encode()
+
+def test_streams_are_compressed_per_chunk(client):
+    response, raw = _get(client, "/stream", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert gzip.decompress(raw).decode() == "".join(f"{i}\n" for i in range(100))
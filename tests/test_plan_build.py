@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("pydantic_settings")
+
+from api.services.graphrag_client import GraphRAGClient
+
+@pytest.fixture
+def client(tmp_path):
+    (tmp_path / "input").mkdir()
+    (tmp_path / "input" / "a.txt").write_text("first document")
+    (tmp_path / "input" / "b.txt").write_text("second document")
+    return GraphRAGClient(str(tmp_path), load_output=False)
+
+def _built(client):
+    """Output and input manifest as a completed build leaves them"""
+    client.output_dir.mkdir(exist_ok=True)
+    for table in client.REQUIRED_TABLES:
+        (client.output_dir / f"{table}.parquet").write_bytes(b"")
+    client.input_manifest_path.write_text(json.dumps(client._scan_inputs()))
+
+def test_standard_unless_incremental(client):
+    _built(client)
+    assert client._plan_build(incremental=False)["mode"] == "standard"
+
+def test_full_build_without_output(client):
+    plan = client._plan_build(incremental=True)
+    assert plan["mode"] == "standard"
+    assert plan["input_changes"] is None
+
+def test_skipped_without_input_changes(client):
+    _built(client)
+    plan = client._plan_build(incremental=True)
+    assert plan["mode"] == "skipped"
+    assert plan["input_changes"] == {"new": [], "changed": [], "removed": []}
+
+def test_update_for_new_documents(client):
+    _built(client)
+    (client.input_dir / "c.txt").write_text("third document")
+    plan = client._plan_build(incremental=True)
+    assert plan["mode"] == "update"
+    assert plan["input_changes"]["new"] == ["c.txt"]
+
+def test_update_without_manifest(client):
+    _built(client)
+    client.input_manifest_path.unlink()
+    assert client._plan_build(incremental=True)["mode"] == "update"
+
+@pytest.mark.parametrize("edit, kind", [
+    (lambda input_dir: (input_dir / "a.txt").write_text("edited"), "changed"),
+    (lambda input_dir: (input_dir / "b.txt").unlink(), "removed"),
+])
+def test_full_build_for_changed_or_removed_documents(client, edit, kind):
+    _built(client)
+    (client.input_dir / "c.txt").write_text("third document")
+    edit(client.input_dir)
+    plan = client._plan_build(incremental=True)
+    assert plan["mode"] == "standard"
+    assert plan["input_changes"][kind]
+    assert kind in plan["notes"][0]
+
+def test_full_build_with_missing_table(client):
+    _built(client)
+    (client.output_dir / "communities.parquet").unlink()
+    (client.input_dir / "c.txt").write_text("third document")
+    assert client._plan_build(incremental=True)["mode"] == "standard"
@@ -0,0 +1,58 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from api.models.schemas import RAGMethod
+from api.services.gazetteer import Gazetteer
+from api.services.query_router import METHOD_COST_ORDER, QueryRouter
+
+ALL_METHODS = list(METHOD_COST_ORDER)
+
+@pytest.fixture(scope="module")
+def router():
+    entities = pd.DataFrame({
+        "id": ["e1", "e2", "e3"],
+        "title": ["DAENERYS TARGARYEN", "JON SNOW", "WINTERFELL"],
+    })
+    return QueryRouter(Gazetteer.from_entities(entities))
+
+@pytest.mark.parametrize("query, method", [
+    ("What are the main themes of the series?", RAGMethod.GRAPHRAG_GLOBAL),
+    ("Summarize the story as a whole", RAGMethod.GRAPHRAG_GLOBAL),
+    ("How is Jon Snow connected to Daenerys Targaryen?", RAGMethod.GRAPHRAG_PATH),
+    ("Compare Jon Snow and Daenerys Targaryen", RAGMethod.GRAPHRAG_LOCAL),
+    ("Who is the mother of Jon Snow?", RAGMethod.GRAPHRAG_LOCAL),
+    ("Tell me about Winterfell", RAGMethod.GRAPHRAG_LOCAL),
+    ("When was the wall built?", RAGMethod.NAIVE_RAG),
+    ("Tell me about dragons", RAGMethod.NAIVE_RAG),
+])
+def test_routes(router, query, method):
+    assert router.route(query, ALL_METHODS).method == method
+
+def test_decision_records_entities_and_signals(router):
+    decision = router.route("How is Jon Snow connected to Daenerys Targaryan?", ALL_METHODS)
+    assert decision.entities == ["JON SNOW", "DAENERYS TARGARYEN"]
+    assert decision.signals["connection"] and decision.signals["entity_index"]
+    assert decision.to_metadata()["requested"] == RAGMethod.AUTO.value
+
+def test_broad_question_naming_an_entity_is_not_global(router):
+    assert router.route("Describe the main themes around Jon Snow", ALL_METHODS).method == RAGMethod.GRAPHRAG_LOCAL
+
+def test_falls_back_to_next_preferred_method(router):
+    decision = router.route("What are the main themes?", [RAGMethod.NAIVE_RAG, RAGMethod.GRAPHRAG_DRIFT])
+    assert decision.method == RAGMethod.GRAPHRAG_DRIFT
+    assert "graphrag-globalsearch not enabled" in decision.reason
+
+def test_falls_back_to_cheapest_enabled_method(router):
+    enabled = [RAGMethod.GRAPHRAG_PATH, RAGMethod.GRAPHRAG_GLOBAL]
+    # Path search needs named entities
+    assert router.route("When was the wall built?", enabled).method == RAGMethod.GRAPHRAG_GLOBAL
+    assert router.route("When did Jon Snow reach Winterfell?", enabled).method == RAGMethod.GRAPHRAG_PATH
+    assert router.route("When was the wall built?", [RAGMethod.GRAPHRAG_PATH]).method == RAGMethod.GRAPHRAG_PATH
+
+def test_without_gazetteer_or_methods():
+    router = QueryRouter()
+    assert router.route("How is Jon Snow related to Daenerys?", ALL_METHODS).method == RAGMethod.NAIVE_RAG
+    assert not router.route("Who is Jon Snow?", ALL_METHODS).signals["entity_index"]
+    with pytest.raises(ValueError, match="No query methods"):
+        router.route("Who is Jon Snow?", [RAGMethod.AUTO])
@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pydantic_settings")
+
+from api.services.providers import FakeProvider
+from api.services.vector_index import QUANTIZATIONS, QUANTIZED_FILES, MmapVectorIndex, quantize
+
+VOCABULARY = ("ghost spirit christmas past present future scrooge marley cratchit tiny tim fezziwig "
+              "belle fred bells chains counting house money poor workhouse turkey pudding snow").split()
+
+@pytest.fixture(scope="module")
+def provider():
+    return FakeProvider(dimension=128, seed=0)
+
+@pytest.fixture(scope="module")
+def corpus(provider):
+    rng = random.Random(7)
+    texts = [" ".join(rng.choices(VOCABULARY, k=8)) for _ in range(300)]
+    ids = [f"doc-{i}" for i in range(len(texts))]
+    return ids, np.array([provider.embed(text) for text in texts], dtype=np.float32), texts
+
+@pytest.mark.parametrize("quantization", QUANTIZATIONS)
+def test_rescored_scores_are_exact_cosines(tmp_path, provider, corpus, quantization):
+    ids, vectors, texts = corpus
+    MmapVectorIndex.save(tmp_path, ids, vectors, quantizations=[quantization])
+    assert (tmp_path / QUANTIZED_FILES[quantization]).exists()
+    index = MmapVectorIndex.load(tmp_path, quantization=quantization)
+
+    for i, text in enumerate(texts[:20]):
+        query = MmapVectorIndex.normalize(provider.embed(text))
+        results = index.search(query, k=5)
+        assert results[0][0] == ids[i]
+        for doc_id, score in results:
+            assert score == pytest.approx(float(index.get_vector(doc_id) @ query), abs=1e-5)
+
+def test_int8_rescoring_recovers_exact_top_k(tmp_path, provider, corpus):
+    ids, vectors, texts = corpus
+    MmapVectorIndex.save(tmp_path, ids, vectors, quantizations=["int8"])
+    exact = MmapVectorIndex.load(tmp_path)
+    quantized = MmapVectorIndex.load(tmp_path, quantization="int8")
+
+    for text in texts[:20]:
+        query = provider.embed(text)
+        # Compared by score: the corpus has tied cosines, ranked in no particular order
+        np.testing.assert_allclose([s for _, s in quantized.search(query, k=5)],
+                                   [s for _, s in exact.search(query, k=5)], rtol=1e-5)
+
+def test_rescoring_improves_binary_recall(provider, corpus):
+    ids, vectors, texts = corpus
+    vectors = MmapVectorIndex.normalize(vectors)
+    exact = MmapVectorIndex(ids, vectors)
+    binary = MmapVectorIndex(ids, vectors, quantization="binary", rescore_multiplier=8)
+
+    def hits(results, query, cutoff):
+        return sum(exact.get_vector(doc_id) @ query >= cutoff for doc_id, _ in results)
+
+    first_pass, rescored = 0, 0
+    for text in texts[:20]:
+        query = MmapVectorIndex.normalize(provider.embed(text))
+        cutoff = exact.search(query, k=5)[-1][1] - 1e-6
+        first_pass += hits(binary.search(query, k=5, rescore=False), query, cutoff)
+        rescored += hits(binary.search(query, k=5), query, cutoff)
+    assert rescored > first_pass
+
+@pytest.mark.parametrize("quantization", QUANTIZATIONS)
+def test_first_pass_scores_are_approximate(provider, corpus, quantization):
+    ids, vectors, texts = corpus
+    index = MmapVectorIndex(ids, MmapVectorIndex.normalize(vectors), quantization=quantization)
+    query = provider.embed(texts[3])
+
+    first_pass = index.search(query, k=5, rescore=False)
+    rescored = index.search(query, k=5)
+
+    assert len(first_pass) == 5
+    assert rescored[0] == ("doc-3", pytest.approx(1.0, abs=1e-5))
+    assert [s for _, s in first_pass] == sorted((s for _, s in first_pass), reverse=True)
+    assert -1.0 <= first_pass[-1][1] <= 1.0 + 1e-3
+
+def test_missing_codes_are_quantized_in_memory(tmp_path, provider, corpus):
+    ids, vectors, texts = corpus
+    MmapVectorIndex.save(tmp_path, ids, vectors)
+    index = MmapVectorIndex.load(tmp_path, quantization="int8")
+    assert index.search(provider.embed(texts[10]), k=1)[0][0] == "doc-10"
+
+def test_quantize():
+    vectors = MmapVectorIndex.normalize(np.array([[1.0, -2.0, 0.0], [0.5, 0.5, 0.0]]))
+    codes, scale = quantize(vectors, "int8")
+    assert codes.dtype == np.int8 and np.abs(codes).max() == 127
+    np.testing.assert_allclose(codes * scale, vectors, atol=scale.max())
+    bits, no_scale = quantize(vectors, "binary")
+    assert no_scale is None and bits.shape == (2, 1)
+    assert np.unpackbits(bits, axis=1)[:, :3].tolist() == [[1, 0, 0], [1, 1, 0]]
+    with pytest.raises(ValueError, match="Unknown quantization"):
+        quantize(vectors, "pq")